@@ -9,158 +9,329 @@ Code by: @Sid72020123 on Github
 
 # --- Imports ---
 import time
-from json import loads
-from requests import get
-import arrow
-from threading import Thread
+from threading import Lock, Thread
 
-from Config import WEATHER_API_URL, WEATHER_API_KEY, TIMEZONE
+from Config import TIMEZONE, SCHEDULE_GRACE_PERIOD, PREFETCH_LEAD_SECONDS, PAYLOAD_CACHE_TTL, CACHE_SIZE, \
+    JOURNAL_REPLAY_WINDOW
+from Cache import TTLCache
+from HttpClient import UpstreamError
+from Scheduler import Scheduler
+from Settings import SettingsStore
+from Subscriptions import SubscriptionStore
+from Cluster import enqueue_deliveries
+from Timezones import local_date
+from TelegramAPI import PRIORITY_BULK
+from Providers import get_provider
+from Metrics import METRICS
 
 # --- Main Code ---
-# Unicode of some required emojis
-message_emoji = "\U00002709"
-warning_emoji = "\U000026A0"
-question_emoji = "\U00002753"
-success_emoji = "\U00002705"
-cloud_emoji = "\U00002601"
+# The messages of the updates are made by the providers (see the Providers package). They are imported when they're needed
+SETTINGS = SettingsStore("updates.json")  # The default settings. Changes to the file are applied without a restart
 
-ALL_UPDATES = loads(open("updates.json", "r").read())
-UPDATES_IDS = {}
-for update in ALL_UPDATES:
-    UPDATES_IDS[update["id"]] = {"name": update["name"], "settings": update["settings"]}
+SCHEDULER = Scheduler(TIMEZONE, grace_period=SCHEDULE_GRACE_PERIOD)
+SUBSCRIPTIONS = SubscriptionStore("subscriptions.json", SETTINGS.get, TIMEZONE)
+SETTINGS.add_listener(SUBSCRIPTIONS.apply_defaults)  # Only the chats using a changed update are indexed again
 
-CITY = str(UPDATES_IDS["wu"]["settings"]["city"]).lower()  # City for the weather API
 
-GROUPED_UPDATES = {}
+def update_settings():
+    """
+    Read the updates.json file again if it was changed. The subscriptions are updated by the listener of the settings store
+    """
+    return SETTINGS.reload()
+
+
+BOT = {"bot": None, "journal": None}  # Set by the schedule loop
+CLUSTER = {"queue": None, "lease": None, "shards": 0}  # Set by the worker loop if the bot runs as a cluster
+
+# The last message made for each (update_id, input, timezone). It's sent if a new message can't be made (eg., the API is down)
+PAYLOADS = TTLCache(PAYLOAD_CACHE_TTL, max_size=CACHE_SIZE)
+# The messages made before their time: (timezone, time) -> (the time they're sent at, {(update_id, input): message or None})
+PREFETCHED = {}
+_prefetched_lock = Lock()
 
 
-def group_equal_times():
+def group_chats(pairs):
     """
-    This function groups the schedule times together in a list
+    Group the chats by the input of their updates (eg., the same city). Each group gets the same message
+    :param pairs: A list of (chat_id, update_id) pairs
     """
-    global GROUPED_UPDATES
-    result = {}
-    for i in UPDATES_IDS:
-        t = UPDATES_IDS[i]["settings"]["time"]
-        if t in result:
-            result[t].append(i)
-        else:
-            result[t] = [i]
-    GROUPED_UPDATES = result
+    groups = {}
+    for chat_id, update_id in pairs:
+        try:
+            get_input = get_provider(update_id).get_input
+        except KeyError as E:
+            print(f"[*] Error while getting '{update_id}': {E}")
+            continue
+        key = (update_id, get_input(SUBSCRIPTIONS.get_settings(chat_id, update_id)))
+        groups.setdefault(key, []).append(chat_id)
+    return groups
 
 
-def get_weather_forecast(d):
+def make_message(update_id, update_input, timezone, at=None):
     """
-    Get the weather forcast from the API
-    :param d: The date
-    (BTW, I only needed the data of the chances of rain but still, you can add more data)
+    Make the message of an update using its provider. None is returned if it couldn't be made
+    :param update_id: The ID of the update
+    :param update_input: The input of the update (see the Providers package)
+    :param timezone: The timezone of the chats
+    :param at: The time the message will be sent at (a timestamp). None means now
     """
     try:
-        raw_data = get(
-            f"{WEATHER_API_URL}/forecast.json?q={CITY}&days=3&key={WEATHER_API_KEY}").json()
-        forecasts = raw_data["forecast"]["forecastday"]
-        for forecast in forecasts:
-            if d == forecast["date"]:
-                return [True, [forecast["day"]["daily_will_it_rain"], forecast["day"]["daily_chance_of_rain"]]]
-        return [False, f"No data found for the date: {d}"]
+        p = get_provider(update_id)
+        message = p.message(update_input, timezone, at)
+    except UpstreamError as E:
+        print(f"[*] Error while getting '{update_id}': {E.result}")
+        return None
     except Exception as E:
-        return [False, E]
+        print(f"[*] Error while getting '{update_id}': {E}")
+        return None
+    if message is not None:  # The message of a cached provider is as old as its data, so it's kept as long as the data can be used
+        PAYLOADS.set((update_id, update_input, str(timezone)), message,
+                     ttl=None if p.cache is None else p.ttl + p.max_stale)
+    return message
+
+
+def last_message(update_id, update_input, timezone):
+    message = PAYLOADS.peek((update_id, update_input, str(timezone)), fresh_only=True)
+    if message is not None:
+        print(f"[*] Sending the last message of '{update_id}' as a new one couldn't be made")
+    return message
+
 
+def prepare_deliveries(pairs, timezone=TIMEZONE, messages=None, at=None):
+    """
+    Get the message of each group of chats. Each message is fetched and made only once for all the chats with the same input (eg., the same city)
+    :param pairs: A list of (chat_id, update_id) pairs
+    :param timezone: The timezone of the chats
+    :param messages: The messages made before (see prefetch_updates). A None value means that making it failed
+    :param at: The time the messages are sent at (a timestamp)
+    :return: A list of (update_id, message, chat_ids, fire_time, date) tuples. The date is used by the journal (None if at isn't given)
+    """
+    messages = {} if messages is None else messages
+    date = None if at is None else scheduled_date(at, timezone)
+    deliveries = []
+    for (update_id, update_input), chat_ids in group_chats(pairs).items():
+        key = (update_id, update_input)
+        source = "prefetched"
+        if key in messages:  # If the prefetch failed, the last message is sent without waiting for the API again
+            message = messages[key]
+            if message is None:
+                message, source = last_message(update_id, update_input, timezone), "last"
+            if message is None:
+                message, source = make_message(update_id, update_input, timezone, at), "new"
+        else:
+            message, source = make_message(update_id, update_input, timezone, at), "new"
+            if message is None:
+                message, source = last_message(update_id, update_input, timezone), "last"
+        if message is None:
+            METRICS.inc("update_messages_total", update=update_id, source="none")
+            continue
+        METRICS.inc("update_messages_total", update=update_id, source=source)
+        deliveries.append((update_id, message, chat_ids, at, date))
+    return deliveries
 
-def send_weather_update(bot, sender_id):
+
+def scheduled_date(fire_time, timezone):
+    """
+    Get the date of a fire time in a timezone ("YYYY-MM-DD")
+    :param fire_time: A timestamp
+    :param timezone: The timezone (its name or a pytz timezone)
     """
-    Send the weather update message
+    return local_date(fire_time, str(timezone)).isoformat()
+
+
+def delivery_outcome(response):
+    """
+    Get the outcome of a sent message for the journal: "sent", "dropped" if sending it again won't help (eg., the bot was blocked) or "retry"
+    :param response: The JSON response of sendMessage
+    """
+    if response.get("ok"):
+        return "sent"
+    if response.get("error_code") in (400, 403):
+        return "dropped"
+    return "retry"
+
+
+def send_deliveries(bot, deliveries, replay: bool = False):
+    """
+    Send the messages to their chats and wait until all of them are sent.
+    If the journal is used (see schedule_loop), they're recorded in it and a chat never gets the same update twice for the same date
     :param bot: The object of TelegramBot class
-    :param sender_id: The Telegram ID of the person using the bot or the person using the commands
+    :param deliveries: A list of (update_id, message, chat_ids, fire_time, date) tuples (see prepare_deliveries)
+    :param replay: The deliveries were taken from the journal (see replay_journal), so they're already recorded in it
     """
-    date_today = arrow.now(TIMEZONE)
-    date_tomorrow = date_today.shift(days=1)
-    f = get_weather_forecast(date_tomorrow.strftime("%Y-%m-%d"))
-    if f[0] is True:
-        will_it_rain, chance_of_rain = f[1]
-        temp = "will rain" if will_it_rain == 1 else "will not rain"
-        w = f"""\n\n<b>{cloud_emoji} Daily Weather Forecast:</b>\n\nTomorrow in <i>{CITY.title()}</i>, it <b><u>{temp}</u></b> with the chances of rain being <b><u>{
-        chance_of_rain}%</u></b>\n\n<i>(Weather data was checked at {date_today.strftime('%d/%m/%Y %H:%M')})</i>"""
-        bot.send_message(sender_id, w, parse_mode="HTML")
-    else:
-        print(
-            f"WeatherAPI: Error while getting the weather - {f[1]}")
+    journal = BOT["journal"]
+    sent = []
+    for update_id, message, chat_ids, fire_time, date in deliveries:
+        if journal is not None and date is not None and not replay:
+            chat_ids = journal.plan(update_id, message, chat_ids, fire_time, date)
+        for chat_id in chat_ids:  # The messages are queued and sent as fast as Telegram's limits allow
+            sent.append((update_id, chat_id, fire_time, date, bot.send_message(chat_id, message, parse_mode="HTML",
+                                                                               priority=PRIORITY_BULK, wait=False)))
+    for update_id, chat_id, fire_time, date, future in sent:
+        response = future.result()
+        METRICS.inc("update_deliveries_total", update=update_id, outcome="ok" if response.get("ok") else "error")
+        if not response.get("ok"):
+            print(f"[*] Error while sending '{update_id}' to {chat_id}: {response.get('description')}")
+        if journal is not None and date is not None:
+            journal.mark(update_id, chat_id, date, fire_time, delivery_outcome(response))
 
 
-def send_daily_quotes(bot, sender_id):
+def replay_journal(bot):
     """
-    Send the daily quotes message
+    Send the messages of the journal which weren't sent before the bot stopped (if they're not older than JOURNAL_REPLAY_WINDOW)
     :param bot: The object of TelegramBot class
-    :param sender_id: The Telegram ID of the person using the bot or the person using the commands
     """
-    quote = get("https://zenquotes.io/api/today/").json()[0]
-    message = f"""<b>{message_emoji} Daily Quote:</b>\n\n<blockquote>{quote["q"]} - <b>{
-    quote["a"]}</b></blockquote>\n\n<i>Quotes fetched from <a href='https://zenquotes.io/'>ZenQuotes.io</a></i>"""
-    bot.send_message(sender_id, message, parse_mode="HTML")
+    deliveries = BOT["journal"].unfinished(JOURNAL_REPLAY_WINDOW)
+    if len(deliveries) > 0:
+        print(f"[*] Sending {sum(len(d[2]) for d in deliveries)} messages left unsent before the restart")
+        send_deliveries(bot, deliveries, replay=True)
 
 
-def send_number_fact(bot, sender_id):
+def deliver_updates(bot, pairs, timezone=TIMEZONE, messages=None, at=None):
     """
-    Send the number facts message
+    Make the messages of the updates and send them to the chats
     :param bot: The object of TelegramBot class
-    :param sender_id: The Telegram ID of the person using the bot or the person using the commands
+    :param pairs: A list of (chat_id, update_id) pairs
+    :param timezone: The timezone of the chats
+    :param messages: The messages made before (see prefetch_updates)
+    :param at: The time the messages are sent at (a timestamp)
     """
-    fact = get("http://numbersapi.com/random/math").text
-    message = f"""<b>{message_emoji} Daily Number Fact:</b>\n\n<blockquote>{fact}</blockquote>\n\n<i>Facts fetched from <a href='http://numbersapi.com/'>NumbersAPI.com</a></i>"""
-    bot.send_message(sender_id, message, parse_mode="HTML")
+    send_deliveries(bot, prepare_deliveries(pairs, timezone, messages, at))
 
 
-def update_settings():
+def should_fire(key, fire_time):
     """
-    This function just updates the variables when it's called so that the schedule loop can update the time automatically without re-running the code again...
+    Check if this process should run a scheduler job. It's always True unless the bot runs as a cluster (see the Cluster file),
+    where only the leader runs it and only once for each fire time. The other workers return at once (the leader puts the messages in the queue)
+    :param key: The key of the job
+    :param fire_time: The intended fire time (a timestamp)
     """
-    global CITY
-    global ALL_UPDATES
-    global UPDATES_IDS
-    global GROUPED_UPDATES
-    global TIMES
-    ALL_UPDATES = loads(open("updates.json", "r").read())
-    UPDATES_IDS = {}
-    for update in ALL_UPDATES:
-        UPDATES_IDS[update["id"]] = {"name": update["name"], "settings": update["settings"]}
+    lease = CLUSTER["lease"]
+    if lease is None:
+        return True
+    if not lease.is_leader:
+        return False
+    return CLUSTER["queue"].mark_fired(key, fire_time)
 
-    CITY = str(UPDATES_IDS["wu"]["settings"]["city"]).lower()
-    group_equal_times()
-    TIMES = GROUPED_UPDATES.keys()
 
+def prefetch_updates(key, fire_time):
+    """
+    Make the messages of the updates scheduled at a specific time before that time
+    :param key: A ("prefetch", timezone, time) tuple
+    :param fire_time: The intended fire time of the prefetch (a timestamp)
+    """
+    if CLUSTER["lease"] is not None and not CLUSTER["lease"].is_leader:
+        return
+    update_key = key[1:]
+    at = fire_time + PREFETCH_LEAD_SECONDS  # The time the messages are sent at
+    messages = {}
+    for update_id, update_input in group_chats(SUBSCRIPTIONS.due(update_key)):
+        messages[(update_id, update_input)] = make_message(update_id, update_input, update_key[0], at)
+    with _prefetched_lock:
+        PREFETCHED[update_key] = (at, messages)
 
-group_equal_times()
-# Remember to keep the order of the list items in the following two variables same:
-FUNCTIONS = [send_weather_update, send_daily_quotes, send_number_fact]
-UPDATE_TYPES = ["wu", "dq", "nf"]
 
-UPDATE_FUNCTIONS = {}
-index = 0
-for i in UPDATE_TYPES:
-    UPDATE_FUNCTIONS[i] = FUNCTIONS[index]
-    index += 1
+def run_updates(key, fire_time):
+    """
+    Send all the updates scheduled at a specific time to every chat subscribed to them
+    :param key: A (timezone, time) tuple
+    :param fire_time: The intended fire time (a timestamp)
+    """
+    with _prefetched_lock:
+        at, messages = PREFETCHED.pop(key, (None, None))
+    if not should_fire(key, fire_time):
+        return
+    if at is None or abs(at - fire_time) > 1:  # Made for another day
+        messages = None
+    deliveries = prepare_deliveries(SUBSCRIPTIONS.due(key), key[0], messages, fire_time)
+    if CLUSTER["queue"] is None:
+        send_deliveries(BOT["bot"], deliveries)
+    else:  # The workers send them
+        enqueue_deliveries(CLUSTER["queue"], deliveries, CLUSTER["shards"])
+
+
+def arm_scheduler(keys):
+    """
+    Add, re-arm or remove the scheduler jobs of the given fire times. Each time has a second job which makes its messages before it (if PREFETCH_LEAD_SECONDS is set)
+    :param keys: A set of (timezone, time) tuples
+    """
+    for key in keys:
+        prefetch_key = ("prefetch",) + key
+        try:
+            if key in SUBSCRIPTIONS.index:
+                if key not in SCHEDULER.jobs:
+                    SCHEDULER.set_job(key, key[1], run_updates, timezone=key[0])
+                if PREFETCH_LEAD_SECONDS > 0 and prefetch_key not in SCHEDULER.jobs:
+                    SCHEDULER.set_job(prefetch_key, key[1], prefetch_updates, timezone=key[0],
+                                      lead=PREFETCH_LEAD_SECONDS)
+            else:
+                SCHEDULER.remove_job(key)
+                SCHEDULER.remove_job(prefetch_key)
+        except Exception as E:  # One invalid time or timezone mustn't stop the other updates
+            print(f"[*] Error while scheduling '{key}': {E}")
 
-TIMES = GROUPED_UPDATES.keys()
+
+SUBSCRIPTIONS.add_listener(arm_scheduler)
+
+
+def subscribe_owner(sender_id):
+    """
+    Subscribe the owner to all the updates if there are no subscribers. Only one process of a cluster (the ingest process) does it,
+    as the others would write the subscriptions file at the same time
+    :param sender_id: The Telegram ID of the owner
+    """
+    SUBSCRIPTIONS.ensure_loaded()
+    if len(SUBSCRIPTIONS.subscribers) == 0:
+        SUBSCRIPTIONS.subscribe(sender_id)
+
+
+def schedule_loop(bot, sender_id, journal=None):
+    """
+    The main loop to run each function according to the schedule
+    :param bot: The object of TelegramBot class
+    :param sender_id: The Telegram ID of the owner. The owner is subscribed to all the updates if there are no subscribers (None to not subscribe anyone)
+    :param journal: The Journal the deliveries are recorded in (see the Journal file). The unfinished ones are sent first
+    """
+    BOT["bot"] = bot
+    BOT["journal"] = journal
+    if journal is not None:
+        Thread(target=replay_journal, args=(bot,), daemon=True).start()
+    SUBSCRIPTIONS.ensure_loaded()  # Read the files here (in the thread of the scheduler) instead of when this file is imported
+    if sender_id is not None:
+        subscribe_owner(sender_id)
+    arm_scheduler(set(SUBSCRIPTIONS.index))
+    SETTINGS.watch()
+    SCHEDULER.run()
 
 
-def schedule_loop(bot, sender_id):
+def worker_loop(bot, queue, lease, shard: int, shards: int, sender_id, journal=None, interval: float = 0.2):
     """
-    The main loop to check the time and run each function according to the schedule
+    The main loop of a worker process of the cluster. It runs the scheduler (which only fires while this process is the leader)
+    and sends the messages of its shard from the queue
     :param bot: The object of TelegramBot class
-    :param sender_id: The Telegram ID of the person using the bot or the person using the commands
-    :return:
+    :param queue: The WorkQueue shared by the processes
+    :param lease: The LeaderLease of the scheduler
+    :param shard: The shard of this worker
+    :param shards: The number of workers
+    :param sender_id: The Telegram ID of the owner (not used, the owner is subscribed by the ingest process)
+    :param journal: The Journal of this worker. A task claimed again after a worker stopped isn't sent twice to the same chat
+    :param interval: The number of seconds to wait when the queue is empty
     """
+    CLUSTER.update({"queue": queue, "lease": lease, "shards": shards})
+    BOT.update({"bot": bot, "journal": journal})  # Used by the claimed tasks, so it's set before the schedule loop starts
+    lease.keep()
+    SUBSCRIPTIONS.watch()  # The subscriptions are changed by the ingest process
+    Thread(target=schedule_loop, args=(bot, None, journal,), daemon=True).start()
     while True:
         try:
-            current_time = arrow.now(TIMEZONE)
-            current_hour = current_time.strftime("%H")
-            current_minute = current_time.strftime("%M")
-            current_second = current_time.strftime("%S")
-            formatted_time = f"{current_hour}:{current_minute}:{current_second}"
-            if formatted_time in TIMES:
-                updates = GROUPED_UPDATES[formatted_time]
-                for update in updates:
-                    Thread(target=UPDATE_FUNCTIONS[update], args=(bot, sender_id,)).start()
+            tasks = queue.claim(shard)
         except Exception as E:
-            print(f"[*] Error in Schedule Loop: {E}")
-        time.sleep(1)
+            print(f"[*] Error while reading the work queue: {E}")
+            tasks = []
+        if len(tasks) == 0:
+            time.sleep(interval)
+            continue
+        send_deliveries(bot, [(task["update_id"], task["message"], task["chat_ids"], task["fire_time"], task["date"])
+                              for _, task in tasks])
+        for task_id, _ in tasks:
+            queue.done(task_id)
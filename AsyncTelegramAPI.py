@@ -0,0 +1,269 @@
+"""
+Telegram Updates Bot - Async Telegram API Wrapper File
+------------------------------------------------------
+This file contains an asyncio version of the custom Telegram API wrapper.
+It uses a single aiohttp session with a limited connection pool, so thousands of messages can be sent at the same time without a thread for each of them.
+(aiohttp is only required if this file is used: pip install -r requirements-async.txt)
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import time
+import gzip
+import signal
+import asyncio
+from inspect import isawaitable
+from traceback import print_exc
+
+from TelegramAPI import BotBase, InlineKeyboardInput, TELEGRAM_API_URL, JSON_HEADERS, GZIP_JSON_HEADERS, \
+    POLL_ERROR_DELAY, encode_params
+from Dispatcher import AsyncDispatcher
+from Metrics import METRICS
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+# --- Main Code ---
+class AsyncTelegramBot(BotBase):
+    def __init__(self, token, connection_limit: int = 100, concurrency: int = 100, request_timeout: int = 60,
+                 offset_store=None, dispatcher=None, max_retries: int = 3, state_backend=None,
+                 api_url: str = TELEGRAM_API_URL, gzip_threshold: int = None):
+        """
+        The async version of the Main Bot code. The commands, events and inline keyboard functions can be normal or async functions
+        :param token: Telegram Bot API Token
+        :param connection_limit: The maximum number of open connections to the Telegram API
+        :param concurrency: The maximum number of requests sent at the same time (the others wait for their turn)
+        :param request_timeout: The total timeout (in seconds) of a request
+        :param offset_store: The object which saves the ID of the next update (see the OffsetStore file). The update_id.txt file is used by default
+        :param dispatcher: The object which runs the handlers of the updates (an AsyncDispatcher by default)
+        :param max_retries: The number of times a request is retried after a 429 (Too Many Requests) response
+        :param state_backend: The object which saves the state of the conversations, eg., SQLiteStateBackend (see the StateStore file)
+        :param api_url: The root endpoint of the Telegram API
+        :param gzip_threshold: Compress the request bodies of at least these many bytes (None to never compress them)
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncTelegramBot requires aiohttp. Install it using: pip install -r requirements-async.txt")
+        super().__init__(token, offset_store, state_backend=state_backend, api_url=api_url)
+        self.gzip_threshold = gzip_threshold
+        self.connection_limit = connection_limit
+        self.concurrency = concurrency
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.dispatcher = AsyncDispatcher() if dispatcher is None else dispatcher
+        self.session = None
+        self._semaphore = None
+
+    async def _request(self, method: str, params: dict, timeout: float = None):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connection_limit),
+                                                 timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        request_timeout = None if timeout is None else aiohttp.ClientTimeout(total=timeout)
+        body = encode_params(params).encode()  # Made once, even if the request is retried
+        headers = JSON_HEADERS
+        if self.gzip_threshold is not None and len(body) >= self.gzip_threshold:
+            body = gzip.compress(body, 5)
+            headers = GZIP_JSON_HEADERS
+        for attempt in range(self.max_retries + 1):
+            start = time.monotonic()
+            async with self._semaphore:
+                async with self.session.post(f"{self.api_url}/{method}", data=body, headers=headers,
+                                             timeout=request_timeout) as response:
+                    result = await response.json(content_type=None)
+            if METRICS.active:
+                METRICS.observe("telegram_api_seconds", time.monotonic() - start, method=method)
+                METRICS.inc("telegram_api_requests_total", method=method,
+                            status="ok" if result.get("ok") else result.get("error_code", "error"))
+            if result.get("error_code") != 429 or attempt == self.max_retries:
+                return result
+            await asyncio.sleep(result.get("parameters", {}).get("retry_after", 1))  # Telegram's flood limit
+
+    async def close(self):
+        """
+        Close the HTTP session
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_updates(self, timeout: int = 3, limit: int = 10, offset: int = -1):
+        start = time.monotonic()
+        result = await self._request("getUpdates", {"limit": limit, "offset": offset, "timeout": timeout},
+                                     timeout + 10)
+        if METRICS.active:
+            METRICS.observe("telegram_get_updates_seconds", time.monotonic() - start)
+            METRICS.inc("telegram_updates_received_total", len(result.get("result", [])))
+        return result
+
+    async def send_message(self, chat_id, message: str, parse_mode: str = "MarkdownV2"):
+        return await self._request("sendMessage", {"chat_id": chat_id, "parse_mode": parse_mode, "text": message,
+                                                   "disable_web_page_preview": True})
+
+    async def edit_message(self, chat_id, message_id, message: str, parse_mode: str = "MarkdownV2"):
+        payload = {"chat_id": chat_id, "message_id": message_id, "parse_mode": parse_mode, "text": message,
+                   "disable_web_page_preview": True}
+        return await self._request("editMessageText", payload)
+
+    async def send_inline_keyboard_input(self, chat_id, message, iki: InlineKeyboardInput,
+                                         parse_mode: str = "MarkdownV2"):
+        payload = {"chat_id": chat_id, "parse_mode": parse_mode, "text": message,
+                   "disable_web_page_preview": True, "reply_markup": iki.markup()}
+        self._register_keyboard(iki)
+        return await self._request("sendMessage", payload)
+
+    async def edit_input_keyboard_input(self, chat_id, message_id, iki: InlineKeyboardInput):
+        payload = {"chat_id": chat_id, "message_id": message_id, "reply_markup": iki.markup()}
+        self._register_keyboard(iki)
+        return await self._request("editMessageReplyMarkup", payload)
+
+    async def get_user_info(self, id: int, use_cache: bool = True):
+        if use_cache:
+            info = self.user_info_cache.get(id)
+            if info is not None:
+                return info
+        info = await self._request("getChat", {"chat_id": id})
+        if info.get("ok"):
+            self.user_info_cache.set(id, info)
+        return info
+
+    async def get_me(self):
+        return await self._request("getMe", {})
+
+    async def prepare_router(self):
+        """
+        Build the command router and get the username of the bot (used to ignore commands like "/help@OtherBot")
+        """
+        if self.router.bot_username is None:
+            try:
+                self.router.bot_username = (await self.get_me())["result"]["username"]
+            except Exception as E:
+                print(f"TelegramAPI: Error while getting the username of the bot - {E}")
+        self.router.compile(self)
+
+    async def answer_callback_query(self, query_id: int):
+        return await self._request("answerCallbackQuery", {"callback_query_id": query_id})
+
+    async def _emit_event(self, name, **data):
+        if self.events[name] is not None:
+            result = self.events[name](**data)
+            if isawaitable(result):
+                await result
+
+    async def process_update(self, raw_message):
+        """
+        Run the commands, the events and the inline keyboard functions for an update
+        :param raw_message: An update from the Telegram API
+        """
+        steps = self._update_steps(raw_message)
+        result = None
+        try:
+            while True:
+                func, data = steps.send(result)
+                start = time.monotonic()
+                result = func(**data)
+                if isawaitable(result):
+                    result = await result
+                if METRICS.active:
+                    METRICS.observe("handler_seconds", time.monotonic() - start, handler=func.__name__)
+        except StopIteration:
+            pass
+
+    async def _handle_update(self, raw_message):
+        try:
+            await self.process_update(raw_message)
+        except Exception as E:
+            METRICS.inc("handler_errors_total")
+            print(f"TelegramAPI: Error while handling the update {raw_message.get('update_id')} - {E}")
+            print_exc()
+
+    async def process_updates(self, raw_updates):
+        """
+        Handle a batch of updates. The updates of the same chat are handled in order and the updates of different chats at the same time.
+        An error in one update doesn't stop the others from being handled
+        :param raw_updates: A list of updates from the Telegram API
+        """
+        for raw_message in raw_updates:
+            await self.dispatcher.submit(self.get_update_chat_id(raw_message), self._handle_update, raw_message)
+
+    async def start_polling(self, timeout: int = 30, limit: int = 100):
+        """
+        Receive the updates using long polling and handle them
+        :param timeout: The number of seconds Telegram waits for a new update before returning an empty list
+        :param limit: The maximum number of updates received at once
+        """
+        try:  # Stop on SIGTERM the same way as on cancellation, so the offset is saved
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError, ValueError):  # Windows or not the main thread
+            pass
+        try:
+            UPDATE_ID = self.read_update_id()  # The updates received while the bot was stopped are handled first
+        except Exception as E:
+            print(f"TelegramAPI: Error while reading previous update ID: {E}")
+            return None
+        await self.prepare_router()
+        await self._emit_event("start")
+        try:
+            while True:
+                try:
+                    raw_update = await self.get_updates(timeout=timeout, limit=limit, offset=UPDATE_ID)
+                    if raw_update["ok"]:
+                        if len(raw_update["result"]) != 0:
+                            await self.process_updates(raw_update["result"])
+                            UPDATE_ID = self.increment_update_id(
+                                int(raw_update["result"][-1]["update_id"]))  # The offset is saved once for the whole batch
+                    else:  # Eg., 409 Conflict while a webhook is set
+                        print(f"TelegramAPI: Error while getting the updates - {raw_update.get('description')}")
+                        await asyncio.sleep(raw_update.get("parameters", {}).get("retry_after", POLL_ERROR_DELAY))
+                except aiohttp.ClientConnectionError:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as E:
+                    print(f"TelegramAPI: Polling Loop Error - {E}")
+                    print_exc()
+                    await asyncio.sleep(1)
+        finally:
+            await self.dispatcher.join()  # Finish handling the received updates
+            self.offset_store.flush()
+            await self._emit_event("stop")
+            await self.close()
+
+    async def start_webhook(self, host: str = "0.0.0.0", port: int = 8443, path: str = "/webhook",
+                            secret_token: str = None, url: str = None):
+        """
+        Receive the updates from Telegram using a webhook and handle them (the same way as start_polling)
+        :param host: The host to listen on
+        :param port: The port to listen on
+        :param path: The path Telegram posts the updates to
+        :param secret_token: The secret token Telegram sends in the X-Telegram-Bot-Api-Secret-Token header
+        :param url: The public URL of the webhook. If it's given, the webhook is set using setWebhook
+        """
+        if url is not None:
+            params = {"url": url}
+            if secret_token is not None:
+                params["secret_token"] = secret_token
+            result = await self._request("setWebhook", params)
+            if not result.get("ok"):
+                print(f"TelegramAPI: Error while setting the webhook - {result.get('description')}")
+                return None
+        loop = asyncio.get_running_loop()
+
+        def on_update(update):  # Called from the threads of the server
+            asyncio.run_coroutine_threadsafe(self.process_updates([update]), loop).result()
+
+        from Webhook import WebhookServer  # Only imported if the webhook is used
+        await self.prepare_router()
+        server = WebhookServer(host, port, path, secret_token, on_update)
+        await self._emit_event("start")
+        try:
+            await loop.run_in_executor(None, server.serve_forever)
+        finally:
+            server.stop()
+            await self.dispatcher.join()
+            await self._emit_event("stop")
+            await self.close()
@@ -0,0 +1,329 @@
+"""
+Telegram Updates Bot - Benchmark File
+-------------------------------------
+This file runs the bot (the main file) against the fake server (see the FakeServer file) and measures:
+0) Startup: the time taken by a new process to import the main file, to be ready to receive the updates and to answer the first command
+1) Polling: the number of updates handled per second and the latency of the command handlers (p50/p99)
+2) Broadcast: the time taken to send a scheduled update to many chats (from the intended fire time of the scheduler)
+and the memory used. With --workers, the broadcast is sent by a cluster of processes instead (see the Cluster file). The results are printed and can be appended to a JSON lines file to track them over time.
+
+The bot is run in a temporary folder, so the files of the project (subscriptions, caches, etc.) aren't changed.
+
+Usage (from the root folder of the project):
+python -m Benchmarks.Bench --updates 2000 --chats 1000
+python -m Benchmarks.Bench --latency 0.01 --rate-limit 0.05 --output bench_results.jsonl
+python -m Benchmarks.Bench --chats 20000 --latency 0.005 --workers 4
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import sys
+import time
+import shutil
+import signal
+import subprocess
+import resource
+import tempfile
+import tracemalloc
+from json import loads, dumps
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from threading import Thread
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from Benchmarks.FakeServer import FakeServer
+
+
+# --- Main Code ---
+def percentile(values, p):
+    """
+    Get a percentile of a list of numbers
+    :param values: The numbers
+    :param p: The percentile (0 to 100)
+    """
+    if len(values) == 0:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def prepare_environment(server, users):
+    """
+    Point the bot to the fake server and run it in a temporary folder. Must be called before the bot is imported
+    :param server: The FakeServer object
+    :param users: The number of users allowed to use the bot
+    """
+    folder = tempfile.mkdtemp(prefix="bot_bench_")
+    shutil.copy(os.path.join(ROOT, "updates.json"), folder)
+    os.chdir(folder)
+    os.environ.update({
+        "BOT_TOKEN": "bench",
+        "OWNER_TELEGRAM_ID": "1",
+        "ALLOWED_TELEGRAM_IDS": ",".join(str(i) for i in range(2, users + 1)),
+        "TELEGRAM_API_URL": f"{server.url}/bot",
+        "WEATHER_API_URL": f"{server.url}/weather",
+        "QUOTES_API_URL": f"{server.url}/quotes",
+        "NUMBERS_API_URL": f"{server.url}/numbers",
+        "WEATHER_API_KEY": "bench",
+        "WEBHOOK_URL": "",
+        "METRICS_PORT": "0"
+    })
+    return folder
+
+
+def remove_telegram_limits(bot):
+    """
+    Remove the flood limits of the outbound queue so that the speed of the bot itself is measured
+    :param bot: The TelegramBot object
+    """
+    from TelegramAPI import TokenBucket
+    bot.outbound.global_bucket = TokenBucket(1000000, 1000000)
+    bot.outbound.chat_rate = 1000000
+    bot.outbound.chat_burst = 1000000
+    bot.outbound.chat_buckets = {}
+
+
+# Run in a new process by bench_startup. It prints the time taken to import the main file and then starts the bot
+STARTUP_SCRIPT = """
+import os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import main
+print(time.perf_counter() - start, flush=True)
+sys.stdout = open(os.devnull, "w")  # The bot prints every command
+main.main()
+"""
+
+
+def bench_startup(server, runs):
+    """
+    Start the bot in a new process a few times and measure how fast it's ready
+    :param server: The FakeServer object
+    :param runs: The number of times the bot is started
+    """
+    results = {"import_s": [], "ready_s": [], "first_reply_s": []}
+    for _ in range(runs):
+        server.reset(clear_updates=True)  # The previous bot was stopped before confirming its last update
+        start = time.monotonic()
+        process = subprocess.Popen([sys.executable, "-c", STARTUP_SCRIPT.format(root=ROOT)], stdout=subprocess.PIPE,
+                                   text=True)
+        try:
+            import_seconds = float(process.stdout.readline())
+            if not server.wait_for("getUpdates", 1, timeout=30):  # The polling loop has started
+                continue
+            ready = time.monotonic()
+            server.push_message(1, "/help")
+            if not server.wait_for("sendMessage", 1, timeout=30):
+                continue
+            results["import_s"].append(import_seconds)
+            results["ready_s"].append(ready - start)
+            results["first_reply_s"].append(time.monotonic() - start)
+        finally:
+            process.kill()
+            process.wait()
+    return {"runs": runs, **{name: round(percentile(values, 50), 3) if values else None
+                             for name, values in results.items()}}
+
+
+def bench_polling(server, bot, updates, users, handler_times):
+    """
+    Send many commands to the bot and measure how fast they're handled
+    :param server: The FakeServer object
+    :param bot: The TelegramBot object
+    :param updates: The number of commands
+    :param users: The number of users sending them
+    :param handler_times: The list the "handler_seconds" values are added to (by a metrics hook)
+    """
+    server.reset()
+    handler_times.clear()
+    start = time.monotonic()
+    for i in range(updates):
+        server.push_message(1 + i % users, "/help")
+    finished = server.wait_for("sendMessage", updates, timeout=max(60, updates / 10))
+    elapsed = time.monotonic() - start
+    handled = server.counts.get("sendMessage:ok", 0)
+    return {"updates": updates, "handled": handled, "finished": finished, "seconds": round(elapsed, 3),
+            "updates_per_second": round(handled / elapsed, 1),
+            "handler_p50_ms": round(percentile(handler_times, 50) * 1000, 3) if handler_times else None,
+            "handler_p99_ms": round(percentile(handler_times, 99) * 1000, 3) if handler_times else None,
+            "rate_limited": server.rate_limited}
+
+
+def bench_broadcast(server, bot, chats, update_id, drift_times):
+    """
+    Subscribe many chats to an update, schedule it a few seconds later and measure the time taken to send it to all of them
+    :param server: The FakeServer object
+    :param bot: The TelegramBot object
+    :param chats: The number of chats
+    :param update_id: The update sent (eg., "dq")
+    :param drift_times: The list the "scheduler_drift_seconds" values are added to (by a metrics hook)
+    """
+    import arrow
+    from Config import TIMEZONE, JOURNAL_FILE
+    from APIs import SUBSCRIPTIONS, SETTINGS, schedule_loop
+    from Journal import Journal
+
+    # The chats are added directly (instead of using subscribe) so that the file isn't saved for each of them
+    SUBSCRIPTIONS.ensure_loaded()
+    for chat_id in range(1000000, 1000000 + chats):
+        SUBSCRIPTIONS.subscribers[chat_id] = {"timezone": None, "updates": {update_id: {}}}
+    SUBSCRIPTIONS.reindex()
+    fire = arrow.now(TIMEZONE).shift(seconds=3).replace(microsecond=0)
+    server.reset()
+    drift_times.clear()
+    SETTINGS.update(update_id, "time", fire.strftime("%H:%M:%S"))
+    journal = None if JOURNAL_FILE is None else Journal(JOURNAL_FILE)
+    Thread(target=schedule_loop, args=(bot, 1, journal), daemon=True).start()
+    finished = server.wait_for("sendMessage", chats, timeout=max(60, chats / 10))
+    times = sorted(t for method, chat_id, t in server.sent if method == "sendMessage" and chat_id >= 1000000)
+    fire_time = fire.timestamp()
+    return {"chats": chats, "update": update_id, "finished": finished, "sent": len(times),
+            "first_message_after_fire_s": round(times[0] - fire_time, 3) if times else None,
+            "fan_out_s": round(times[-1] - fire_time, 3) if times else None,
+            "messages_per_second": round(len(times) / max(times[-1] - times[0], 1e-6), 1) if len(times) > 1 else None,
+            "scheduler_drift_ms": round(max(drift_times) * 1000, 3) if drift_times else None,
+            "upstream_requests": server.upstream_requests,
+            "rate_limited": server.rate_limited}
+
+
+def bench_cluster(server, chats, update_id, workers, telegram_limits):
+    """
+    Like bench_broadcast, but the main file is started as a cluster of processes (one ingest process and some workers)
+    :param server: The FakeServer object
+    :param chats: The number of chats
+    :param update_id: The update sent (eg., "dq")
+    :param workers: The number of worker processes
+    :param telegram_limits: Keep Telegram's global limit
+    """
+    import arrow
+    from Config import TIMEZONE
+
+    subscribers = {str(chat_id): {"timezone": None, "updates": {update_id: {}}}
+                   for chat_id in range(1000000, 1000000 + chats)}
+    with open("subscriptions.json", "w") as file:
+        file.write(dumps(subscribers))
+    fire = arrow.now(TIMEZONE).shift(seconds=8).replace(microsecond=0)  # Enough time for the processes to start
+    updates = loads(open("updates.json", "r").read())
+    for update in updates:
+        if update["id"] == update_id:
+            update["settings"]["time"] = fire.strftime("%H:%M:%S")
+    with open("updates.json", "w") as file:
+        file.write(dumps(updates))
+    server.reset()
+    env = dict(os.environ, CLUSTER_WORKERS=str(workers))
+    if not telegram_limits:
+        env["TELEGRAM_GLOBAL_RATE"] = "1000000"
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")], env=env, stdout=subprocess.DEVNULL)
+    try:
+        finished = server.wait_for("sendMessage", chats, timeout=max(60, chats / 10))
+    finally:
+        process.send_signal(signal.SIGINT)  # The main process stops the others
+        process.wait()
+    times = sorted(t for method, chat_id, t in server.sent if method == "sendMessage" and chat_id >= 1000000)
+    fire_time = fire.timestamp()
+    return {"chats": chats, "update": update_id, "workers": workers, "finished": finished, "sent": len(times),
+            "first_message_after_fire_s": round(times[0] - fire_time, 3) if times else None,
+            "fan_out_s": round(times[-1] - fire_time, 3) if times else None,
+            "messages_per_second": round(len(times) / max(times[-1] - times[0], 1e-6), 1) if len(times) > 1 else None,
+            "upstream_requests": server.upstream_requests,
+            "rate_limited": server.rate_limited}
+
+
+def run(args):
+    server = FakeServer(latency=args.latency, rate_limit=args.rate_limit, retry_after=args.retry_after,
+                        upstream_latency=args.upstream_latency, upstream_errors=args.upstream_errors)
+    server.start()
+    folder = prepare_environment(server, args.users)
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        if args.startups > 0:
+            startup = bench_startup(server, args.startups)
+        if args.workers > 0:
+            return {"time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "settings": {"latency": args.latency, "rate_limit": args.rate_limit,
+                                 "upstream_latency": args.upstream_latency, "telegram_limits": args.telegram_limits},
+                    "cluster_broadcast": bench_cluster(server, args.chats, args.update, args.workers,
+                                                       args.telegram_limits)}
+        start = time.monotonic()
+        with redirect_stdout(open(os.devnull, "w")):  # The bot prints every command
+            import main
+            from Metrics import METRICS
+        import_seconds = time.monotonic() - start
+        bot = main.bot
+        if not args.telegram_limits:
+            remove_telegram_limits(bot)
+
+        handler_times = []
+        drift_times = []
+
+        def hook(kind, name, labels, value):
+            if name == "handler_seconds" and labels.get("handler") == "help":
+                handler_times.append(value)
+            elif name == "scheduler_drift_seconds" and labels.get("job") == "time":
+                drift_times.append(value)
+
+        METRICS.add_hook(hook)
+        results = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "import_seconds": round(import_seconds, 3),
+                   "startup": startup if args.startups > 0 else None,
+                   "settings": {"latency": args.latency, "rate_limit": args.rate_limit,
+                                "upstream_latency": args.upstream_latency, "upstream_errors": args.upstream_errors,
+                                "telegram_limits": args.telegram_limits}}
+        with redirect_stdout(open(os.devnull, "w")):
+            server.reset()
+            Thread(target=bot.start_polling, kwargs={"timeout": 1}, daemon=True).start()
+            server.wait_for("getUpdates", 1, timeout=30)  # The time taken to start isn't counted
+            if args.updates > 0:
+                results["polling"] = bench_polling(server, bot, args.updates, args.users, handler_times)
+            if args.chats > 0:
+                results["broadcast"] = bench_broadcast(server, bot, args.chats, args.update, drift_times)
+        results["memory"] = {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+        if args.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            results["memory"].update({"traced_current_mb": round(current / 1024 / 1024, 2),
+                                      "traced_peak_mb": round(peak / 1024 / 1024, 2)})
+        return results
+    finally:
+        server.stop()
+        os.chdir(ROOT)
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the bot against a fake Telegram Bot API server")
+    parser.add_argument("--updates", type=int, default=2000, help="The number of commands sent to the bot (0 to skip)")
+    parser.add_argument("--users", type=int, default=50, help="The number of users sending the commands")
+    parser.add_argument("--chats", type=int, default=1000, help="The number of chats receiving the broadcast (0 to skip)")
+    parser.add_argument("--update", default="dq", help="The update broadcasted (an ID from the updates.json file)")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds taken by each Telegram API request")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Share of the sending requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="The retry_after of the 429 responses")
+    parser.add_argument("--upstream-latency", type=float, default=0, help="Seconds taken by each update API request")
+    parser.add_argument("--upstream-errors", type=float, default=0, help="Share of the update API requests answered with 503")
+    parser.add_argument("--telegram-limits", action="store_true", help="Keep the flood limits of the outbound queue")
+    parser.add_argument("--startups", type=int, default=3,
+                        help="The number of times the bot is started in a new process to measure its startup (0 to skip)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Only measure the broadcast, sent by a cluster with these many worker processes")
+    parser.add_argument("--trace-memory", action="store_true", help="Measure the memory allocated by Python (slower)")
+    parser.add_argument("--output", help="Append the results to this JSON lines file")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)  # The bot is run in another folder
+
+    results = run(args)
+    print(dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "a") as file:
+            file.write(dumps(results) + "\n")
+    os._exit(0)  # The threads of the bot never stop on their own
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Telegram Updates Bot - Fake Server File
+---------------------------------------
+This file contains a local HTTP server which acts like the Telegram Bot API and the APIs of the updates (weather, quotes, number facts).
+The time it takes to answer and the share of the requests answered with 429 (Too Many Requests) can be changed to see how the bot behaves.
+
+The paths are:
+/bot<token>/<method> - getUpdates, sendMessage, editMessageText, editMessageReplyMarkup, answerCallbackQuery, getChat, getMe, setWebhook, deleteWebhook
+/weather/forecast.json - like WeatherAPI.com
+/quotes/today/ - like ZenQuotes.io
+/numbers/random/math - like NumbersAPI.com
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import time
+import gzip
+import sys
+import random
+import socket
+from json import loads, dumps
+from datetime import date, timedelta
+from urllib.parse import urlparse, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Condition, Thread
+
+# --- Main Code ---
+RECORDED_METHODS = {"sendMessage", "editMessageText", "editMessageReplyMarkup", "answerCallbackQuery"}
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 128  # Many bots may connect at the same time (eg., the workers of a cluster)
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):  # The bot was stopped while waiting for a response
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0, rate_limit: float = 0,
+                 retry_after: int = 1, upstream_latency: float = 0, upstream_errors: float = 0):
+        """
+        The fake server class
+        :param host: The host to listen on
+        :param port: The port to listen on (0 for any free port)
+        :param latency: The number of seconds each Telegram API request takes
+        :param rate_limit: The share (0 to 1) of the sending requests answered with 429
+        :param retry_after: The "retry_after" value of the 429 responses
+        :param upstream_latency: The number of seconds each request to the fake update APIs takes
+        :param upstream_errors: The share (0 to 1) of the requests to the fake update APIs answered with 503
+        """
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.upstream_latency = upstream_latency
+        self.upstream_errors = upstream_errors
+        self.updates = []  # The updates not confirmed by the bot yet
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.sent = []  # (method, chat_id, time.time()) of every successful request in RECORDED_METHODS
+        self.counts = {}  # method -> number of requests (including the 429 ones)
+        self.rate_limited = 0
+        self.upstream_requests = 0
+        self._condition = Condition()
+        self.server = FakeHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://{host}:{self.port}"
+
+    # --- Updates sent to the bot ---
+    def push_update(self, update: dict):
+        """
+        Add an update which the bot receives using getUpdates. The update_id is set here
+        :param update: The update without the update_id (eg., {"message": {...}})
+        """
+        with self._condition:
+            update = dict(update, update_id=self.next_update_id)
+            self.next_update_id += 1
+            self.updates.append(update)
+            self._condition.notify_all()
+        return update["update_id"]
+
+    def push_message(self, chat_id: int, text: str, first_name: str = "User"):
+        """
+        Add a text message (or a command) sent by a user
+        :param chat_id: The Telegram ID of the user
+        :param text: The text of the message
+        :param first_name: The first name of the user
+        """
+        with self._condition:
+            message_id = self.next_message_id
+            self.next_message_id += 1
+        message = {"message_id": message_id, "date": int(time.time()), "text": text,
+                   "from": {"id": chat_id, "is_bot": False, "first_name": first_name},
+                   "chat": {"id": chat_id, "type": "private", "first_name": first_name}}
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return self.push_update({"message": message})
+
+    def push_callback_query(self, chat_id: int, message_id: int, data: str):
+        """
+        Add a button press of a user
+        :param chat_id: The Telegram ID of the user
+        :param message_id: The ID of the message with the buttons
+        :param data: The callback data of the button
+        """
+        return self.push_update({"callback_query": {
+            "id": str(random.getrandbits(32)), "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+            "message": {"message_id": message_id, "chat": {"id": chat_id, "type": "private"}}, "data": data}})
+
+    # --- Results ---
+    def wait_for(self, method: str, count: int, timeout: float = 60):
+        """
+        Wait until the bot has successfully sent "count" requests of a method
+        :param method: The method (eg., "sendMessage")
+        :param count: The number of requests
+        :param timeout: The maximum number of seconds to wait
+        """
+        end = time.monotonic() + timeout
+        with self._condition:
+            while self.counts.get(f"{method}:ok", 0) < count:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def reset(self, clear_updates: bool = False):
+        """
+        Clear the recorded requests
+        :param clear_updates: Also remove the updates not confirmed by the bot yet
+        """
+        with self._condition:
+            if clear_updates:
+                self.updates = []
+            self.sent = []
+            self.counts = {}
+            self.rate_limited = 0
+            self.upstream_requests = 0
+
+    # --- The Telegram Bot API ---
+    def _get_updates(self, params):
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        timeout = float(params.get("timeout", 0))
+        end = time.monotonic() + timeout
+        with self._condition:
+            if offset < 0:  # Only the last update (used by the bot to find the latest update ID)
+                return self.updates[offset:]
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]  # Confirmed by the bot
+            while len(self.updates) == 0 and time.monotonic() < end:
+                self._condition.wait(end - time.monotonic())
+            return self.updates[:limit]
+
+    def telegram(self, method: str, params: dict):
+        """
+        Answer a request to the Telegram Bot API
+        :param method: The method
+        :param params: The parameters of the request
+        :return: (HTTP status code, JSON response)
+        """
+        if self.latency > 0 and method != "getUpdates":
+            time.sleep(self.latency)
+        if method in RECORDED_METHODS and self.rate_limit > 0 and random.random() < self.rate_limit:
+            with self._condition:
+                self.rate_limited += 1
+                self.counts[f"{method}:429"] = self.counts.get(f"{method}:429", 0) + 1
+            return 429, {"ok": False, "error_code": 429,
+                         "description": f"Too Many Requests: retry after {self.retry_after}",
+                         "parameters": {"retry_after": self.retry_after}}
+        if method == "getUpdates":
+            with self._condition:  # Counted when it's received, so wait_for() knows when the bot is polling
+                self.counts["getUpdates:ok"] = self.counts.get("getUpdates:ok", 0) + 1
+                self._condition.notify_all()
+            return 200, {"ok": True, "result": self._get_updates(params)}
+        if method == "getMe":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Fake", "username": "FakeBot"}}
+        if method == "getChat":
+            chat_id = int(params.get("chat_id", 0))
+            return 200, {"ok": True, "result": {"id": chat_id, "type": "private", "first_name": f"User {chat_id}",
+                                                "username": f"user{chat_id}"}}
+        if method in ("setWebhook", "deleteWebhook"):
+            return 200, {"ok": True, "result": True}
+        if method in RECORDED_METHODS:
+            chat_id = params.get("chat_id")
+            with self._condition:
+                self.sent.append((method, None if chat_id is None else int(chat_id), time.time()))
+                self.counts[f"{method}:ok"] = self.counts.get(f"{method}:ok", 0) + 1
+                message_id = self.next_message_id
+                self.next_message_id += 1
+                self._condition.notify_all()
+            if method == "answerCallbackQuery":
+                return 200, {"ok": True, "result": True}
+            return 200, {"ok": True, "result": {"message_id": message_id, "date": int(time.time()),
+                                                "chat": {"id": chat_id, "type": "private"},
+                                                "text": params.get("text", "")}}
+        return 404, {"ok": False, "error_code": 404, "description": "Not Found: method not found"}
+
+    # --- The APIs of the updates ---
+    def upstream(self, path: str, params: dict):
+        """
+        Answer a request to a fake update API
+        :param path: The path of the request
+        :param params: The query parameters
+        :return: (HTTP status code, response body, content type) or None if the path is unknown
+        """
+        with self._condition:
+            self.upstream_requests += 1
+        if self.upstream_latency > 0:
+            time.sleep(self.upstream_latency)
+        if self.upstream_errors > 0 and random.random() < self.upstream_errors:
+            return 503, dumps({"error": "Service Unavailable"}), "application/json"
+        if path == "/weather/forecast.json":
+            today = date.today()
+            days = []
+            for i in range(-1, 4):  # Enough days for every timezone
+                days.append({"date": (today + timedelta(days=i)).isoformat(),
+                             "day": {"daily_will_it_rain": random.randint(0, 1),
+                                     "daily_chance_of_rain": random.randint(0, 100)}})
+            return 200, dumps({"location": {"name": params.get("q", "")}, "forecast": {"forecastday": days}}), \
+                "application/json"
+        if path.rstrip("/") == "/quotes/today":
+            return 200, dumps([{"q": "Benchmarks never lie, people do.", "a": "Fake Author"}]), "application/json"
+        if path == "/numbers/random/math":
+            return 200, f"{random.randint(1, 1000)} is a number used by the fake server.", "text/plain"
+        return None
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real servers
+
+            def setup(self):
+                super().setup()
+                # The headers and the body are written separately, so don't let the small packets wait for an ACK
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _params(self):
+                url = urlparse(self.path)
+                params = dict(parse_qsl(url.query))
+                length = int(self.headers.get("Content-Length", 0))
+                if length > 0:
+                    body = self.rfile.read(length)
+                    if self.headers.get("Content-Encoding", "") == "gzip":
+                        body = gzip.decompress(body)
+                    if self.headers.get("Content-Type", "").startswith("application/json"):
+                        params.update(loads(body))
+                    else:
+                        params.update(parse_qsl(body.decode()))
+                return url.path, params
+
+            def _handle(self):
+                path, params = self._params()
+                if path.startswith("/bot"):
+                    status, response = fake.telegram(path.rsplit("/", 1)[1], params)
+                    return self._reply(status, dumps(response), "application/json")
+                result = fake.upstream(path, params)
+                if result is None:
+                    return self._reply(404, "Not Found", "text/plain")
+                self._reply(*result)
+
+            def _reply(self, status, body, content_type):
+                body = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """
+        Start the server in a new thread
+        """
+        thread = Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,11 @@
+"""
+Telegram Updates Bot - Benchmarks
+---------------------------------
+This package contains a fake Telegram Bot API server with fake update APIs (see the FakeServer file) and the benchmarks which use them (see the Bench file).
+Nothing is sent to the real Telegram or the real APIs.
+
+Run the benchmarks from the root folder of the project: python -m Benchmarks.Bench --help
+
+-----
+Code by: @Sid72020123 on Github
+"""
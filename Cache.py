@@ -0,0 +1,192 @@
+"""
+Telegram Updates Bot - Cache File
+---------------------------------
+This file contains a small cache for the data received from the APIs so that the same data isn't requested again and again.
+The entries expire after some time (TTL). An expired entry is still returned while a new one is requested in the background.
+If the cache is saved to a file, the changes are written at most once every few seconds (and when the bot stops), not on every change.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import time
+import atexit
+from json import loads, dumps
+from collections import OrderedDict
+from threading import RLock, Thread, Timer
+
+from Files import atomic_write
+
+# --- Main Code ---
+class TTLCache:
+    def __init__(self, ttl: float, max_size: int = 256, max_stale: float = None, file_name: str = None,
+                 save_interval: float = 30):
+        """
+        The cache class
+        :param ttl: The number of seconds an entry is fresh
+        :param max_size: The maximum number of entries. The least recently used entries are removed when the cache is full
+        :param max_stale: The number of seconds after its expiry an entry can still be returned (while it's refreshed). None means no limit
+        :param file_name: The JSON file to save the cache in (optional). The keys and the values must be JSON serializable
+        :param save_interval: The number of seconds the changes wait before they're saved to the file
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_stale = max_stale
+        self.file_name = file_name
+        self.save_interval = save_interval
+        self._dirty = False
+        self._timer = None
+        self._entries = OrderedDict()  # key -> [value, expiry time]
+        self._refreshing = set()
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+        if file_name is not None:
+            self.load()
+            atexit.register(self.flush)
+
+    def _is_usable(self, entry, now):
+        return self.max_stale is None or now < entry[1] + self.max_stale
+
+    def get(self, key, loader=None):
+        """
+        Get the value of a key
+        :param key: Any hashable key
+        :param loader: A function which returns the value of the key. It's called when the key isn't in the cache (or has expired)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now < entry[1]:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                if self._is_usable(entry, now):
+                    self.stale_hits += 1
+                    self._entries.move_to_end(key)
+                    if loader is not None and key not in self._refreshing:
+                        self._refreshing.add(key)
+                        Thread(target=self._refresh, args=(key, loader,), daemon=True).start()
+                    return entry[0]
+            self.misses += 1
+        if loader is None:
+            return None
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def _refresh(self, key, loader):
+        try:
+            self.set(key, loader())
+            self.refreshes += 1
+        except Exception as E:
+            self.refresh_errors += 1
+            print(f"Cache: Error while refreshing {key} - {E}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def peek(self, key, fresh_only: bool = False):
+        """
+        Get the value of a key even if it has expired, without counting it as a hit or a miss
+        :param key: Any hashable key
+        :param fresh_only: Return None if the entry has expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (fresh_only and time.time() >= entry[1]):
+                return None
+            return entry[0]
+
+    def set(self, key, value, ttl: float = None):
+        """
+        Add or replace the value of a key
+        :param key: Any hashable key
+        :param value: The value
+        :param ttl: The number of seconds the value is fresh (the TTL of the cache by default)
+        """
+        with self._lock:
+            self._entries[key] = [value, time.time() + (self.ttl if ttl is None else ttl)]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if self.file_name is not None:
+                self._dirty = True
+                if self._timer is None:
+                    self._timer = Timer(self.save_interval, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def flush(self):
+        """
+        Save the cache to the file now if it was changed
+        """
+        with self._lock:
+            self._timer = None
+            if self._dirty:
+                self.save()
+
+    def invalidate(self, key=None):
+        """
+        Remove a key from the cache
+        :param key: Any hashable key (all the keys are removed if it's None)
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """
+        Get the counters of the cache
+        """
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "stale_hits": self.stale_hits, "refreshes": self.refreshes,
+                    "refresh_errors": self.refresh_errors, "evictions": self.evictions}
+
+    def collect_metrics(self, name: str):
+        """
+        Get the stats of the cache as metrics (see Metrics.add_collector)
+        :param name: The name of the cache (the "cache" label)
+        """
+        stats = self.stats()
+        return [("gauge", "cache_entries", {"cache": name}, stats["size"]),
+                ("counter", "cache_requests_total", {"cache": name, "result": "hit"}, stats["hits"]),
+                ("counter", "cache_requests_total", {"cache": name, "result": "stale"}, stats["stale_hits"]),
+                ("counter", "cache_requests_total", {"cache": name, "result": "miss"}, stats["misses"]),
+                ("counter", "cache_refreshes_total", {"cache": name, "outcome": "ok"}, stats["refreshes"]),
+                ("counter", "cache_refreshes_total", {"cache": name, "outcome": "error"}, stats["refresh_errors"]),
+                ("counter", "cache_evictions_total", {"cache": name}, stats["evictions"])]
+
+    def save(self):
+        """
+        Save the cache to the file (atomically, see the Files file)
+        """
+        with self._lock:
+            self._dirty = False
+            data = dumps([[list(key) if isinstance(key, tuple) else key, entry[0], entry[1]] for key, entry in
+                          self._entries.items()])
+            atomic_write(self.file_name, data)
+
+    def load(self):
+        """
+        Load the cache from the file
+        """
+        try:
+            data = loads(open(self.file_name, "r").read())
+        except (FileNotFoundError, ValueError):
+            return
+        with self._lock:
+            for key, value, expiry in data:
+                self._entries[tuple(key) if isinstance(key, list) else key] = [value, expiry]
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,259 @@
+"""
+Telegram Updates Bot - Cluster File
+-----------------------------------
+This file contains the code used to run the bot as many processes on the same machine:
+1) One "ingest" process receives the updates from Telegram (polling or webhook) and runs the commands
+2) N "worker" processes send the scheduled updates. The chats are split between them (sharded) by the hash of their ID
+
+The processes share a SQLite database (in WAL mode) which holds the queue of the messages to send and a lease.
+Every worker runs the scheduler, but only the one holding the lease (the leader) makes the messages and puts them in the queue.
+Each fire time of a job is also recorded in the database, so it's handled exactly once even if the leader changes at that moment.
+Only the ingest process writes the subscriptions file (the workers read it again when it changes) and Telegram's global limit
+(TELEGRAM_GLOBAL_RATE) is split equally between all the processes, so together they never send more than it.
+
+Usage: set CLUSTER_WORKERS in the .env file (see the Config file) and run the main file as usual.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import sys
+import time
+import socket
+import sqlite3
+import subprocess
+from zlib import crc32
+from json import loads, dumps
+from threading import RLock, Thread
+
+# --- Main Code ---
+CHUNK_SIZE = 500  # The maximum number of chats in one task of the queue
+
+
+def shard_of(chat_id, shards: int):
+    """
+    Get the shard (the index of the worker) of a chat. The same chat always gets the same shard, even in another process
+    :param chat_id: The Telegram ID of the chat
+    :param shards: The number of shards
+    """
+    return crc32(str(chat_id).encode()) % shards
+
+
+class WorkQueue:
+    def __init__(self, file_name: str = "work_queue.db", lease: float = 60, max_attempts: int = 5):
+        """
+        A queue of tasks saved in a SQLite database which can be used by many processes at the same time
+        :param file_name: The name of the database file
+        :param lease: A claimed task is given to another claim if it isn't done within these many seconds (eg., the worker stopped)
+        :param max_attempts: A task claimed these many times is removed
+        """
+        self.file_name = file_name
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(file_name, check_same_thread=False, isolation_level=None, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")  # The readers don't block the writer
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                                "shard INTEGER NOT NULL, payload TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                                "lease_until REAL NOT NULL DEFAULT 0)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS tasks_shard ON tasks (shard, lease_until)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS fired (job TEXT PRIMARY KEY, fire_time REAL NOT NULL)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+        self._lock = RLock()
+
+    def put_many(self, tasks):
+        """
+        Add many tasks in one transaction
+        :param tasks: A list of (shard, payload) tuples. The payloads must be JSON serializable
+        """
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany("INSERT INTO tasks (shard, payload) VALUES (?, ?)",
+                                            [(shard, dumps(payload)) for shard, payload in tasks])
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def claim(self, shard: int, limit: int = 10):
+        """
+        Get the oldest tasks of a shard which aren't claimed by another worker. They must be marked as done using done()
+        :param shard: The shard of the worker
+        :param limit: The maximum number of tasks
+        :return: A list of (task_id, payload) tuples
+        """
+        now = time.time()
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")  # Takes the write lock, so two workers can't claim the same task
+            try:
+                rows = self.connection.execute(
+                    "SELECT id, payload, attempts FROM tasks WHERE shard = ? AND lease_until < ? ORDER BY id LIMIT ?",
+                    (shard, now, limit)).fetchall()
+                dropped = [row[0] for row in rows if row[2] >= self.max_attempts]
+                claimed = [row for row in rows if row[2] < self.max_attempts]
+                self.connection.executemany("DELETE FROM tasks WHERE id = ?", [(i,) for i in dropped])
+                self.connection.executemany("UPDATE tasks SET attempts = attempts + 1, lease_until = ? WHERE id = ?",
+                                            [(now + self.lease, row[0]) for row in claimed])
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+        for task_id in dropped:
+            print(f"[*] WorkQueue: Removed the task {task_id} after {self.max_attempts} attempts")
+        return [(task_id, loads(payload)) for task_id, payload, _ in claimed]
+
+    def done(self, task_id: int):
+        with self._lock:
+            self.connection.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def size(self, shard: int = None):
+        """
+        Get the number of tasks left
+        :param shard: Count only the tasks of this shard
+        """
+        with self._lock:
+            if shard is None:
+                return self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            return self.connection.execute("SELECT COUNT(*) FROM tasks WHERE shard = ?", (shard,)).fetchone()[0]
+
+    def mark_fired(self, job, fire_time: float):
+        """
+        Record that a job was run for a fire time. Only the first call for the same job and fire time returns True
+        :param job: The key of the job
+        :param fire_time: The intended fire time (a timestamp)
+        """
+        with self._lock:
+            cursor = self.connection.execute(
+                "INSERT INTO fired (job, fire_time) VALUES (?, ?) ON CONFLICT(job) DO UPDATE SET "
+                "fire_time = excluded.fire_time WHERE fired.fire_time < excluded.fire_time", (str(job), fire_time))
+            return cursor.rowcount == 1
+
+
+class LeaderLease:
+    def __init__(self, queue: WorkQueue, name: str = "scheduler", ttl: float = 15, owner: str = None):
+        """
+        A lease which is held by at most one process at a time. It expires if it isn't renewed, so another process takes it over if the leader stops
+        :param queue: The WorkQueue whose database holds the lease
+        :param name: The name of the lease
+        :param ttl: The number of seconds the lease is valid after it's renewed
+        :param owner: The name of this process (the host name and the process ID by default)
+        """
+        self.queue = queue
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}" if owner is None else owner
+        self.expires = 0
+        self._keeping = False
+
+    def acquire(self):
+        """
+        Take the lease if it's free or expired, or renew it if it's held by this process
+        :return: True if this process holds the lease
+        """
+        now = time.time()
+        with self.queue._lock:
+            cursor = self.queue.connection.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "owner = excluded.owner, expires = excluded.expires WHERE leases.owner = excluded.owner OR leases.expires < ?",
+                (self.name, self.owner, now + self.ttl, now))
+        if cursor.rowcount == 1:
+            self.expires = now + self.ttl
+            return True
+        self.expires = 0
+        return False
+
+    @property
+    def is_leader(self):
+        return time.time() < self.expires
+
+    def release(self):
+        with self.queue._lock:
+            self.queue.connection.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+        self.expires = 0
+
+    def keep(self):
+        """
+        Try to take or renew the lease in a new thread every third of its TTL
+        """
+        if self._keeping:
+            return
+        self._keeping = True
+
+        def loop():
+            was_leader = False
+            while self._keeping:
+                try:
+                    leader = self.acquire()
+                except Exception as E:
+                    print(f"Cluster: Error while renewing the lease - {E}")
+                    leader = self.is_leader
+                if leader != was_leader:
+                    print(f"[*] Cluster: {self.owner} {'is now' if leader else 'is no longer'} the leader")
+                    was_leader = leader
+                time.sleep(self.ttl / 3)
+
+        Thread(target=loop, daemon=True).start()
+
+    def stop(self):
+        self._keeping = False
+        self.release()
+
+
+def enqueue_deliveries(queue: WorkQueue, deliveries, shards: int, chunk_size: int = CHUNK_SIZE):
+    """
+    Split the messages to send between the shards and add them to the queue
+    :param queue: The WorkQueue object
+    :param deliveries: A list of (update_id, message, chat_ids, fire_time, date) tuples
+    :param shards: The number of shards (workers)
+    :param chunk_size: The maximum number of chats in one task
+    """
+    tasks = []
+    for update_id, message, chat_ids, fire_time, date in deliveries:
+        by_shard = {}
+        for chat_id in chat_ids:
+            by_shard.setdefault(shard_of(chat_id, shards), []).append(chat_id)
+        for shard, chats in by_shard.items():
+            for i in range(0, len(chats), chunk_size):
+                tasks.append((shard, {"update_id": update_id, "message": message, "chat_ids": chats[i:i + chunk_size],
+                                      "fire_time": fire_time, "date": date}))
+    if len(tasks) > 0:
+        queue.put_many(tasks)
+    return len(tasks)
+
+
+def start_cluster(script: str, workers: int, metrics_port: int = 0):
+    """
+    Start the ingest process and the worker processes and start them again if they stop. It returns when it's interrupted (Ctrl+C)
+    :param script: The path of the main file
+    :param workers: The number of worker processes
+    :param metrics_port: If it's set, the ingest process serves its metrics on this port and each worker on the next ones
+    """
+    roles = [("ingest", 0)] + [("worker", i) for i in range(workers)]
+
+    def spawn(index):
+        role, shard = roles[index]
+        env = dict(os.environ, CLUSTER_ROLE=role, CLUSTER_SHARD=str(shard), CLUSTER_WORKERS=str(workers),
+                   METRICS_PORT=str(metrics_port + index if metrics_port != 0 else 0))
+        return subprocess.Popen([sys.executable, script], env=env)
+
+    processes = [spawn(i) for i in range(len(roles))]
+    print(f"[*] Cluster: Started the ingest process and {workers} workers")
+    try:
+        while True:
+            time.sleep(1)
+            for i, process in enumerate(processes):
+                if process.poll() is not None:
+                    name = "ingest" if roles[i][0] == "ingest" else f"worker {roles[i][1]}"
+                    print(f"[*] Cluster: The {name} process stopped with code {process.returncode}. Starting it again...")
+                    processes[i] = spawn(i)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
@@ -10,7 +10,6 @@ Code by: @Sid72020123 on Github
 # --- Imports ---
 from os import getenv
 from dotenv import load_dotenv
-from pytz import timezone
 
 # --- Main Code ---
 load_dotenv()  # Load the variables from the .env file
@@ -18,12 +17,47 @@ load_dotenv()  # Load the variables from the .env file
 """
 BOT_TOKEN=
 OWNER_TELEGRAM_ID=
+ALLOWED_TELEGRAM_IDS=
 WEATHER_API_KEY=
+WEBHOOK_URL=
+WEBHOOK_SECRET=
+METRICS_PORT=
+CLUSTER_WORKERS=
 """
 
 BOT_TOKEN = getenv("BOT_TOKEN", "")  # Telegram Bot Token
 OWNER_TELEGRAM_ID = int(getenv("OWNER_TELEGRAM_ID", "0"))  # The Telegram ID of the person receiving the updates
-TIMEZONE = timezone(
-    "Asia/Kolkata")  # This world has many timezones. I live in this part and the free server is hosting the code somewhere in the other part...
-WEATHER_API_URL = "https://api.weatherapi.com/v1"  # Weather Data Service API URL
+ALLOWED_TELEGRAM_IDS = {OWNER_TELEGRAM_ID} | {int(i) for i in getenv("ALLOWED_TELEGRAM_IDS", "").split(",") if
+                                             i.strip() != ""}  # Comma separated Telegram IDs of the other people who can use the bot
+TIMEZONE = "Asia/Kolkata"  # This world has many timezones. I live in this part and the free server is hosting the code somewhere in the other part...
+TELEGRAM_API_URL = getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")  # The root endpoint of the Telegram API (can be changed for testing)
+WEATHER_API_URL = getenv("WEATHER_API_URL", "https://api.weatherapi.com/v1")  # Weather Data Service API URL
+QUOTES_API_URL = getenv("QUOTES_API_URL", "https://zenquotes.io/api")  # Quotes API URL
+NUMBERS_API_URL = getenv("NUMBERS_API_URL", "http://numbersapi.com")  # Number Facts API URL
 WEATHER_API_KEY = getenv("WEATHER_API_KEY", "")  # The API key for the above API
+SCHEDULE_GRACE_PERIOD = 60  # If an update was missed (eg., because of a restart) by at most these many seconds, it's still sent
+WEATHER_CACHE_TTL = 3600  # The number of seconds the weather forecasts are cached
+QUOTE_CACHE_TTL = 6 * 3600  # The number of seconds the quote of the day is cached
+CACHE_SIZE = 512  # The maximum number of entries in a cache
+PERSIST_CACHE = True  # Save the caches to files so that the data isn't requested again after a restart
+WEBHOOK_URL = getenv("WEBHOOK_URL", "")  # If it's set, the bot receives the updates using a webhook instead of polling
+WEBHOOK_SECRET = getenv("WEBHOOK_SECRET", "") or None  # The secret token Telegram sends with every webhook request
+WEBHOOK_PORT = int(getenv("WEBHOOK_PORT", "8443"))  # The port of the webhook server
+REJECTION_INTERVAL = 60  # A user who isn't allowed to use the bot is told so at most once in these many seconds
+STATE_FILE = "bot_state.db"  # The SQLite database in which the state of the conversations is saved (None to keep it only in memory)
+HTTP_CONNECT_TIMEOUT = 3.05  # The number of seconds to wait for a connection to an API of the updates
+HTTP_READ_TIMEOUT = 10  # The number of seconds to wait for the response of an API of the updates
+HTTP_MAX_RETRIES = 2  # The number of times a failed request to an API is sent again
+CIRCUIT_FAILURE_THRESHOLD = 5  # An API is not requested for some time after these many consecutive failures...
+CIRCUIT_RESET_TIMEOUT = 60  # ...and this is that time (in seconds)
+PREFETCH_LEAD_SECONDS = 300  # The messages of the updates are made these many seconds before their time, so only sending them is left at that time (0 to not do it)
+PAYLOAD_CACHE_TTL = 2 * 86400  # The last message of each update is kept for these many seconds and sent if a new one can't be made
+METRICS_PORT = int(getenv("METRICS_PORT", "0"))  # If it's set, the metrics are recorded and served at http://<host>:<port>/metrics (Prometheus format)
+CLUSTER_WORKERS = int(getenv("CLUSTER_WORKERS", "0"))  # If it's set, one process receives the updates and these many worker processes send the scheduled updates (see the Cluster file). 0 runs everything in one process
+CLUSTER_ROLE = getenv("CLUSTER_ROLE", "")  # "ingest" or "worker". Set by the main process for the processes it starts
+CLUSTER_SHARD = int(getenv("CLUSTER_SHARD", "0"))  # The shard of the chats a worker sends the updates to. Set by the main process
+WORK_QUEUE_FILE = "work_queue.db"  # The SQLite database shared by the processes of the cluster
+TELEGRAM_GLOBAL_RATE = float(getenv("TELEGRAM_GLOBAL_RATE", "30"))  # The maximum number of messages per second the processes of the cluster send in total (Telegram's limit). It's split equally by the ingest process and the workers
+LEADER_LEASE_TTL = 15  # If the worker running the scheduler stops, another one takes over within these many seconds
+JOURNAL_FILE = "deliveries.journal"  # The file in which the sent updates are recorded, so none is lost or sent twice after a restart (None to not use it)
+JOURNAL_REPLAY_WINDOW = 3600  # The updates left unsent when the bot stopped are sent when it starts if they're at most these many seconds late
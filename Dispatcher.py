@@ -0,0 +1,167 @@
+"""
+Telegram Updates Bot - Dispatcher File
+--------------------------------------
+This file contains the dispatchers which run the handlers of the updates so that a slow handler doesn't block the other users.
+The updates of the same chat are still handled one by one in the order they were received.
+If too many updates are waiting, submitting a new one waits (so the bot doesn't receive more updates than it can handle).
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+from collections import deque
+from queue import Queue
+from threading import Lock, Condition, BoundedSemaphore, Thread
+from traceback import print_exc
+
+# --- Main Code ---
+class Dispatcher:
+    def __init__(self, workers: int = 8, max_pending: int = 1000):
+        """
+        Runs the tasks on a pool of threads with a queue for each chat
+        :param workers: The number of threads. If it's 0, the tasks are run immediately in the thread which submits them
+        :param max_pending: The maximum number of tasks waiting or running at the same time
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._chats = {}  # key -> deque of the tasks of a chat. A key is here while one of its tasks is running
+        self._ready = Queue()  # The keys whose next task can be run
+        self._lock = Lock()
+        self._idle = Condition(self._lock)
+        self._slots = BoundedSemaphore(max_pending)
+        self._threads = []
+
+    def start(self):
+        """
+        Start the threads (it's called automatically when the first task is submitted)
+        """
+        while len(self._threads) < self.workers:
+            thread = Thread(target=self._worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Run a function after all the previous tasks with the same key are finished
+        :param key: The key of the task (eg., the ID of the chat)
+        :param func: The function to run
+        """
+        if self.workers == 0:
+            self._run(func, args, kwargs)
+            return
+        if len(self._threads) == 0:
+            self.start()
+        self._slots.acquire()  # Waits if there are too many pending tasks
+        with self._lock:
+            self.pending += 1
+            tasks = self._chats.get(key)
+            if tasks is None:
+                self._chats[key] = deque([(func, args, kwargs)])
+                self._ready.put(key)
+            else:
+                tasks.append((func, args, kwargs))
+
+    def _worker(self):
+        while True:
+            key = self._ready.get()
+            if key is None:
+                break
+            with self._lock:
+                func, args, kwargs = self._chats[key].popleft()
+            self._run(func, args, kwargs)
+            with self._lock:
+                self.pending -= 1
+                if len(self._chats[key]) == 0:
+                    del self._chats[key]
+                else:
+                    self._ready.put(key)  # Go to the end of the queue so that other chats get their turn
+                if self.pending == 0:
+                    self._idle.notify_all()
+            self._slots.release()
+
+    @staticmethod
+    def _run(func, args, kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception as E:
+            print(f"Dispatcher: Error while running a task - {E}")
+            print_exc()
+
+    def join(self, timeout: float = None):
+        """
+        Wait until all the submitted tasks are finished
+        :param timeout: The maximum number of seconds to wait
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def stop(self):
+        """
+        Stop the threads after the submitted tasks are finished
+        """
+        self.join()
+        for _ in self._threads:
+            self._ready.put(None)
+        self._threads = []
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self.pending, "active_chats": len(self._chats)}
+
+
+class AsyncDispatcher:
+    def __init__(self, concurrency: int = 100, max_pending: int = 1000):
+        """
+        Runs the coroutines as asyncio tasks, one after another for each chat
+        :param concurrency: The maximum number of tasks running at the same time
+        :param max_pending: The maximum number of tasks waiting or running at the same time
+        """
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._tails = {}  # key -> the last task of a chat
+        self._slots = None
+        self._running = None
+
+    async def submit(self, key, func, *args):
+        """
+        Run a coroutine function after all the previous tasks with the same key are finished
+        :param key: The key of the task (eg., the ID of the chat)
+        :param func: The coroutine function to run
+        """
+        import asyncio  # Only the async bot needs it, so it isn't imported with this file
+        if self._slots is None:  # The semaphores must be made inside the event loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._running = asyncio.Semaphore(self.concurrency)
+        await self._slots.acquire()  # Waits if there are too many pending tasks
+        task = asyncio.ensure_future(self._run(self._tails.get(key), func, args))
+        self._tails[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+
+    async def _run(self, previous, func, args):
+        import asyncio
+        if previous is not None:
+            await asyncio.wait([previous])
+        async with self._running:
+            try:
+                await func(*args)
+            except Exception as E:
+                print(f"Dispatcher: Error while running a task - {E}")
+                print_exc()
+
+    def _done(self, key, task):
+        self._slots.release()
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def join(self):
+        """
+        Wait until all the submitted tasks are finished
+        """
+        import asyncio
+        while len(self._tails) > 0:
+            await asyncio.gather(*self._tails.values(), return_exceptions=True)
+
+    def stats(self):
+        return {"active_chats": len(self._tails)}
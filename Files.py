@@ -0,0 +1,76 @@
+"""
+Telegram Updates Bot - Files File
+---------------------------------
+This file contains the helpers shared by the stores which keep their data in files (the offset, the subscriptions, the settings, the caches and the journal):
+writing a file atomically and checking a file for changes in a thread.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+from threading import Event, Thread
+
+# --- Main Code ---
+def atomic_write(file_name: str, data: str):
+    """
+    Write a file atomically. The data is written to a temporary file and saved to the disk (fsync) first, which then replaces the file,
+    so a crash can't leave a half written file
+    :param file_name: The name of the file
+    :param data: The text to write
+    """
+    temp_name = f"{file_name}.tmp"
+    try:
+        with open(temp_name, "w") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_name, file_name)
+    except BaseException:
+        try:
+            os.remove(temp_name)  # Don't leave the temporary file behind
+        except OSError:
+            pass
+        raise
+
+
+class FileWatcher:
+    def __init__(self, name: str, file_name: str, check, interval: float):
+        """
+        Calls a function every few seconds in a new thread, eg., to read a file again if it was changed
+        :param name: The name used in the errors (eg., "Settings")
+        :param file_name: The file which is checked (used in the errors)
+        :param check: The function to call. Its errors are printed and the next check is done as usual
+        :param interval: The number of seconds between two checks
+        """
+        self.name = name
+        self.file_name = file_name
+        self.check = check
+        self.interval = interval
+        self._stop = None
+
+    @property
+    def running(self):
+        return self._stop is not None
+
+    def start(self):
+        """
+        Start the thread (nothing is done if it's already running)
+        """
+        if self._stop is not None:
+            return
+        self._stop = Event()
+        Thread(target=self._loop, args=(self._stop,), daemon=True).start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    def _loop(self, stop):
+        while not stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as E:
+                print(f"{self.name}: Error while reading {self.file_name} - {E}")
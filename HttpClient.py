@@ -0,0 +1,238 @@
+"""
+Telegram Updates Bot - HTTP Client File
+---------------------------------------
+This file contains the HTTP client used to request the data from the APIs of the updates (weather, quotes, etc.)
+Each API has its own client which reuses its connections, never waits forever for a response, retries the failed requests after a random delay
+and stops sending requests for some time (a circuit breaker) when the API keeps failing, so that a broken API doesn't slow down the bot.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import time
+import random
+from threading import Lock
+
+from Metrics import METRICS
+
+# --- Main Code ---
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}  # The responses which are worth retrying
+
+
+class Result:
+    __slots__ = ("ok", "value", "error", "status", "attempts", "elapsed", "provider")
+
+    def __init__(self, ok, value=None, error=None, status=None, attempts=0, elapsed=0.0, provider=None):
+        """
+        The result of a request
+        :param ok: True if the request was successful
+        :param value: The data received (the parsed JSON or the text)
+        :param error: A short description of the error
+        :param status: The HTTP status code (None if no response was received)
+        :param attempts: The number of requests sent
+        :param elapsed: The number of seconds taken (including the retries)
+        :param provider: The name of the client
+        """
+        self.ok = ok
+        self.value = value
+        self.error = error
+        self.status = status
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.provider = provider
+
+    def unwrap(self):
+        """
+        Get the value or raise an UpstreamError if the request failed
+        """
+        if not self.ok:
+            raise UpstreamError(self)
+        return self.value
+
+    def __repr__(self):
+        if self.ok:
+            return f"Result(ok, provider={self.provider}, attempts={self.attempts}, elapsed={self.elapsed:.2f}s)"
+        return f"Result(failed, provider={self.provider}, status={self.status}, error={self.error}, attempts={self.attempts})"
+
+
+class UpstreamError(Exception):
+    def __init__(self, result: Result):
+        """
+        Raised when the data of an API couldn't be received
+        :param result: The failed result
+        """
+        self.result = result
+        super().__init__(f"{result.provider}: {result.error}" + ("" if result.status is None else f" (HTTP {result.status})"))
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60, clock=time.monotonic):
+        """
+        Stops the requests to an API after many consecutive failures
+        :param failure_threshold: The number of consecutive failures after which the circuit is opened
+        :param reset_timeout: The number of seconds after which a single test request is allowed again
+        :param clock: The function which returns the current time in seconds (it's only changed by the tests)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self._lock = Lock()
+
+    def allow(self):
+        """
+        Check if a request can be sent now
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN  # Only this request is sent. The others wait for its result
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class HttpClient:
+    def __init__(self, name: str, base_url: str, connect_timeout: float = 3.05, read_timeout: float = 10,
+                 max_retries: int = 2, backoff: float = 0.5, pool_size: int = 10, failure_threshold: int = 5,
+                 reset_timeout: float = 60):
+        """
+        The HTTP client of an API
+        :param name: The name of the API (used in the errors and the stats)
+        :param base_url: The root URL of the API. The paths of the requests are added to it
+        :param connect_timeout: The number of seconds to wait for the connection
+        :param read_timeout: The number of seconds to wait for the response after connecting
+        :param max_retries: The number of times a failed request is sent again
+        :param backoff: The base delay (in seconds) before a retry. It doubles after each retry and a random part is added to it
+        :param pool_size: The maximum number of connections kept open to the API (shared by all the threads)
+        :param failure_threshold: See the CircuitBreaker class
+        :param reset_timeout: See the CircuitBreaker class
+        """
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.counters = {"requests": 0, "successes": 0, "failures": 0, "retries": 0, "rejected": 0}
+        self._session = None
+        self._lock = Lock()  # For the counters and making the session
+
+    @property
+    def session(self):
+        """
+        The HTTP session of the client, shared by all the threads. Its connections to the API are kept open and reused
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    from requests import Session  # requests is imported when the first request is sent (see the TelegramAPI file)
+                    from requests.adapters import HTTPAdapter
+                    session = Session()
+                    session.mount(self.base_url, HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+                    self._session = session
+        return self._session
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _delay(self, attempt):
+        delay = self.backoff * (2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def get(self, path: str = "", params: dict = None, parse: str = "json"):
+        """
+        Send a GET request to the API. The errors are never raised, they are returned in the result
+        :param path: The path added to the root URL (eg., "/forecast.json")
+        :param params: The query parameters
+        :param parse: "json" or "text"
+        """
+        start = time.monotonic()
+        if not self.breaker.allow():
+            self._count("rejected")
+            METRICS.inc("upstream_requests_total", provider=self.name, outcome="circuit_open")
+            return Result(False, error="circuit open", provider=self.name)
+        result = self._get(path, params, parse, start)
+        if METRICS.active:
+            METRICS.observe("upstream_seconds", result.elapsed, provider=self.name)
+            METRICS.inc("upstream_requests_total", provider=self.name, outcome="ok" if result.ok else "error",
+                        status=result.status)
+        return result
+
+    def _get(self, path, params, parse, start):
+        from requests.exceptions import RequestException
+        url = f"{self.base_url}{path}"
+        attempts = 0
+        error = None
+        status = None
+        retryable = True
+        broken = False  # True if the API answered with an invalid body
+        while retryable and attempts <= self.max_retries:
+            if attempts > 0:
+                self._count("retries")
+                time.sleep(self._delay(attempts - 1))
+            attempts += 1
+            self._count("requests")
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except RequestException as E:
+                error, status = f"{type(E).__name__}: {E}", None
+                continue
+            status = response.status_code
+            if status >= 400:
+                error = response.reason or "HTTP error"
+                retryable = status in RETRY_STATUS_CODES
+                continue
+            try:
+                value = response.json() if parse == "json" else response.text
+            except ValueError as E:
+                error, retryable, broken = f"Invalid response: {E}", False, True
+                continue
+            self.breaker.record_success()
+            self._count("successes")
+            return Result(True, value, status=status, attempts=attempts, elapsed=time.monotonic() - start,
+                          provider=self.name)
+        if retryable or broken:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()  # The API answered with an error (eg., an unknown city), so it isn't broken
+        self._count("failures")
+        return Result(False, error=error, status=status, attempts=attempts, elapsed=time.monotonic() - start,
+                      provider=self.name)
+
+    def stats(self):
+        """
+        Get the counters of the client and the state of its circuit breaker
+        """
+        with self._lock:
+            return dict(self.counters, circuit=self.breaker.state)
+
+    def collect_metrics(self):
+        """
+        Get the counters which aren't recorded as they happen as metrics (see Metrics.add_collector)
+        """
+        stats = self.stats()
+        return [("counter", "upstream_retries_total", {"provider": self.name}, stats["retries"])] + \
+            [("gauge", "upstream_circuit_state", {"provider": self.name, "state": state}, int(stats["circuit"] == state))
+             for state in (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN)]
@@ -0,0 +1,206 @@
+"""
+Telegram Updates Bot - Journal File
+-----------------------------------
+This file contains the delivery journal: an append-only log of the scheduled messages and of the chats they were sent to.
+Each delivery has an idempotency key (the update, the chat and the scheduled date), so a message is never sent twice to the same chat
+for the same day, even if the job is run again after a restart. The deliveries which weren't finished (eg., the process stopped while sending)
+are sent again when the bot starts. The state is kept in memory, so nothing is read from the file except when it's loaded,
+and the file is rewritten with only the useful records (compacted) when it gets too long.
+
+This is the structure of the file (one JSON object per line):
+{"o": "p", "b": <batch id>, "u": <update id>, "d": <date>, "f": <fire time>, "m": <message>, "c": [<chat ids>]}  -> A message is going to be sent to these chats
+{"o": "s", "k": <key>, "f": <fire time>}  -> Sent
+{"o": "x", "k": <key>, "f": <fire time>}  -> Not sent and it won't be tried again (eg., the bot was blocked or it's too late)
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import time
+from json import loads, dumps
+from threading import RLock
+
+from Files import atomic_write
+
+# --- Main Code ---
+def delivery_key(update_id, chat_id, date):
+    """
+    Get the idempotency key of a delivery
+    :param update_id: The ID of the update
+    :param chat_id: The Telegram ID of the chat
+    :param date: The scheduled date ("YYYY-MM-DD" in the timezone of the chat)
+    """
+    return f"{update_id}:{chat_id}:{date}"
+
+
+class Journal:
+    def __init__(self, file_name: str = "deliveries.journal", retention: float = 2 * 86400, compact_after: int = 10000):
+        """
+        The delivery journal class
+        :param file_name: The file the journal is written to
+        :param retention: The keys of the sent messages are remembered for these many seconds after their fire time
+        :param compact_after: The file is compacted when it has these many records more than the useful ones
+        """
+        self.file_name = file_name
+        self.retention = retention
+        self.compact_after = compact_after
+        self.batches = {}  # batch id -> (update_id, date, fire_time, message)
+        self.remaining = {}  # batch id -> set of the chats the message wasn't sent to yet
+        self.pending = {}  # key -> (batch id, chat_id)
+        self.done = {}  # key -> fire time
+        self.in_flight = set()  # The keys being sent by this process
+        self.records = 0  # The number of records in the file
+        self._next_batch = 1
+        self._lock = RLock()
+        self._file = None
+        self._loaded = False  # The file is read when the journal is first used
+
+    def load(self):
+        """
+        Read the file and compact it
+        """
+        with self._lock:
+            self._loaded = True
+            if os.path.exists(self.file_name):
+                with open(self.file_name, "r") as file:
+                    for line in file:
+                        try:
+                            record = loads(line)
+                        except ValueError:  # The last line may be half written if the process stopped while writing it
+                            continue
+                        self._apply(record)
+            self.compact()
+
+    def _apply(self, record):
+        if record["o"] == "p":
+            batch_id = record["b"]
+            self.batches[batch_id] = (record["u"], record["d"], record["f"], record["m"])
+            self.remaining[batch_id] = set()
+            self._next_batch = max(self._next_batch, batch_id + 1)
+            for chat_id in record["c"]:
+                key = delivery_key(record["u"], chat_id, record["d"])
+                if key in self.done:
+                    continue
+                self._forget(key)  # It's in a newer batch now
+                self.pending[key] = (batch_id, chat_id)
+                self.remaining[batch_id].add(chat_id)
+            if len(self.remaining[batch_id]) == 0:
+                del self.remaining[batch_id]
+                del self.batches[batch_id]
+        else:
+            self._forget(record["k"])
+            self.done[record["k"]] = record["f"]
+
+    def _forget(self, key):
+        batch_id, chat_id = self.pending.pop(key, (None, None))
+        if batch_id is None:
+            return
+        self.remaining[batch_id].discard(chat_id)
+        if len(self.remaining[batch_id]) == 0:
+            del self.remaining[batch_id]
+            del self.batches[batch_id]
+
+    def _write(self, records, sync: bool = False):
+        if self._file is None:
+            self._file = open(self.file_name, "a")
+        self._file.write("".join(dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records))
+        self._file.flush()  # Written to the OS, so it's kept even if the process crashes
+        if sync:
+            os.fsync(self._file.fileno())
+        self.records += len(records)
+        if self.records > self.compact_after and self.records > 2 * (len(self.batches) + len(self.done)):
+            self.compact()
+
+    def plan(self, update_id, message, chat_ids, fire_time, date):
+        """
+        Record that a message is going to be sent. It must be called before sending it
+        :param update_id: The ID of the update
+        :param message: The message
+        :param chat_ids: The chats to send it to
+        :param fire_time: The intended fire time (a timestamp)
+        :param date: The scheduled date ("YYYY-MM-DD")
+        :return: The chats it should be sent to (the others already got it or are getting it)
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            chat_ids = [c for c in chat_ids if delivery_key(update_id, c, date) not in self.done and
+                        delivery_key(update_id, c, date) not in self.in_flight]
+            if len(chat_ids) == 0:
+                return chat_ids
+            record = {"o": "p", "b": self._next_batch, "u": update_id, "d": date, "f": fire_time, "m": message,
+                      "c": chat_ids}
+            self._apply(record)
+            self.in_flight.update(delivery_key(update_id, c, date) for c in chat_ids)
+            self._write([record], sync=True)  # On the disk before anything is sent
+            return chat_ids
+
+    def mark(self, update_id, chat_id, date, fire_time, outcome: str):
+        """
+        Record the outcome of a delivery
+        :param update_id: The ID of the update
+        :param chat_id: The Telegram ID of the chat
+        :param date: The scheduled date ("YYYY-MM-DD")
+        :param fire_time: The intended fire time (a timestamp)
+        :param outcome: "sent", "dropped" (it won't be sent) or "retry" (it's sent again when the bot starts)
+        """
+        key = delivery_key(update_id, chat_id, date)
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            self.in_flight.discard(key)
+            if outcome == "retry":
+                return
+            record = {"o": "s" if outcome == "sent" else "x", "k": key, "f": fire_time}
+            self._apply(record)
+            self._write([record])
+
+    def unfinished(self, max_age: float):
+        """
+        Get the deliveries which weren't finished and take them for sending. The ones older than max_age are dropped
+        :param max_age: The maximum number of seconds since the fire time
+        :return: A list of (update_id, message, chat_ids, fire_time, date) tuples
+        """
+        now = time.time()
+        result = []
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            for batch_id, (update_id, date, fire_time, message) in list(self.batches.items()):
+                chat_ids = [c for c in self.remaining[batch_id] if delivery_key(update_id, c, date) not in self.in_flight]
+                if len(chat_ids) == 0:
+                    continue
+                if now - fire_time > max_age:
+                    for chat_id in chat_ids:
+                        self.mark(update_id, chat_id, date, fire_time, "dropped")
+                    print(f"[*] Journal: Dropped '{update_id}' for {len(chat_ids)} chats as it's too late to send it")
+                    continue
+                self.in_flight.update(delivery_key(update_id, c, date) for c in chat_ids)
+                result.append((update_id, message, chat_ids, fire_time, date))
+        return result
+
+    def compact(self):
+        """
+        Rewrite the file with only the unfinished deliveries and the keys which are still remembered
+        """
+        with self._lock:
+            limit = time.time() - self.retention
+            self.done = {key: fire_time for key, fire_time in self.done.items() if fire_time >= limit}
+            records = [{"o": "p", "b": batch_id, "u": update_id, "d": date, "f": fire_time, "m": message,
+                        "c": sorted(self.remaining[batch_id])}
+                       for batch_id, (update_id, date, fire_time, message) in self.batches.items()]
+            records += [{"o": "s", "k": key, "f": fire_time} for key, fire_time in self.done.items()]
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            atomic_write(self.file_name,
+                         "".join(dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records))
+            self.records = len(records)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,279 @@
+"""
+Telegram Updates Bot - Metrics File
+-----------------------------------
+This file contains the counters and the latency histograms of the bot (polling, handlers, the APIs of the updates, Telegram API calls and the scheduler).
+They can be read in the Prometheus text format from a small HTTP server (GET /metrics) and other code can receive every value using a hook.
+The values which are already counted by other objects (eg., the length of a queue) are read by collectors when the metrics are rendered.
+Nothing is recorded while the metrics are disabled and there are no hooks, so they cost almost nothing then.
+
+Example:
+METRICS.enable()
+MetricsServer("0.0.0.0", 9100).start()
+curl http://localhost:9100/metrics
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+from bisect import bisect_left
+from threading import Lock, Thread
+
+# --- Main Code ---
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # In seconds
+
+# The help text of each metric (shown in the Prometheus output)
+DESCRIPTIONS = {
+    "telegram_get_updates_seconds": "Time taken by the getUpdates requests",
+    "telegram_updates_received_total": "Number of updates received from Telegram",
+    "telegram_api_seconds": "Time taken by the Telegram API calls",
+    "telegram_api_requests_total": "Number of Telegram API calls by method and status",
+    "telegram_api_bytes_sent_total": "Number of bytes of the request bodies sent to the Telegram API",
+    "handler_seconds": "Time taken by the handlers of the updates",
+    "handler_errors_total": "Number of updates whose handlers raised an error",
+    "upstream_seconds": "Time taken by the requests to the APIs of the updates (including the retries)",
+    "upstream_requests_total": "Number of requests to the APIs of the updates by provider and outcome",
+    "scheduler_drift_seconds": "Difference between the actual and the intended fire time of the scheduler jobs",
+    "scheduler_skipped_total": "Number of scheduler jobs skipped because they were too late",
+    "update_messages_total": "Number of update messages by update and source (new, prefetched, last)",
+    "update_deliveries_total": "Number of update messages sent by update and outcome",
+    "outbound_queue_depth": "Number of messages waiting in the outbound queue by priority",
+    "outbound_throughput": "Number of messages sent per second by the outbound queue (average of the last minute)",
+    "outbound_messages_total": "Number of messages sent by the outbound queue by outcome",
+    "outbound_retries_total": "Number of requests retried by the outbound queue",
+    "outbound_rate_limited_total": "Number of 429 (Too Many Requests) responses received by the outbound queue",
+    "cache_entries": "Number of entries in the cache",
+    "cache_requests_total": "Number of reads of the cache by result (hit, stale or miss)",
+    "cache_refreshes_total": "Number of expired entries refreshed in the background by outcome",
+    "cache_evictions_total": "Number of entries removed because the cache was full",
+    "upstream_retries_total": "Number of requests to the APIs of the updates sent again after a failure",
+    "upstream_circuit_state": "The state of the circuit breaker of each API (1 for the current state)"
+}
+
+
+def escape_label(value):
+    """
+    Escape a label value for the Prometheus text format
+    :param value: Any value
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False, buckets=DEFAULT_BUCKETS):
+        """
+        The registry of the metrics
+        :param enabled: Record the values (they can still be received by the hooks if it's False)
+        :param buckets: The upper bounds of the histogram buckets
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.hooks = []
+        self.collectors = []
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> Histogram
+        self._lock = Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def add_hook(self, func):
+        """
+        Add a function which is called with every value recorded: func(kind, name, labels, value)
+        where kind is "counter" or "histogram" and labels is a dictionary. It's called even if the metrics are disabled
+        :param func: Any function. It must be fast as it's called in the bot's threads
+        """
+        self.hooks.append(func)
+
+    def add_collector(self, func):
+        """
+        Add a function which is called when the metrics are rendered. It returns a list of (kind, name, labels, value)
+        where kind is "counter" or "gauge" and labels is a dictionary
+        :param func: Any function, eg., the collect_metrics method of an OutboundQueue
+        """
+        self.collectors.append(func)
+
+    def remove_collector(self, func):
+        if func in self.collectors:
+            self.collectors.remove(func)
+
+    def _collect(self):
+        values = {}  # (name, labels) -> (kind, value)
+        for collector in list(self.collectors):
+            try:
+                for kind, name, labels, value in collector():
+                    key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+                    values[key] = (kind, values.get(key, (kind, 0))[1] + value)  # The values of the same key are added
+            except Exception as E:
+                print(f"Metrics: Error in a collector - {E}")
+        return sorted(values.items())
+
+    def _call_hooks(self, kind, name, labels, value):
+        for hook in self.hooks:
+            try:
+                hook(kind, name, labels, value)
+            except Exception as E:
+                print(f"Metrics: Error in a hook - {E}")
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        Increase a counter
+        :param name: The name of the counter (eg., "telegram_api_requests_total")
+        :param value: The amount to add
+        :param labels: The labels of the counter (eg., method="sendMessage")
+        """
+        if not self.enabled and len(self.hooks) == 0:
+            return
+        if self.enabled:
+            key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))  # Strings, so the keys can be sorted
+            with self._lock:
+                self.counters[key] = self.counters.get(key, 0) + value
+        if len(self.hooks) > 0:
+            self._call_hooks("counter", name, labels, value)
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Add a value (eg., a duration in seconds) to a histogram
+        :param name: The name of the histogram (eg., "telegram_api_seconds")
+        :param value: The value
+        :param labels: The labels of the histogram
+        """
+        if not self.enabled and len(self.hooks) == 0:
+            return
+        if self.enabled:
+            key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))  # Strings, so the keys can be sorted
+            with self._lock:
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = Histogram(self.buckets)
+                    self.histograms[key] = histogram
+                histogram.observe(value)
+        if len(self.hooks) > 0:
+            self._call_hooks("histogram", name, labels, value)
+
+    @property
+    def active(self):
+        """
+        True if the values are used (the code can skip measuring the time if it's False)
+        """
+        return self.enabled or len(self.hooks) > 0
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        labels = tuple(labels) + tuple(extra)
+        if len(labels) == 0:
+            return ""
+        return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in labels) + "}"
+
+    def render(self):
+        """
+        Get all the metrics in the Prometheus text format
+        """
+        collected = self._collect()
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(h.counts), h.sum, h.count)) for key, h in self.histograms.items())
+        lines = []
+        last_name = None
+        for (name, labels), value in counters:
+            if name != last_name:
+                lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                last_name = name
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), (kind, value) in collected:
+            if name != last_name:
+                lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+                last_name = name
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), (counts, total, count) in histograms:
+            if name != last_name:
+                lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                last_name = name
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{self._labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()  # The metrics of the whole bot
+
+
+class MetricsServer:
+    def __init__(self, host: str, port: int, metrics: Metrics = METRICS, path: str = "/metrics"):
+        """
+        A small HTTP server which returns the metrics in the Prometheus text format
+        :param host: The host to listen on
+        :param port: The port to listen on
+        :param metrics: The Metrics object
+        :param path: The path of the metrics
+        """
+        from http.server import ThreadingHTTPServer  # Only imported if the metrics are served
+        self.metrics = metrics
+        self.path = path
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def _make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != server.path:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = server.metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """
+        Start the server in a new thread
+        """
+        thread = Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
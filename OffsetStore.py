@@ -0,0 +1,139 @@
+"""
+Telegram Updates Bot - Offset Store File
+----------------------------------------
+This file contains the classes which save the ID of the next update the bot should receive (the "offset" of getUpdates).
+The offset is kept in memory and written to the disk at most once every few seconds. A timer writes the last change even if no other update comes after it,
+and the writes are atomic, so a crash can't leave a half written file.
+Nothing is read from the disk until the offset is needed, so making a store is instant.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import time
+import sqlite3
+import atexit
+from threading import Lock, Timer
+
+from Files import atomic_write
+
+# --- Main Code ---
+class MemoryOffsetStore:
+    def __init__(self, offset: int = 0):
+        """
+        Keeps the offset only in memory (it's lost when the bot stops)
+        :param offset: The starting offset
+        """
+        self.offset = offset
+        self.sync_interval = 0
+        self._dirty = False
+        self._last_sync = 0
+        self._timer = None
+        self._lock = Lock()
+
+    def get(self):
+        return self.offset
+
+    def set(self, offset: int):
+        """
+        Change the offset. It's saved if the last save was more than "sync_interval" seconds ago, else when that time has passed
+        :param offset: The new offset
+        """
+        with self._lock:
+            self.offset = offset
+            self._dirty = True
+            wait = self.sync_interval - (time.time() - self._last_sync)
+            if wait <= 0:
+                self._sync()
+            elif self._timer is None:
+                self._timer = Timer(wait, self._flush_later)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_later(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self):
+        """
+        Save the offset now if it was changed
+        """
+        with self._lock:
+            if self._dirty:
+                self._sync()
+
+    def _sync(self):
+        self._write(self.offset)
+        self._dirty = False
+        self._last_sync = time.time()
+
+    def _write(self, offset: int):
+        pass
+
+
+class FileOffsetStore(MemoryOffsetStore):
+    def __init__(self, file_name: str = "update_id.txt", sync_interval: float = 5):
+        """
+        Saves the offset in a text file
+        :param file_name: The name of the file
+        :param sync_interval: The minimum number of seconds between two writes
+        """
+        super().__init__(None)  # Read from the file when it's first needed
+        self.file_name = file_name
+        self.sync_interval = sync_interval
+        atexit.register(self.flush)
+
+    def get(self):
+        if self.offset is None:
+            with self._lock:
+                if self.offset is None:
+                    self.offset = self._read(self.file_name)
+        return self.offset
+
+    @staticmethod
+    def _read(file_name):
+        try:
+            return int(open(file_name, "r").read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            print(f"OffsetStore: The contents of {file_name} are not valid, starting from 0")
+            return 0
+
+    def _write(self, offset: int):
+        atomic_write(self.file_name, str(offset))
+
+
+class SQLiteOffsetStore(MemoryOffsetStore):
+    def __init__(self, file_name: str = "bot.db", name: str = "default", sync_interval: float = 5):
+        """
+        Saves the offset in a SQLite database. Many bots (or processes) can use the same database with different names
+        :param file_name: The name of the database file
+        :param name: The name of this offset
+        :param sync_interval: The minimum number of seconds between two writes
+        """
+        super().__init__(None)  # Read from the database when it's first needed
+        self.file_name = file_name
+        self.name = name
+        self.connection = None
+        self.sync_interval = sync_interval
+        atexit.register(self.flush)
+
+    def _connect(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.file_name, check_same_thread=False, isolation_level=None)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS offsets (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        return self.connection
+
+    def get(self):
+        if self.offset is None:
+            with self._lock:
+                if self.offset is None:
+                    row = self._connect().execute("SELECT value FROM offsets WHERE name = ?", (self.name,)).fetchone()
+                    self.offset = 0 if row is None else row[0]
+        return self.offset
+
+    def _write(self, offset: int):
+        self._connect().execute("INSERT OR REPLACE INTO offsets (name, value) VALUES (?, ?)", (self.name, offset))
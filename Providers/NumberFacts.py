@@ -0,0 +1,33 @@
+"""
+Telegram Updates Bot - Number Facts Provider
+--------------------------------------------
+This file contains the provider of the random number facts (from NumbersAPI.com). The facts are random, so they aren't cached
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+from Config import NUMBERS_API_URL
+from Templates import register, render
+from Providers import provider, PROVIDERS
+
+# --- Main Code ---
+register("number_fact",
+         "<b>{message_emoji} Daily Number Fact:</b>\n\n<blockquote>{fact}</blockquote>\n\n<i>Facts fetched from <a href='http://numbersapi.com/'>NumbersAPI.com</a></i>")
+
+
+@provider("nf", concurrency=2)
+def build_number_fact(_, timezone, at=None):
+    """
+    Fetch a random number fact and make the number facts message
+    :param timezone: The timezone of the chats receiving the message
+    :param at: The time the message will be sent at (a timestamp)
+    """
+    fact = CLIENT.get("/random/math", parse="text").unwrap()
+    message = render("number_fact", fact=fact)
+    return message
+
+
+PROVIDER = PROVIDERS["nf"]
+CLIENT = PROVIDER.client("NumbersAPI", NUMBERS_API_URL)
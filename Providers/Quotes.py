@@ -0,0 +1,44 @@
+"""
+Telegram Updates Bot - Quotes Provider
+--------------------------------------
+This file contains the provider of the daily quote (from ZenQuotes.io)
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import arrow
+
+from Config import QUOTES_API_URL, QUOTE_CACHE_TTL
+from Templates import register, render
+from Providers import provider, PROVIDERS
+
+# --- Main Code ---
+register("daily_quote",
+         "<b>{message_emoji} Daily Quote:</b>\n\n<blockquote>{quote} - <b>{author}</b></blockquote>\n\n<i>Quotes fetched from <a href='https://zenquotes.io/'>ZenQuotes.io</a></i>")
+
+
+def get_daily_quote(at=None):
+    """
+    Get the quote of the day from the API (or the cache). ZenQuotes returns the same quote for the whole day
+    :param at: The time whose date is used (a timestamp). None means now
+    """
+    d = (arrow.utcnow() if at is None else arrow.get(at)).strftime("%Y-%m-%d")
+    return PROVIDER.cache.get(d, lambda: CLIENT.get("/today/").unwrap()[0])
+
+
+@provider("dq", ttl=QUOTE_CACHE_TTL, concurrency=1, cache_size=8)
+def build_daily_quote(_, timezone, at=None):
+    """
+    Fetch the quote of the day and make the daily quotes message
+    :param timezone: The timezone of the chats receiving the message
+    :param at: The time the message will be sent at (a timestamp)
+    """
+    quote = get_daily_quote(at)
+    message = render("daily_quote", quote=quote["q"], author=quote["a"])
+    return message
+
+
+PROVIDER = PROVIDERS["dq"]
+CLIENT = PROVIDER.client("ZenQuotes", QUOTES_API_URL)
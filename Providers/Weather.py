@@ -0,0 +1,96 @@
+"""
+Telegram Updates Bot - Weather Provider
+---------------------------------------
+This file contains the provider of the daily weather forecast (from WeatherAPI.com)
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import arrow
+
+from Config import WEATHER_API_URL, WEATHER_API_KEY, WEATHER_CACHE_TTL
+from HttpClient import Result, UpstreamError
+from Templates import register, render
+from Providers import provider, validate_time, validate_timezone, PROVIDERS
+
+# --- Main Code ---
+register("weather_update",
+         "\n\n<b>{cloud_emoji} Daily Weather Forecast:</b>\n\nTomorrow in <i>{city}</i>, it <b><u>{temp}</u></b> with the chances of rain being <b><u>{chance_of_rain}%</u></b>\n\n<i>(Weather data was checked at {checked_at})</i>")
+
+
+def validate_city(value):
+    """
+    Check a city sent by a user
+    :param value: The name of the city
+    """
+    value = str(value).strip()
+    if len(value) == 0 or len(value) > 100:
+        raise ValueError(f"Invalid city: {value}")
+    return value
+
+
+def weather_update_input(settings):
+    """
+    Get the input of the weather update. Chats with the same input get the same message
+    :param settings: The settings of the update for a chat
+    """
+    return str(settings["city"]).lower()
+
+
+def fetch_weather_forecast(city, d):
+    """
+    Request the weather forecast of the next 3 days from the API and cache all of them
+    :param city: The city
+    :param d: The date whose forecast is returned
+    """
+    raw_data = CLIENT.get("/forecast.json", params={"q": city, "days": 3, "key": WEATHER_API_KEY}).unwrap()
+    forecasts = raw_data["forecast"]["forecastday"]
+    result = None
+    for forecast in forecasts:
+        data = [forecast["day"]["daily_will_it_rain"], forecast["day"]["daily_chance_of_rain"]]
+        if d == forecast["date"]:
+            result = data
+        else:
+            PROVIDER.cache.set((city, forecast["date"]), data)
+    if result is None:
+        raise LookupError(f"No data found for the date: {d}")
+    return result
+
+
+def get_weather_forecast(d, city):
+    """
+    Get the weather forcast from the API (or the cache). A Result object is returned (see the HttpClient file)
+    :param d: The date
+    :param city: The city
+    (BTW, I only needed the data of the chances of rain but still, you can add more data)
+    """
+    try:
+        return Result(True, PROVIDER.cache.get((city, d), lambda: fetch_weather_forecast(city, d)), provider=CLIENT.name)
+    except UpstreamError as E:
+        return E.result
+    except Exception as E:
+        return Result(False, error=f"{type(E).__name__}: {E}", provider=CLIENT.name)
+
+
+@provider("wu", get_input=weather_update_input, ttl=WEATHER_CACHE_TTL, concurrency=2,
+          schema={"time": validate_time, "timezone": validate_timezone, "city": validate_city})
+def build_weather_update(city, timezone, at=None):
+    """
+    Fetch the weather forecast and make the weather update message
+    :param city: The city
+    :param timezone: The timezone of the chats receiving the message
+    :param at: The time the message will be sent at (a timestamp). "Tomorrow" is the day after this time
+    """
+    date_today = arrow.now(timezone)
+    date_tomorrow = (date_today if at is None else arrow.get(at).to(timezone)).shift(days=1)
+    result = get_weather_forecast(date_tomorrow.strftime("%Y-%m-%d"), city)
+    will_it_rain, chance_of_rain = result.unwrap()  # The error is reported by the delivery code
+    temp = "will rain" if will_it_rain == 1 else "will not rain"
+    return render("weather_update", city=city.title(), temp=temp, chance_of_rain=chance_of_rain,
+                  checked_at=date_today.strftime('%d/%m/%Y %H:%M'))
+
+
+PROVIDER = PROVIDERS["wu"]
+CLIENT = PROVIDER.client("WeatherAPI", WEATHER_API_URL)
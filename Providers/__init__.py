@@ -0,0 +1,189 @@
+"""
+Telegram Updates Bot - Providers
+--------------------------------
+This package contains the providers of the updates (weather, quotes, etc.). Each provider is a module which registers itself using the @provider decorator.
+Only the names of the modules are known at startup. A module is imported when its update is needed for the first time,
+so adding more providers doesn't make the startup slower or use more memory.
+A provider declares how long its data is cached, how many of its requests can run at the same time and the settings a chat can change.
+
+To add a provider, make a module in this package and add its update ID to the MODULES dictionary below (or call the register_module function).
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+from importlib import import_module
+from threading import BoundedSemaphore, Lock
+
+from Config import CACHE_SIZE, PERSIST_CACHE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, \
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+from Cache import TTLCache
+from HttpClient import HttpClient
+from Timezones import validate_timezone
+
+# --- Main Code ---
+MODULES = {
+    "wu": "Providers.Weather",
+    "dq": "Providers.Quotes",
+    "nf": "Providers.NumberFacts"
+}  # update_id -> the module of its provider (not imported until it's needed)
+
+PROVIDERS = {}  # update_id -> Provider (only the imported ones)
+_import_lock = Lock()
+
+
+def validate_time(value):
+    """
+    Check a time sent by a user (like "21:30") and return it in the format of the updates.json file ("21:30:00")
+    :param value: The time
+    """
+    value = str(value).strip()
+    t = value.split(":")
+    if not (len(value) == 5 and len(t) == 2 and t[0].isdigit() and t[1].isdigit() and int(t[0]) < 24 and int(t[1]) < 60):
+        raise ValueError(f"Invalid time: {value}")
+    return value + ":00"
+
+
+def no_input(settings):
+    """
+    The input of the updates which are the same for every chat
+    :param settings: The settings of the update for a chat
+    """
+    return None
+
+
+class Provider:
+    def __init__(self, update_id: str, build, get_input=no_input, ttl: float = 0, concurrency: int = 4,
+                 schema: dict = None, cache_size: int = CACHE_SIZE, max_stale: float = None):
+        """
+        The provider of an update
+        :param update_id: The ID of the update in the updates.json file
+        :param build: The function which makes the message. It's called with the input, the timezone of the chats and the time the message is sent at (a timestamp or None for now)
+        :param get_input: The function which gets the input of the message from the settings of a chat. Chats with the same input get the same message
+        :param ttl: The number of seconds the data of the provider is cached (0 to not cache it)
+        :param concurrency: The maximum number of messages made at the same time
+        :param schema: The settings a chat can change: setting name -> function which checks a value and returns it (or raises ValueError)
+        :param cache_size: The maximum number of entries in the cache
+        :param max_stale: The number of seconds after its TTL the cached data (and the last message) can still be used while the API fails (the TTL by default).
+        After that, the message isn't sent until the API works again
+        """
+        self.update_id = update_id
+        self.build = build
+        self.get_input = get_input
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.max_stale = ttl if max_stale is None else max_stale
+        self.schema = {"time": validate_time, "timezone": validate_timezone} if schema is None else schema
+        self.limit = BoundedSemaphore(concurrency)
+        self.cache = None
+        if ttl > 0:
+            self.cache = TTLCache(ttl, max_size=cache_size, max_stale=self.max_stale,
+                                  file_name=f"{update_id}_cache.json" if PERSIST_CACHE else None)
+        self.clients = []
+
+    def message(self, update_input, timezone, at=None):
+        """
+        Make the message of an input. At most "concurrency" messages are made at the same time
+        :param update_input: The input returned by get_input
+        :param timezone: The timezone of the chats receiving the message
+        :param at: The time the message will be sent at (a timestamp). None means now
+        """
+        with self.limit:
+            return self.build(update_input, timezone, at)
+
+    def validate(self, name: str, value):
+        """
+        Check a setting sent by a user
+        :param name: The name of the setting
+        :param value: The value
+        """
+        if name not in self.schema:
+            raise ValueError(f"Unknown setting: {name}")
+        return self.schema[name](value)
+
+    def client(self, name: str, base_url: str):
+        """
+        Make an HTTP client for an API used by the provider (see the HttpClient file)
+        :param name: The name of the API
+        :param base_url: The root URL of the API
+        """
+        client = HttpClient(name, base_url, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                            max_retries=HTTP_MAX_RETRIES, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                            reset_timeout=CIRCUIT_RESET_TIMEOUT)
+        self.clients.append(client)
+        return client
+
+    def stats(self):
+        """
+        Get the counters of the cache and the HTTP clients of the provider
+        """
+        return {"cache": None if self.cache is None else self.cache.stats(),
+                "clients": {client.name: client.stats() for client in self.clients}}
+
+    def collect_metrics(self):
+        """
+        Get the stats of the cache and the HTTP clients of the provider as metrics (see Metrics.add_collector)
+        """
+        metrics = [] if self.cache is None else self.cache.collect_metrics(self.update_id)
+        for client in self.clients:
+            metrics.extend(client.collect_metrics())
+        return metrics
+
+
+def provider(update_id: str, get_input=no_input, ttl: float = 0, concurrency: int = 4, schema: dict = None,
+             cache_size: int = CACHE_SIZE, max_stale: float = None):
+    """
+    Decorator to register the function which makes the message of an update. See the Provider class for the parameters
+    """
+
+    def decorator(f):
+        PROVIDERS[update_id] = Provider(update_id, f, get_input, ttl, concurrency, schema, cache_size,
+                                         max_stale)
+        return f
+
+    return decorator
+
+
+def register_module(update_id: str, module: str):
+    """
+    Add a provider module which isn't in the MODULES dictionary
+    :param update_id: The ID of the update
+    :param module: The full name of the module (eg., "Providers.Weather")
+    """
+    MODULES[update_id] = module
+
+
+def get_provider(update_id: str):
+    """
+    Get the provider of an update. Its module is imported the first time
+    :param update_id: The ID of the update
+    """
+    p = PROVIDERS.get(update_id)
+    if p is None:
+        with _import_lock:
+            if update_id not in PROVIDERS:
+                if update_id not in MODULES:
+                    raise KeyError(f"No provider for the update: {update_id}")
+                import_module(MODULES[update_id])
+                if update_id not in PROVIDERS:
+                    raise KeyError(f"The module {MODULES[update_id]} didn't register the update: {update_id}")
+            p = PROVIDERS[update_id]
+    return p
+
+
+def provider_stats():
+    """
+    Get the stats of the providers which are loaded
+    """
+    return {update_id: p.stats() for update_id, p in list(PROVIDERS.items())}
+
+
+def collect_metrics():
+    """
+    Get the metrics of the providers which are loaded (see Metrics.add_collector)
+    """
+    metrics = []
+    for p in list(PROVIDERS.values()):
+        metrics.extend(p.collect_metrics())
+    return metrics
@@ -0,0 +1,177 @@
+"""
+Telegram Updates Bot - Scheduler File
+-------------------------------------
+This file contains the scheduler which runs the updates at their scheduled time.
+It keeps a min-heap of the next fire times and sleeps until the nearest one instead of checking the clock every second.
+The fire times are found in the timezone of each job (see the Timezones file), so they stay correct when the clocks change.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import time
+from datetime import timedelta
+from heapq import heappush, heappop
+from threading import Condition, Thread
+
+from Metrics import METRICS
+from Timezones import local_timestamp, local_date
+
+# --- Main Code ---
+MAX_SLEEP = 300  # Wake up at least this often (in seconds) so that changes to the system clock are noticed
+
+
+def parse_time(time_string: str):
+    """
+    Convert a time string to a tuple of integers
+    :param time_string: Time in the "HH:MM:SS" format
+    """
+    hour, minute, second = time_string.split(":")
+    return int(hour), int(minute), int(second)
+
+
+class Job:
+    def __init__(self, key, time_string, callback, timezone=None, lead: float = 0):
+        """
+        A job which runs every day at the same time
+        :param key: Unique key of the job
+        :param time_string: Time in the "HH:MM:SS" format
+        :param callback: The function to call when the job is due. It's called with the key and the intended fire time (a timestamp)
+        :param timezone: The timezone of the time (the timezone of the scheduler by default)
+        :param lead: Run the job these many seconds before the time (eg., to prepare something for another job)
+        """
+        self.key = key
+        self.time_string = time_string
+        self.time = parse_time(time_string)
+        self.callback = callback
+        self.timezone = timezone
+        self.lead = lead
+        self.generation = 0  # Incremented whenever the job is re-armed so that older heap entries are ignored
+        self.last_fire = 0  # The timestamp of the last time this job was fired
+
+
+class Scheduler:
+    def __init__(self, timezone, grace_period: int = 60):
+        """
+        The scheduler class
+        :param timezone: The timezone in which the times of the jobs are written
+        :param grace_period: If a fire time was missed by at most these many seconds (because of a restart, a slow wake-up, etc.), the job is still run
+        """
+        self.timezone = timezone
+        self.grace_period = grace_period
+        self.jobs = {}
+        self._heap = []  # Entries are [fire_time, sequence, key, generation]
+        self._sequence = 0
+        self._condition = Condition()
+        self._running = False
+
+    def next_fire_time(self, job, now=None):
+        """
+        Get the timestamp of the next time a job should run
+        :param job: The Job object
+        :param now: The current time (a timestamp), used for testing
+        """
+        if now is None:
+            now = time.time()
+        zone_name = str(job.timezone or self.timezone)
+        hour, minute, second = job.time
+        earliest = now - self.grace_period
+        day = local_date(now, zone_name) - timedelta(days=1)  # The lead can move the fire time to the day before
+        while True:
+            fire_time = local_timestamp(zone_name, day, hour, minute, second) - job.lead
+            if fire_time >= earliest and fire_time > job.last_fire:
+                return fire_time
+            day += timedelta(days=1)
+
+    def _arm(self, job, fire_time=None):
+        if fire_time is None:
+            fire_time = self.next_fire_time(job)
+        job.generation += 1
+        self._sequence += 1
+        heappush(self._heap, [fire_time, self._sequence, job.key, job.generation])
+
+    def set_job(self, key, time_string: str, callback, timezone=None, lead: float = 0):
+        """
+        Add a new job or re-arm an existing one with a new time
+        :param key: Unique key of the job
+        :param time_string: Time in the "HH:MM:SS" format
+        :param callback: The function to call when the job is due
+        :param timezone: The timezone of the time (the timezone of the scheduler by default)
+        :param lead: Run the job these many seconds before the time
+        """
+        job = Job(key, time_string, callback, timezone, lead)
+        with self._condition:
+            old_job = self.jobs.get(key)
+            if old_job is not None:
+                job.generation = old_job.generation
+                job.last_fire = old_job.last_fire
+            fire_time = self.next_fire_time(job)  # If it raises (eg., an invalid timezone), the old job is kept as it was
+            self.jobs[key] = job
+            self._arm(job, fire_time)
+            self._condition.notify()
+
+    def remove_job(self, key):
+        """
+        Remove a job. Its entries left in the heap are skipped when they are popped
+        :param key: Unique key of the job
+        """
+        with self._condition:
+            if key in self.jobs:
+                del self.jobs[key]
+                self._condition.notify()
+
+    def _pop_due(self):
+        """
+        Wait until a job is due and return it along with its intended fire time
+        """
+        with self._condition:
+            while self._running:
+                if len(self._heap) == 0:
+                    self._condition.wait(MAX_SLEEP)
+                    continue
+                fire_time, _, key, generation = self._heap[0]
+                job = self.jobs.get(key)
+                if job is None or job.generation != generation:  # Removed or re-armed job
+                    heappop(self._heap)
+                    continue
+                delay = fire_time - time.time()
+                if delay > 0:
+                    self._condition.wait(min(delay, MAX_SLEEP))
+                    continue
+                heappop(self._heap)
+                job.last_fire = fire_time
+                self._arm(job)
+                if -delay > self.grace_period:
+                    METRICS.inc("scheduler_skipped_total")
+                    print(f"[*] Scheduler: Skipped '{key}' as it was late by {round(-delay)} seconds")
+                    continue
+                return job, fire_time
+        return None, None
+
+    def run(self):
+        """
+        The main loop of the scheduler. Every due job is run in a new thread so that a slow job doesn't delay the others
+        """
+        self._running = True
+        while self._running:
+            job, fire_time = self._pop_due()
+            if job is None:
+                break
+            Thread(target=self._run_job, args=(job, fire_time,)).start()
+
+    def _run_job(self, job, fire_time):
+        # The drift is the time between the intended fire time and the moment the job actually starts
+        METRICS.observe("scheduler_drift_seconds", time.time() - fire_time, job="lead" if job.lead > 0 else "time")
+        try:
+            job.callback(job.key, fire_time)
+        except Exception as E:
+            print(f"[*] Error in Scheduler while running '{job.key}': {E}")
+
+    def stop(self):
+        """
+        Stop the main loop
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
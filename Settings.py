@@ -0,0 +1,109 @@
+"""
+Telegram Updates Bot - Settings File
+------------------------------------
+This file contains the store of the default settings of the updates (the updates.json file).
+The file is read once and read again only when its modification time changes. A change never modifies the current settings,
+a new copy is made and swapped in at once (copy-on-write), so the other threads always see either the old or the new settings.
+The file is first read when the settings are first needed, not when the store is made.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+from json import loads, dumps
+from threading import Lock
+
+from Files import atomic_write, FileWatcher
+
+# --- Main Code ---
+class SettingsStore:
+    def __init__(self, file_name: str = "updates.json"):
+        """
+        The settings class
+        :param file_name: The JSON file with the updates (see the structure in the main file)
+        """
+        self.file_name = file_name
+        self.listeners = []
+        self.mtime = None
+        self.updates = []  # The list from the file (in the same order)
+        self.snapshot = {}  # update_id -> {"name": ..., "settings": {...}}
+        self._lock = Lock()  # Only one writer at a time. The readers don't need it
+        self._watcher = None
+
+    def get(self):
+        """
+        Get the current settings (update_id -> {"name": ..., "settings": {...}}). The returned dictionary must not be changed
+        """
+        if self.mtime is None:  # Not read yet
+            self.reload()
+        return self.snapshot
+
+    def add_listener(self, func):
+        """
+        Add a function which is called with the set of the changed update IDs and the new settings whenever the settings change.
+        It's called after the lock of the store is released, so it can use other locks which are held while reading the settings
+        :param func: Any function
+        """
+        self.listeners.append(func)
+
+    def _publish(self, updates, mtime):
+        snapshot = {}
+        for update in updates:
+            snapshot[update["id"]] = {"name": update["name"], "settings": update["settings"]}
+        old = self.snapshot
+        changed = {i for i in set(old) | set(snapshot) if old.get(i) != snapshot.get(i)}
+        self.updates = updates
+        self.snapshot = snapshot
+        self.mtime = mtime
+        return changed
+
+    def _notify(self, changed):
+        if len(changed) > 0:
+            for listener in self.listeners:
+                listener(changed, self.snapshot)  # The latest settings, even if they were changed again by another thread
+
+    def reload(self, force: bool = False):
+        """
+        Read the file again if it was changed since it was last read
+        :param force: Read the file even if it wasn't changed
+        """
+        with self._lock:
+            mtime = os.stat(self.file_name).st_mtime_ns
+            if mtime == self.mtime and not force:
+                return False
+            changed = self._publish(loads(open(self.file_name, "r").read()), mtime)
+        self._notify(changed)
+        return True
+
+    def update(self, update_id: str, name: str, value):
+        """
+        Change a default setting of an update and save it to the file
+        :param update_id: The ID of the update
+        :param name: The name of the setting
+        :param value: The new value
+        """
+        self.get()
+        with self._lock:
+            updates = []
+            for update in self.updates:
+                if update["id"] == update_id:
+                    update = dict(update, settings=dict(update["settings"], **{name: value}))
+                updates.append(update)
+            atomic_write(self.file_name, dumps(updates, indent=4))
+            changed = self._publish(updates, os.stat(self.file_name).st_mtime_ns)
+        self._notify(changed)
+
+    def watch(self, interval: float = 5):
+        """
+        Check the modification time of the file in a new thread so that the changes made to it (by hand) are applied without restarting
+        :param interval: The number of seconds between two checks
+        """
+        if self._watcher is None:
+            self._watcher = FileWatcher("Settings", self.file_name, self.reload, interval)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
@@ -0,0 +1,158 @@
+"""
+Telegram Updates Bot - State Store File
+---------------------------------------
+This file contains the store used to remember the state of the conversations with the users (eg., which command is waiting for a text input).
+The entries expire after some time and the least recently used ones are removed when the store is full, so the memory used stays limited.
+The entries can also be saved in a SQLite database so that an unfinished operation continues after a restart.
+The database is opened and read when a store is first used, not when it's made.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import time
+import sqlite3
+from json import loads, dumps
+from collections import OrderedDict
+from threading import RLock
+
+# --- Main Code ---
+class StateRecord:
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value, expires_at):
+        self.value = value
+        self.expires_at = expires_at
+
+
+class SQLiteStateBackend:
+    def __init__(self, file_name: str = "bot_state.db"):
+        """
+        Saves the entries of the state stores in a SQLite database (each store in its own table). The keys and the values must be JSON serializable
+        :param file_name: The name of the database file
+        """
+        self.file_name = file_name
+        self._connection = None
+        self._lock = RLock()
+        self._tables = set()
+
+    @property
+    def connection(self):
+        if self._connection is None:  # Opened when it's first used
+            with self._lock:
+                if self._connection is None:
+                    self._connection = sqlite3.connect(self.file_name, check_same_thread=False, isolation_level=None)
+        return self._connection
+
+    def _table(self, name):
+        if name not in self._tables:
+            self.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+            self._tables.add(name)
+        return name
+
+    def load(self, name, limit):
+        with self._lock:
+            table = self._table(name)
+            self.connection.execute(f'DELETE FROM "{table}" WHERE expires_at <= ?', (time.time(),))
+            rows = self.connection.execute(
+                f'SELECT key, value, expires_at FROM "{table}" ORDER BY expires_at DESC LIMIT ?', (limit,)).fetchall()
+        return [(loads(key), loads(value), expires_at) for key, value, expires_at in reversed(rows)]
+
+    def set(self, name, key, value, expires_at):
+        with self._lock:
+            self.connection.execute(f'INSERT OR REPLACE INTO "{self._table(name)}" VALUES (?, ?, ?)',
+                                    (dumps(key), dumps(value), expires_at))
+
+    def delete(self, name, key):
+        with self._lock:
+            self.connection.execute(f'DELETE FROM "{self._table(name)}" WHERE key = ?', (dumps(key),))
+
+
+class StateStore:
+    def __init__(self, name: str, ttl: float = 86400, max_size: int = 10000, backend: SQLiteStateBackend = None):
+        """
+        A dictionary-like store whose entries expire
+        :param name: The name of the store (the table name in the database)
+        :param ttl: The number of seconds after which an entry is removed if it isn't changed
+        :param max_size: The maximum number of entries. The least recently used entries are removed when the store is full
+        :param backend: The object which saves the entries (optional)
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.backend = backend
+        self._records = OrderedDict()
+        self._lock = RLock()
+        self._loaded = backend is None  # The saved entries are loaded when the store is first used
+
+    def _load(self):
+        self._loaded = True
+        for key, value, expires_at in self.backend.load(self.name, self.max_size):
+            self._records[key] = StateRecord(value, expires_at)
+
+    def _get_record(self, key):
+        if not self._loaded:
+            self._load()
+        record = self._records.get(key)
+        if record is None:
+            return None
+        if record.expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._records.move_to_end(key)
+        return record
+
+    def _remove(self, key):
+        del self._records[key]
+        if self.backend is not None:
+            self.backend.delete(self.name, key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._get_record(key) is not None
+
+    def __getitem__(self, key):
+        with self._lock:
+            record = self._get_record(key)
+            if record is None:
+                raise KeyError(key)
+            return record.value
+
+    def get(self, key, default=None):
+        with self._lock:
+            record = self._get_record(key)
+            return default if record is None else record.value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            expires_at = time.time() + self.ttl
+            self._records[key] = StateRecord(value, expires_at)
+            self._records.move_to_end(key)
+            if self.backend is not None:
+                self.backend.set(self.name, key, value, expires_at)
+            while len(self._records) > self.max_size:
+                self._remove(next(iter(self._records)))
+
+    def __delitem__(self, key):
+        with self._lock:
+            if self._get_record(key) is None:
+                raise KeyError(key)
+            self._remove(key)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            record = self._get_record(key)
+            if record is None:
+                return default
+            self._remove(key)
+            return record.value
+
+    def __len__(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return len(self._records)
@@ -0,0 +1,306 @@
+"""
+Telegram Updates Bot - Subscriptions File
+-----------------------------------------
+This file contains the code to store the updates each chat receives along with its own settings (time, city, etc.)
+It also keeps an index of the fire times so that the scheduler can find all the chats to send an update to without going through every subscriber.
+The file is read when the subscriptions are first used (or when ensure_loaded is called), not when the store is made.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+from json import loads, dumps
+from threading import RLock
+
+from Files import atomic_write, FileWatcher
+
+# --- Main Code ---
+"""
+This is the structure of the subscriptions file (the keys of "updates" are the IDs from the updates.json file):
+{
+    "<chat_id>": {
+        "timezone": "Asia/Kolkata",
+        "updates": {
+            "wu": {"city": "Mumbai"},
+            "dq": {"time": "07:00:00", "timezone": "Europe/London"}
+        }
+    }
+}
+Only the settings changed by a chat are stored. The other settings are taken from the updates.json file.
+The timezone of an update can be set for one update (in its settings) or for all the updates of a chat.
+"""
+
+
+class SubscriptionStore:
+    def __init__(self, file_name: str, defaults: dict, default_timezone: str):
+        """
+        The subscriptions class
+        :param file_name: The JSON file to save the subscriptions in
+        :param defaults: The default settings of each update (see the Settings file), or a function which returns them (called when the file is loaded)
+        :param default_timezone: The timezone of the chats which haven't chosen one
+        """
+        self.file_name = file_name
+        self.defaults = defaults
+        self.default_timezone = default_timezone
+        self.subscribers = {}
+        self.index = {}  # (timezone, time) -> set of (chat_id, update_id)
+        self.members = {}  # update_id -> set of the chats subscribed to it
+        self.listeners = []
+        self.mtime = None  # The modification time of the file when it was last read or written
+        self._lock = RLock()
+        self._watcher = None
+        self._loaded = False
+        self._loading = False
+
+    def ensure_loaded(self):
+        """
+        Load the subscriptions from the file if they weren't loaded yet
+        """
+        if self._loaded:
+            return
+        defaults = self.defaults() if callable(self.defaults) else self.defaults  # Before taking the lock, as it may read the settings file
+        with self._lock:
+            if self._loaded or self._loading:  # Called again by a listener while loading (in the same thread)
+                return
+            self._loading = True
+            try:
+                if callable(self.defaults):
+                    self.defaults = defaults
+                self.load()
+            finally:
+                self._loading = False
+
+    def load(self):
+        """
+        Load the subscriptions from the file
+        """
+        with self._lock:
+            loading, self._loading = self._loading, True
+            try:
+                self.subscribers = {}
+                self.mtime = None
+                if os.path.exists(self.file_name):
+                    self.mtime = os.stat(self.file_name).st_mtime_ns
+                    for chat_id, subscriber in loads(open(self.file_name, "r").read()).items():
+                        self.subscribers[int(chat_id)] = subscriber
+                self.reindex()
+            finally:
+                self._loading = loading
+            self._loaded = True
+
+    def save(self):
+        """
+        Save the subscriptions to the file (atomically, see the Files file)
+        """
+        with self._lock:
+            atomic_write(self.file_name, dumps({str(chat_id): s for chat_id, s in self.subscribers.items()}, indent=4))
+            self.mtime = os.stat(self.file_name).st_mtime_ns
+
+    def reload(self):
+        """
+        Load the subscriptions again if the file was changed by another process since it was last read or written
+        """
+        self.ensure_loaded()
+        with self._lock:
+            mtime = os.stat(self.file_name).st_mtime_ns if os.path.exists(self.file_name) else None
+            if mtime == self.mtime:
+                return False
+            self.load()
+            return True
+
+    def watch(self, interval: float = 2):
+        """
+        Check the modification time of the file in a new thread (used when other processes change the subscriptions)
+        :param interval: The number of seconds between two checks
+        """
+        if self._watcher is None:
+            self._watcher = FileWatcher("Subscriptions", self.file_name, self.reload, interval)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+
+    def add_listener(self, func):
+        """
+        Add a function which is called with the set of the index keys whose chats were changed
+        :param func: Any function
+        """
+        self.listeners.append(func)
+
+    def _notify(self, keys):
+        for listener in self.listeners:
+            listener(keys)
+
+    def get_timezone(self, chat_id, update_id=None):
+        """
+        Get the timezone in which the time of an update is written for a chat
+        :param chat_id: The Telegram ID of the chat
+        :param update_id: The ID of the update (None to get the timezone of the chat)
+        """
+        self.ensure_loaded()
+        subscriber = self.subscribers.get(chat_id, {})
+        if update_id is not None:
+            timezone = subscriber.get("updates", {}).get(update_id, {}).get("timezone")
+            if timezone:
+                return timezone
+        return subscriber.get("timezone") or self.default_timezone
+
+    def get_settings(self, chat_id, update_id):
+        """
+        Get the settings of an update for a chat (the default settings with the changes made by the chat)
+        :param chat_id: The Telegram ID of the chat
+        :param update_id: The ID of the update
+        """
+        self.ensure_loaded()
+        settings = dict(self.defaults[update_id]["settings"])
+        subscriber = self.subscribers.get(chat_id)
+        if subscriber is not None:
+            settings.update(subscriber["updates"].get(update_id, {}))
+        return settings
+
+    def _keys_of(self, chat_id):
+        subscriber = self.subscribers[chat_id]
+        keys = {}
+        for update_id in subscriber["updates"]:
+            if update_id in self.defaults:
+                keys[update_id] = (self.get_timezone(chat_id, update_id), self.get_settings(chat_id, update_id)["time"])
+        return keys
+
+    def _add_to_index(self, chat_id):
+        for update_id in self.subscribers[chat_id]["updates"]:
+            self.members.setdefault(update_id, set()).add(chat_id)
+        keys = self._keys_of(chat_id)
+        for update_id, key in keys.items():
+            self.index.setdefault(key, set()).add((chat_id, update_id))
+        return set(keys.values())
+
+    def _remove_from_index(self, chat_id):
+        for update_id in self.subscribers[chat_id]["updates"]:
+            self.members.get(update_id, set()).discard(chat_id)
+        keys = self._keys_of(chat_id)
+        for update_id, key in keys.items():
+            pairs = self.index.get(key)
+            if pairs is not None:
+                pairs.discard((chat_id, update_id))
+                if len(pairs) == 0:
+                    del self.index[key]
+        return set(keys.values())
+
+    def reindex(self):
+        """
+        Build the index of the fire times again
+        """
+        with self._lock:
+            old_keys = set(self.index)
+            self.index = {}
+            self.members = {}
+            for chat_id in self.subscribers:
+                self._add_to_index(chat_id)
+            self._notify(old_keys | set(self.index))
+
+    def apply_defaults(self, changed, defaults):
+        """
+        Use new default settings. Only the chats subscribed to the changed updates are indexed again
+        :param changed: The set of the IDs of the changed updates
+        :param defaults: The new default settings
+        """
+        self.ensure_loaded()
+        with self._lock:
+            chats = set()
+            for update_id in changed:
+                chats |= self.members.get(update_id, set())
+            keys = set()
+            for chat_id in chats:
+                keys |= self._remove_from_index(chat_id)
+            self.defaults = defaults
+            for chat_id in chats:
+                keys |= self._add_to_index(chat_id)
+        self._notify(keys)
+
+    def is_subscribed(self, chat_id):
+        self.ensure_loaded()
+        return chat_id in self.subscribers
+
+    def subscribe(self, chat_id, update_ids=None):
+        """
+        Subscribe a chat to the updates. Nothing is changed if the chat is already subscribed
+        :param chat_id: The Telegram ID of the chat
+        :param update_ids: The IDs of the updates (all updates by default)
+        """
+        self.ensure_loaded()
+        with self._lock:
+            if chat_id in self.subscribers:
+                return
+            if update_ids is None:
+                update_ids = list(self.defaults)
+            self.subscribers[chat_id] = {"timezone": None, "updates": {i: {} for i in update_ids}}
+            keys = self._add_to_index(chat_id)
+            self.save()
+        self._notify(keys)
+
+    def unsubscribe(self, chat_id):
+        """
+        Remove a chat from the subscribers
+        :param chat_id: The Telegram ID of the chat
+        """
+        self.ensure_loaded()
+        with self._lock:
+            if chat_id not in self.subscribers:
+                return
+            keys = self._remove_from_index(chat_id)
+            del self.subscribers[chat_id]
+            self.save()
+        self._notify(keys)
+
+    def set_setting(self, chat_id, update_id, name, value):
+        """
+        Change a setting of an update for a chat
+        :param chat_id: The Telegram ID of the chat
+        :param update_id: The ID of the update
+        :param name: The name of the setting (eg., "time", "city")
+        :param value: The new value of the setting
+        """
+        self.set_settings(chat_id, update_id, {name: value})
+
+    def set_settings(self, chat_id, update_id, settings: dict):
+        """
+        Change many settings of an update for a chat at once (eg., the time and the timezone)
+        :param chat_id: The Telegram ID of the chat
+        :param update_id: The ID of the update
+        :param settings: The names and the new values of the settings
+        """
+        self.ensure_loaded()
+        with self._lock:
+            self.subscribe(chat_id)
+            keys = self._remove_from_index(chat_id)
+            self.subscribers[chat_id]["updates"].setdefault(update_id, {}).update(settings)
+            keys |= self._add_to_index(chat_id)
+            self.save()
+        self._notify(keys)
+
+    def set_timezone(self, chat_id, timezone: str):
+        """
+        Change the timezone of a chat
+        :param chat_id: The Telegram ID of the chat
+        :param timezone: The name of the timezone (eg., "Asia/Kolkata")
+        """
+        self.ensure_loaded()
+        with self._lock:
+            self.subscribe(chat_id)
+            keys = self._remove_from_index(chat_id)
+            self.subscribers[chat_id]["timezone"] = timezone
+            keys |= self._add_to_index(chat_id)
+            self.save()
+        self._notify(keys)
+
+    def due(self, key):
+        """
+        Get all the (chat_id, update_id) pairs scheduled at a specific time
+        :param key: A (timezone, time) tuple
+        """
+        self.ensure_loaded()
+        with self._lock:
+            return list(self.index.get(key, ()))
@@ -3,21 +3,84 @@ Telegram Updates Bot - Telegram API Wrapper File
 ------------------------------------------------
 This file contains the code to a custom Telegram API wrapper made specially for this project.
 (I know there are many libraries out there but I still made this)
+Making a bot doesn't send any request or read any file. That's done when it starts (see start_polling), so the bot starts quickly.
 
 -----
 Code by: @Sid72020123 on Github
 """
 
 # --- Imports ---
+import time
+import gzip
+import random
+import signal
 from json import dumps
-from requests import Session
-from requests.exceptions import ConnectionError
+from collections import deque
+from concurrent.futures import Future
+from threading import local, Condition, Thread, current_thread, main_thread
 from traceback import print_exc
 
+from OffsetStore import FileOffsetStore
+from Cache import TTLCache
+from StateStore import StateStore
+from Dispatcher import Dispatcher
+from Metrics import METRICS
+
 TELEGRAM_API_URL = "https://api.telegram.org/bot"  # This is the root endpoint of Telegram API
 
+PRIORITY_INTERACTIVE = 0  # Replies to the users. They are sent before the scheduled updates
+PRIORITY_BULK = 1  # Scheduled updates sent to many chats
+PER_CHAT_LIMITED_METHODS = {"sendMessage"}  # The methods limited by the per chat rate limit
+JSON_HEADERS = {"Content-Type": "application/json"}
+GZIP_JSON_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+CALLBACK_SEPARATOR = "|"  # Separates the parts of the callback data of a button. It can't be in the names of the keyboards, the update IDs or the setting names
+LEGACY_CALLBACK_SEPARATOR = "_"  # Used by the buttons sent by the older versions. They're still accepted so that the buttons of the old messages keep working
+POLL_ERROR_DELAY = 5  # The number of seconds to wait before polling again after Telegram returned an error
+
 
 # --- Main Code ---
+class RawJSON(str):
+    """
+    A string which is already JSON. It's added to the request body as it is (see encode_params)
+    """
+
+
+def stop_on_sigterm():
+    """
+    Stop the polling loop on SIGTERM (sent by the process managers to stop the bot) the same way as on Ctrl+C, so the offset is saved.
+    Signals can only be handled in the main thread, so nothing is done in the other threads
+    """
+    if current_thread() is not main_thread():
+        return
+
+    def handler(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handler)
+
+
+def encode_params(params: dict):
+    """
+    Make the JSON body of a request. The RawJSON values (eg., the keyboards) aren't encoded again
+    :param params: The parameters of the method
+    """
+    raw = [(k, v) for k, v in params.items() if isinstance(v, RawJSON)]
+    if len(raw) == 0:
+        return dumps(params, ensure_ascii=False, separators=(",", ":"))
+    body = dumps({k: v for k, v in params.items() if not isinstance(v, RawJSON)}, ensure_ascii=False,
+                 separators=(",", ":"))
+    raw_body = ",".join(f"{dumps(k)}:{v}" for k, v in raw)
+    return body[:-1] + ("," if len(body) > 2 else "") + raw_body + "}"
+
+
+def callback_data(*parts):
+    """
+    Join the parts of the callback data of a button (eg., an action and an update ID)
+    :param parts: Strings without the CALLBACK_SEPARATOR
+    """
+    return CALLBACK_SEPARATOR.join(parts)
+
+
 class InlineKeyboardInput:
     def __init__(self, name):
         """
@@ -27,6 +90,18 @@ class InlineKeyboardInput:
         self.name = name
         self.buttons = []
         self.action_function = None
+        self.version = 0  # Incremented whenever a button is added
+        self._markup = None
+        self._markup_version = -1
+
+    def markup(self):
+        """
+        Get the reply_markup of the keyboard. It's made only once for each version of the keyboard and reused for every message
+        """
+        if self._markup_version != self.version:
+            self._markup = RawJSON(dumps({"inline_keyboard": self.buttons}, ensure_ascii=False, separators=(",", ":")))
+            self._markup_version = self.version
+        return self._markup
 
     def set_action_function(self, func):
         """
@@ -43,188 +118,711 @@ class InlineKeyboardInput:
         """
         # NOTE 1: There are many button actions in Telegram, but I'm using some basic ones as per the requirements of this project
         # NOTE 2: There a way to group the inline keyboard buttons in Telegram by keeping the buttons of the same group together in a list...
-        self.buttons.append([{"text": text, "callback_data": f"{self.name}_{callback_data}"}])
+        self.buttons.append([{"text": text, "callback_data": f"{self.name}{CALLBACK_SEPARATOR}{callback_data}"}])
+        self.version += 1
 
 
-class TelegramBot:
-    def __init__(self, token):
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, now: float = None):
         """
-        The Main Bot code
+        A simple token bucket rate limiter
+        :param rate: The number of tokens added per second
+        :param capacity: The maximum number of tokens (i.e., the largest burst)
+        :param now: The current time (time.monotonic() is used if it's None)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+        self.paused_until = 0  # Set when Telegram asks to wait (retry_after)
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """
+        Get the number of seconds until a token is available (0 if a token is available now)
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def is_idle(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.paused_until
+
+
+class OutboundRequest:
+    def __init__(self, method, params, chat_id, priority):
+        self.method = method
+        self.params = params
+        self.chat_id = chat_id
+        self.priority = priority
+        self.future = Future()
+        self.not_before = 0
+        self.attempts = 0
+
+
+class OutboundQueue:
+    SCAN_LIMIT = 64  # The number of requests of a lane checked when looking for one whose chat isn't rate limited
+
+    def __init__(self, send_function=None, global_rate: float = 30, chat_rate: float = 1, chat_burst: float = 3,
+                 max_retries: int = 3, senders: int = 4, clock=time.monotonic):
+        """
+        A queue of the requests sent to Telegram which follows Telegram's flood limits
+        :param send_function: The function which sends a request. It's called with the method name and the parameters and returns the JSON response (set by the bot if it's None)
+        :param global_rate: The maximum number of requests per second
+        :param chat_rate: The maximum number of messages per second to the same chat
+        :param chat_burst: The number of messages which can be sent to the same chat at once before the per chat limit applies
+        :param max_retries: The number of times a request is retried after a network error or a 429 response
+        :param senders: The number of threads sending the requests
+        :param clock: The function which returns the current time in seconds (it's only changed by the tests)
+        """
+        self.send_function = send_function
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, global_rate, clock())
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.senders = senders
+        self.lanes = {PRIORITY_INTERACTIVE: deque(), PRIORITY_BULK: deque()}
+        self.chat_buckets = {}
+        self._condition = Condition()
+        self._threads = []
+        self._sent_times = deque(maxlen=10000)
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+
+    def submit(self, method: str, params: dict, chat_id=None, priority: int = PRIORITY_INTERACTIVE):
+        """
+        Add a request to the queue
+        :param method: The Telegram API method (eg., "sendMessage")
+        :param params: The parameters of the method
+        :param chat_id: The chat the request is sent to (used for the per chat limit)
+        :param priority: PRIORITY_INTERACTIVE or PRIORITY_BULK
+        :return: A Future which gets the JSON response
+        """
+        request = OutboundRequest(method, params, chat_id, priority)
+        with self._condition:
+            if len(self._threads) == 0:
+                for _ in range(self.senders):
+                    thread = Thread(target=self._sender, daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            self.lanes[priority].append(request)
+            self._condition.notify()
+        return request.future
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) > 10000:  # Forget the chats which haven't received a message recently
+                now = self.clock()
+                self.chat_buckets = {k: b for k, b in self.chat_buckets.items() if not b.is_idle(now)}
+            bucket = TokenBucket(self.chat_rate, self.chat_burst, self.clock())
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _next_request(self):
+        """
+        Get the next request which can be sent now, or the number of seconds to wait for one
+        """
+        now = self.clock()
+        wait = self.global_bucket.wait_time(now)
+        if wait > 0:
+            return None, wait
+        wait = None
+        for priority in sorted(self.lanes):
+            lane = self.lanes[priority]
+            for i in range(min(len(lane), self.SCAN_LIMIT)):
+                request = lane[i]
+                request_wait = request.not_before - now
+                bucket = None
+                if request_wait <= 0 and request.chat_id is not None and request.method in PER_CHAT_LIMITED_METHODS:
+                    bucket = self._chat_bucket(request.chat_id)
+                    request_wait = bucket.wait_time(now)
+                if request_wait <= 0:
+                    del lane[i]
+                    self.global_bucket.take()
+                    if bucket is not None:
+                        bucket.take()
+                    return request, 0
+                wait = request_wait if wait is None else min(wait, request_wait)
+        return None, wait
+
+    def _sender(self):
+        while True:
+            with self._condition:
+                while True:
+                    request, wait = self._next_request()
+                    if request is not None:
+                        break
+                    self._condition.wait(wait)
+            self._send(request)
+
+    def _send(self, request):
+        request.attempts += 1
+        try:
+            response = self.send_function(request.method, request.params)
+        except Exception as E:
+            if request.attempts <= self.max_retries:
+                self._retry(request, min(30, 2 ** request.attempts) * random.uniform(0.5, 1.5))
+            else:
+                self.failed += 1
+                request.future.set_result({"ok": False, "description": str(E)})
+            return
+        if response.get("error_code") == 429 and request.attempts <= self.max_retries:
+            self.rate_limited += 1
+            retry_after = response.get("parameters", {}).get("retry_after", 1)
+            with self._condition:
+                if request.chat_id is not None and request.method in PER_CHAT_LIMITED_METHODS:
+                    self._chat_bucket(request.chat_id).paused_until = self.clock() + retry_after
+                else:
+                    self.global_bucket.paused_until = self.clock() + retry_after
+            self._retry(request, retry_after)
+            return
+        if response.get("ok"):
+            self.sent += 1
+            self._sent_times.append(self.clock())
+        else:
+            self.failed += 1
+        request.future.set_result(response)
+
+    def _retry(self, request, delay):
+        self.retries += 1
+        request.not_before = self.clock() + delay
+        with self._condition:
+            self.lanes[request.priority].appendleft(request)  # Keep its place in the queue
+            self._condition.notify()
+
+    def stats(self):
+        """
+        Get the counters of the queue
+        """
+        with self._condition:
+            now = self.clock()
+            recent = [t for t in self._sent_times if now - t <= 60]
+            return {"sent": self.sent, "failed": self.failed, "retries": self.retries,
+                    "rate_limited": self.rate_limited,
+                    "queue_depth": {"interactive": len(self.lanes[PRIORITY_INTERACTIVE]),
+                                    "bulk": len(self.lanes[PRIORITY_BULK])},
+                    "throughput": len(recent) / 60}
+
+    def collect_metrics(self):
+        """
+        Get the stats of the queue as metrics (see Metrics.add_collector)
+        """
+        stats = self.stats()
+        return [("gauge", "outbound_queue_depth", {"priority": "interactive"}, stats["queue_depth"]["interactive"]),
+                ("gauge", "outbound_queue_depth", {"priority": "bulk"}, stats["queue_depth"]["bulk"]),
+                ("gauge", "outbound_throughput", {}, stats["throughput"]),
+                ("counter", "outbound_messages_total", {"outcome": "sent"}, stats["sent"]),
+                ("counter", "outbound_messages_total", {"outcome": "failed"}, stats["failed"]),
+                ("counter", "outbound_retries_total", {}, stats["retries"]),
+                ("counter", "outbound_rate_limited_total", {}, stats["rate_limited"])]
+
+
+class CommandRouter:
+    def __init__(self):
+        """
+        Finds the handler of a command or an inline keyboard button using dictionaries built once (when the bot starts), so the time taken doesn't depend on the number of commands
+        """
+        self.bot_username = None  # Commands like "/help@OtherBot" are ignored when this is set
+        self.commands = {}  # Command name or alias -> command name
+        self.callbacks = {}  # Name of the inline keyboard input (the prefix of the callback data) -> function
+        self.middlewares = ()
+        self.dirty = True
+
+    def compile(self, bot):
+        """
+        Build the dictionaries from the commands of a bot
+        :param bot: The bot object
+        """
+        commands = {}
+        for name in bot.commands:
+            commands[name.lower()] = name
+        for alias, name in bot.command_aliases.items():
+            commands[alias.lower()] = name
+        self.commands = commands
+        self.callbacks = dict(bot.callback_handlers)
+        self.middlewares = tuple(bot.middlewares)
+        self.dirty = False
+
+    def parse_command(self, message):
+        """
+        Get the command name and the arguments of a message. None is returned if the message isn't a command of this bot
+        :param message: A message from the Telegram API
+        """
+        entities = message.get("entities")
+        if not entities or entities[0]["type"] != "bot_command" or entities[0]["offset"] != 0:
+            return None, None
+        text = message["text"]
+        length = entities[0]["length"]
+        name, _, username = text[1:length].partition("@")
+        if username != "" and self.bot_username is not None and username.lower() != self.bot_username.lower():
+            return None, None  # The command is for another bot
+        command = self.commands.get(name.lower())
+        if command is None:
+            return None, None
+        return command, text[length:].split()
+
+    @staticmethod
+    def parse_callback_data(callback_data: str):
+        """
+        Split the callback data of a button into the name of the inline keyboard input and the data of the button.
+        The data of the older buttons (eg., "change_ct_wu") is changed to the new form ("change", "ct|wu")
+        :param callback_data: The callback data (eg., "main|wu")
+        """
+        if CALLBACK_SEPARATOR not in callback_data and LEGACY_CALLBACK_SEPARATOR in callback_data:
+            input_name, _, input_data = callback_data.partition(LEGACY_CALLBACK_SEPARATOR)
+            return input_name, input_data.replace(LEGACY_CALLBACK_SEPARATOR, CALLBACK_SEPARATOR, 1)
+        input_name, _, input_data = callback_data.partition(CALLBACK_SEPARATOR)
+        return input_name, input_data
+
+
+class BotBase:
+    def __init__(self, token, offset_store=None, user_info_ttl: float = 3600, state_backend=None,
+                 state_ttl: float = 86400, state_max_size: int = 10000, api_url: str = TELEGRAM_API_URL):
+        """
+        The code shared by the bot classes (the commands, the events and how an update is handled)
         :param token: Telegram Bot API Token
+        :param offset_store: The object which saves the ID of the next update (see the OffsetStore file). The update_id.txt file is used by default
+        :param user_info_ttl: The number of seconds the information of a user (or chat) from getChat is cached
+        :param state_backend: The object which saves the state of the conversations, eg., SQLiteStateBackend (see the StateStore file). It's kept only in memory by default
+        :param state_ttl: The number of seconds after which the state of a conversation is forgotten
+        :param state_max_size: The maximum number of conversations remembered
+        :param api_url: The root endpoint of the Telegram API (eg., a local Bot API server or the fake server of the benchmarks)
         """
-        self.session = Session()
+        self.offset_store = FileOffsetStore("update_id.txt") if offset_store is None else offset_store
         self.bot_token = token
-        self.api_url = f"{TELEGRAM_API_URL}{token}"
+        self.api_url = f"{api_url}{token}"
         self.commands = {}
         self.commands_accept_text_responses = {}  # To keep the track of which commands accept text responses after the user has used them
-        self.command_history = {}
-        self.previous_command = {}
-        self.inline_keyboard_inputs = {}
+        self.command_history = StateStore("command_history", state_ttl, state_max_size, state_backend)
+        self.previous_command = StateStore("previous_command", state_ttl, state_max_size, state_backend)
+        self.callback_handlers = {}  # Name of the inline keyboard input -> the function called when its buttons are pressed
+        self.command_aliases = {}
+        self.middlewares = []
+        self.router = CommandRouter()
+        self.user_info_cache = TTLCache(user_info_ttl, max_size=1024, max_stale=0)
 
         self.events = {"start": None, "new_message": None,
                        "new_command": None, "stop": None}
 
-        # The code below is required to keep track of the updates (or messages) the bot receives
+    def on_command(self, commmand_name, accept_text_message=None, aliases=()):
+        """
+        Add a command. The command "<any>" adds a middleware (see the middleware function) for compatibility
+        :param commmand_name: The name of the command (without the "/")
+        :param accept_text_message: The function to call with the text messages sent after the command
+        :param aliases: Other names of the command
+        """
+        if commmand_name == "<any>":
+            return self.middleware
+        if accept_text_message is not None:
+            self.commands_accept_text_responses[commmand_name] = accept_text_message
+        for alias in aliases:
+            self.command_aliases[alias] = commmand_name
+
+        def func(f):
+            self.commands[commmand_name] = f
+            self.router.dirty = True
+            return f
+
+        return func
+
+    def middleware(self, f):
+        """
+        Add a function which runs before every command (in the order they were added).
+        It's called with the same arguments as the command and the command runs only if every middleware returns True
+        """
+        self.middlewares.append(f)
+        self.router.dirty = True
+        return f
+
+    def on_callback(self, input_name):
+        """
+        Add the function called when a button of an inline keyboard input is pressed
+        :param input_name: The name of the inline keyboard input
+        """
+
+        def func(f):
+            self.callback_handlers[input_name] = f
+            self.router.dirty = True
+            return f
+
+        return func
+
+    def _register_keyboard(self, iki: InlineKeyboardInput):
+        """
+        Route the buttons of a keyboard sent by the bot to its action function (see InlineKeyboardInput.set_action_function)
+        :param iki: The InlineKeyboardInput object
+        """
+        if iki.action_function is not None and self.callback_handlers.get(iki.name) is not iki.action_function:
+            self.on_callback(iki.name)(iki.action_function)
+
+    def on_event(self, event_name):
+        def func(f):
+            self.events[event_name] = f
+
+        return func
+
+    def cancel_command_text_inputs(self, chat_id):
         try:
-            open("update_id.txt")
-        except FileNotFoundError:
-            file = open("update_id.txt", "w")
-            file.write("0")
-            file.close()
-        prev_id = int(open("update_id.txt", "r").read())
-        r = self.get_updates(offset=-1)["result"]
-        if len(r) > 0:
-            u = r[0]
-            new_id = u["update_id"]
-            if new_id > prev_id:
-                self.increment_update_id(new_id)
+            del self.command_history[chat_id]
+        except:
+            pass
+
+    def invalidate_user_info(self, id: int = None):
+        """
+        Remove the cached information of a user (or of all the users if the ID isn't given)
+        :param id: The Telegram ID of the user
+        """
+        self.user_info_cache.invalidate(id)
+
+    def read_update_id(self):
+        """
+        Get the ID of the next update from the offset store
+        """
+        return self.offset_store.get()
+
+    def increment_update_id(self, prev_id):
+        new = prev_id + 1
+        self.offset_store.set(new)
+        return new
+
+    @staticmethod
+    def get_update_chat_id(raw_message):
+        """
+        Get the ID of the chat an update belongs to. The updates of the same chat are handled in order
+        :param raw_message: An update from the Telegram API
+        """
+        if "message" in raw_message:
+            message = raw_message["message"]
+            return message["chat"]["id"] if "chat" in message else message["from"]["id"]
+        if "callback_query" in raw_message:
+            return raw_message["callback_query"]["message"]["chat"]["id"]
+        return raw_message.get("update_id")
+
+    def _event_steps(self, name, **data):
+        if self.events[name] is not None:
+            yield self.events[name], data
+
+    def _update_steps(self, raw_message):
+        """
+        A generator which goes through an update and yields each function to call along with its arguments.
+        The result of the function is sent back to the generator. This lets both the normal and the async bots use the same code
+        :param raw_message: An update from the Telegram API
+        """
+        if self.router.dirty:
+            self.router.compile(self)
+        if "message" in raw_message:  # New Message
+            message = raw_message["message"]
+            yield from self._event_steps("new_message", message=message)
+            chat_id = message["from"]["id"]
+            command, args = self.router.parse_command(message)
+            if command is not None:
+                yield from self._event_steps("new_command", command=command, message=message)
+                data = {"message": message, "command": command, "args": args}
+                proceed = True
+                for middleware in self.router.middlewares:
+                    proceed = yield middleware, data
+                    if not proceed:
+                        break
+                if proceed:
+                    if command in self.commands_accept_text_responses:
+                        self.command_history[chat_id] = command
+                    else:
+                        if chat_id in self.command_history and (self.previous_command.get(
+                                chat_id) in self.commands_accept_text_responses):
+                            del self.command_history[
+                                chat_id]  # Remove the command from history so that the bot won't continue to keep taking text user responses even after the command's script was successfully run...
+                    yield self.commands[command], data
+                    self.previous_command[chat_id] = command
+            elif "text" in message and not message["text"].startswith("/"):  # For the text input after the user has used a specific command
+                if chat_id in self.command_history:
+                    command_used = self.command_history[chat_id]
+                    if command_used in self.commands_accept_text_responses:
+                        yield self.commands_accept_text_responses[command_used], {"message": message}
+        elif "callback_query" in raw_message:  # Callback query updates (or inline keyboard updates in case of this project)
+            callback_query = raw_message["callback_query"]
+            call_back_query_id = callback_query["id"]
+            callback_data = callback_query.get("data", "")
+            chat_id = callback_query["message"]["chat"]["id"]
+            message_id = callback_query["message"]["message_id"]
+            input_name, input_data = self.router.parse_callback_data(callback_data)
+            data = {
+                "callback_query": callback_query,
+                "callback_query_id": call_back_query_id,
+                "callback_data": callback_data,
+                "chat_id": chat_id,
+                "message_id": message_id,
+                "input_name": input_name,
+                "input_data": input_data
+            }
+            handler = self.router.callbacks.get(input_name)
+            if handler is not None:
+                yield handler, data
+            else:
+                yield self.answer_callback_query, {"query_id": call_back_query_id}
+
+
+class TelegramBot(BotBase):
+    def __init__(self, token, offset_store=None, dispatcher=None, outbound=None, state_backend=None,
+                 api_url: str = TELEGRAM_API_URL, gzip_threshold: int = None):
+        """
+        The Main Bot code
+        :param token: Telegram Bot API Token
+        :param offset_store: The object which saves the ID of the next update (see the OffsetStore file). The update_id.txt file is used by default
+        :param dispatcher: The object which runs the handlers of the updates (see the Dispatcher file). A pool of 8 threads is used by default
+        :param outbound: The OutboundQueue used to send the messages. A queue with Telegram's default limits is used by default
+        :param state_backend: The object which saves the state of the conversations, eg., SQLiteStateBackend (see the StateStore file)
+        :param api_url: The root endpoint of the Telegram API
+        :param gzip_threshold: Compress the request bodies of at least these many bytes (None to never compress them). Only use it with a server which accepts compressed requests
+        """
+        super().__init__(token, offset_store, state_backend=state_backend, api_url=api_url)
+        self.gzip_threshold = gzip_threshold
+        self.dispatcher = Dispatcher() if dispatcher is None else dispatcher
+        self.outbound = OutboundQueue() if outbound is None else outbound
+        if self.outbound.send_function is None:
+            self.outbound.send_function = self._call
+        self._local = local()
+
+    @property
+    def session(self):
+        """
+        The HTTP session of the current thread (a requests.Session can't be safely shared between threads)
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            from requests import Session  # requests takes some time to import, so it's imported when the first request is sent
+            session = Session()
+            self._local.session = session
+        return session
 
     def get_updates(self, timeout: int = 3, limit: int = 10, offset: int = -1):
-        return self.session.get(f"{self.api_url}/getUpdates",
-                                params={"limit": limit, "offset": offset, "timeout": timeout}).json()
+        start = time.monotonic()
+        # The request waits up to "timeout" seconds on Telegram's side (long polling), so give it some more time here
+        result = self._post("getUpdates", {"limit": limit, "offset": offset, "timeout": timeout}, timeout + 10)
+        if METRICS.active:
+            METRICS.observe("telegram_get_updates_seconds", time.monotonic() - start)
+            METRICS.inc("telegram_updates_received_total", len(result.get("result", [])))
+        return result
+
+    def _post(self, method: str, params: dict, timeout: float = None):
+        """
+        Send a request with the parameters in a JSON body (instead of the URL), so long messages don't need to be URL encoded
+        :param method: The Telegram API method
+        :param params: The parameters of the method
+        :param timeout: The number of seconds to wait for the response
+        """
+        body = encode_params(params).encode()
+        headers = JSON_HEADERS
+        if self.gzip_threshold is not None and len(body) >= self.gzip_threshold:
+            body = gzip.compress(body, 5)
+            headers = GZIP_JSON_HEADERS
+        if METRICS.active:
+            METRICS.inc("telegram_api_bytes_sent_total", len(body), method=method)
+        return self.session.post(f"{self.api_url}/{method}", data=body, headers=headers, timeout=timeout).json()
+
+    def _call(self, method: str, params: dict):
+        start = time.monotonic()
+        try:
+            result = self._post(method, params)
+        except Exception:
+            METRICS.inc("telegram_api_requests_total", method=method, status="error")
+            raise
+        if METRICS.active:
+            METRICS.observe("telegram_api_seconds", time.monotonic() - start, method=method)
+            METRICS.inc("telegram_api_requests_total", method=method,
+                        status="ok" if result.get("ok") else result.get("error_code", "error"))
+        return result
+
+    def _request(self, method: str, params: dict, chat_id=None, priority: int = PRIORITY_INTERACTIVE,
+                 wait: bool = True):
+        """
+        Send a request through the outbound queue
+        :param method: The Telegram API method
+        :param params: The parameters of the method
+        :param chat_id: The chat the request is sent to (for the per chat rate limit)
+        :param priority: PRIORITY_INTERACTIVE or PRIORITY_BULK
+        :param wait: Wait for the response. If it's False, a Future is returned instead
+        """
+        future = self.outbound.submit(method, params, chat_id, priority)
+        return future.result() if wait else future
 
-    def send_message(self, chat_id, message: str, parse_mode: str = "MarkdownV2"):
+    def send_message(self, chat_id, message: str, parse_mode: str = "MarkdownV2", priority: int = PRIORITY_INTERACTIVE,
+                     wait: bool = True):
         # I know I should have set "HTML" as the default parse_mode value as all the messages sent by this bot are in HTML format.
-        return self.session.get(f"{self.api_url}/sendMessage",
-                                params={"chat_id": chat_id, "parse_mode": parse_mode, "text": message,
-                                        "disable_web_page_preview": True}).json()
+        return self._request("sendMessage", {"chat_id": chat_id, "parse_mode": parse_mode, "text": message,
+                                             "disable_web_page_preview": True}, chat_id, priority, wait)
 
     def edit_message(self, chat_id, message_id, message: str, parse_mode: str = "MarkdownV2"):
         payload = {"chat_id": chat_id, "message_id": message_id, "parse_mode": parse_mode, "text": message,
                    "disable_web_page_preview": True}
-        return self.session.get(f"{self.api_url}/editMessageText", params=payload).json()
+        return self._request("editMessageText", payload, chat_id)
 
     def send_inline_keyboard_input(self, chat_id, message, iki: InlineKeyboardInput, parse_mode: str = "MarkdownV2"):
         payload = {"chat_id": chat_id, "parse_mode": parse_mode, "text": message,
-                   "disable_web_page_preview": True, "reply_markup": dumps({"inline_keyboard": iki.buttons})}
-        self.inline_keyboard_inputs[iki.name] = iki
-        return self.session.get(f"{self.api_url}/sendMessage", params=payload).json()
+                   "disable_web_page_preview": True, "reply_markup": iki.markup()}
+        self._register_keyboard(iki)
+        return self._request("sendMessage", payload, chat_id)
 
     def edit_input_keyboard_input(self, chat_id, message_id, iki: InlineKeyboardInput):
-        payload = {"chat_id": chat_id, "message_id": message_id,
-                   "reply_markup": dumps({"inline_keyboard": iki.buttons})}
-        if len(iki.buttons) == 0:
-            payload["reply_markup"] = {}
-        self.inline_keyboard_inputs[iki.name] = iki
-        return self.session.get(f"{self.api_url}/editMessageReplyMarkup", params=payload).json()
+        # A keyboard without buttons removes the buttons of the message
+        payload = {"chat_id": chat_id, "message_id": message_id, "reply_markup": iki.markup()}
+        self._register_keyboard(iki)
+        return self._request("editMessageReplyMarkup", payload, chat_id)
 
-    def get_user_info(self, id: int):
-        return self.session.get(f"{self.api_url}/getChat?chat_id={id}").json()
+    def get_user_info(self, id: int, use_cache: bool = True):
+        if use_cache:
+            info = self.user_info_cache.get(id)
+            if info is not None:
+                return info
+        info = self._call("getChat", {"chat_id": id})
+        if info.get("ok"):
+            self.user_info_cache.set(id, info)
+        return info
 
-    def on_command(self, commmand_name, accept_text_message=None):
-        if accept_text_message is not None:
-            self.commands_accept_text_responses[commmand_name] = accept_text_message
-
-        def func(f):
-            self.commands[commmand_name] = f
+    def get_me(self):
+        return self._call("getMe", {})
 
-        return func
+    def prepare_router(self):
+        """
+        Build the command router and get the username of the bot (used to ignore commands like "/help@OtherBot")
+        """
+        if self.router.bot_username is None:
+            try:
+                self.router.bot_username = self.get_me()["result"]["username"]
+            except Exception as E:
+                print(f"TelegramAPI: Error while getting the username of the bot - {E}")
+        self.router.compile(self)
 
-    def on_event(self, event_name):
-        def func(f):
-            self.events[event_name] = f
+    def set_webhook(self, url: str, secret_token: str = None):
+        params = {"url": url}
+        if secret_token is not None:
+            params["secret_token"] = secret_token
+        return self._call("setWebhook", params)
 
-        return func
+    def delete_webhook(self):
+        # Required before using start_polling again after using a webhook
+        return self._call("deleteWebhook", {})
 
     def _emit_event(self, name, **data):
         if self.events[name] is not None:
             self.events[name](**data)
 
     def answer_callback_query(self, query_id: int):
-        data = {"callback_query_id": query_id}
-        return self.session.get(f"{self.api_url}/answerCallbackQuery", data=data).json()
-
-    def increment_update_id(self, prev_id):
-        new = prev_id + 1
-        with open("update_id.txt", "w+") as file:
-            file.write(str(new))
-        return new
+        return self._request("answerCallbackQuery", {"callback_query_id": query_id})
 
-    def cancel_command_text_inputs(self, chat_id):
+    def process_update(self, raw_message):
+        """
+        Run the commands, the events and the inline keyboard functions for an update
+        :param raw_message: An update from the Telegram API
+        """
+        steps = self._update_steps(raw_message)
+        result = None
         try:
-            del self.command_history[chat_id]
-        except:
+            while True:
+                func, data = steps.send(result)
+                if METRICS.active:
+                    start = time.monotonic()
+                    result = func(**data)
+                    METRICS.observe("handler_seconds", time.monotonic() - start, handler=func.__name__)
+                else:
+                    result = func(**data)
+        except StopIteration:
             pass
 
-    def start_polling(self):
+    def _handle_update(self, raw_message):
         try:
-            file = open("update_id.txt", "r")
-            UPDATE_ID = int(file.read())
-            file.close()
+            self.process_update(raw_message)
+        except Exception as E:
+            METRICS.inc("handler_errors_total")
+            print(f"TelegramAPI: Error while handling the update {raw_message.get('update_id')} - {E}")
+            print_exc()
+
+    def process_updates(self, raw_updates):
+        """
+        Handle a batch of updates. The updates of the same chat are handled in order and the updates of different chats at the same time.
+        An error in one update doesn't stop the others from being handled
+        :param raw_updates: A list of updates from the Telegram API
+        """
+        for raw_message in raw_updates:
+            self.dispatcher.submit(self.get_update_chat_id(raw_message), self._handle_update, raw_message)
+
+    def start_polling(self, timeout: int = 30, limit: int = 100):
+        """
+        Receive the updates using long polling and handle them
+        :param timeout: The number of seconds Telegram waits for a new update before returning an empty list
+        :param limit: The maximum number of updates received at once
+        """
+        from requests.exceptions import ConnectionError
+        stop_on_sigterm()
+        try:
+            UPDATE_ID = self.read_update_id()  # The updates received while the bot was stopped are handled first
         except Exception as E:
             print(f"TelegramAPI: Error while reading previous update ID: {E}")
             return None
+        self.prepare_router()
         self._emit_event("start")
         while True:
             try:
-                raw_update = self.get_updates(offset=UPDATE_ID)
+                raw_update = self.get_updates(timeout=timeout, limit=limit, offset=UPDATE_ID)
                 if raw_update["ok"]:
                     if len(raw_update["result"]) != 0:
-                        raw_message = raw_update["result"][0]
-                        if "message" in raw_message:  # New Message
-                            message = raw_message["message"]
-                            self._emit_event("new_message", message=message)
-                            chat_id = message["from"]["id"]
-                            if "entities" in message:
-                                entity_type = message["entities"][0]["type"]
-                                if entity_type == "bot_command":
-                                    text = message["text"]
-                                    command = text[1:]
-                                    if command in self.commands:
-                                        self._emit_event("new_command", command=command, message=message)
-                                        proceed = True
-                                        if "<any>" in self.commands:
-                                            proceed = self.commands["<any>"](message=message)
-                                        if proceed:
-                                            if command in self.commands_accept_text_responses:
-                                                self.command_history[chat_id] = command
-                                            else:
-                                                if chat_id in self.command_history and (self.previous_command[
-                                                                                            chat_id] in self.commands_accept_text_responses):
-                                                    del self.command_history[
-                                                        chat_id]  # Remove the command from history so that the bot won't continue to keep taking text user responses even after the command's script was successfully run...
-                                            self.commands[command](message=message)
-                                            self.previous_command[chat_id] = command
-                            else:  # For the text input after the user has used a specific command
-                                if chat_id in self.command_history:
-                                    command_used = self.command_history[chat_id]
-                                    if command_used in self.commands_accept_text_responses:
-                                        self.commands_accept_text_responses[command_used](
-                                            message=message)
-                            UPDATE_ID = self.increment_update_id(
-                                int(raw_message["update_id"]))
-                        elif "callback_query" in raw_message:  # Callback query updates (or inline keyboard updates in case of this project)
-                            callback_query = raw_message["callback_query"]
-                            call_back_query_id = callback_query["id"]
-                            callback_data = callback_query["data"]
-                            chat_id = callback_query["message"]["chat"]["id"]
-                            message_id = callback_query["message"]["message_id"]
-                            input_name = callback_data.split("_")[0]
-                            input_data = callback_data[callback_data.index(
-                                "_") + 1:]
-                            data = {
-                                "callback_query": callback_query,
-                                "callback_query_id": call_back_query_id,
-                                "callback_data": callback_data,
-                                "chat_id": chat_id,
-                                "message_id": message_id,
-                                "input_name": input_name,
-                                "input_data": input_data
-                            }
-                            if self.inline_keyboard_inputs[input_name].action_function is not None:
-                                self.inline_keyboard_inputs[input_name].action_function(
-                                    **data)
-                            else:
-                                self.answer_callback_query(call_back_query_id)
-                            UPDATE_ID = self.increment_update_id(
-                                int(raw_message["update_id"]))
+                        self.process_updates(raw_update["result"])
+                        UPDATE_ID = self.increment_update_id(
+                            int(raw_update["result"][-1]["update_id"]))  # The offset is saved once for the whole batch
+                else:  # Eg., 409 Conflict while a webhook is set
+                    print(f"TelegramAPI: Error while getting the updates - {raw_update.get('description')}")
+                    time.sleep(raw_update.get("parameters", {}).get("retry_after", POLL_ERROR_DELAY))
             except ConnectionError:
-                pass
+                time.sleep(1)
             except KeyboardInterrupt:
+                self.dispatcher.stop()  # Finish handling the received updates
+                self.offset_store.flush()
                 self._emit_event("stop")
                 break
             except Exception as E:
                 print(f"TelegramAPI: Polling Loop Error - {E}")
                 print_exc()
-                UPDATE_ID = self.increment_update_id(
-                    UPDATE_ID)  # Ignore the new message
+                time.sleep(1)
+
+    def start_webhook(self, host: str = "0.0.0.0", port: int = 8443, path: str = "/webhook",
+                      secret_token: str = None, url: str = None, block: bool = True):
+        """
+        Receive the updates from Telegram using a webhook and handle them (the same way as start_polling)
+        :param host: The host to listen on
+        :param port: The port to listen on
+        :param path: The path Telegram posts the updates to
+        :param secret_token: The secret token Telegram sends in the X-Telegram-Bot-Api-Secret-Token header
+        :param url: The public URL of the webhook. If it's given, the webhook is set using setWebhook
+        :param block: Wait until the server is stopped (using Ctrl+C). If it's False, the server is started in a new thread and returned
+        """
+        if url is not None:
+            result = self.set_webhook(url, secret_token)
+            if not result.get("ok"):
+                print(f"TelegramAPI: Error while setting the webhook - {result.get('description')}")
+                return None
+        from Webhook import WebhookServer  # Only imported if the webhook is used
+        self.prepare_router()
+        server = WebhookServer(host, port, path, secret_token, lambda update: self.process_updates([update]))
+        self._emit_event("start")
+        if not block:
+            server.start()
+            return server
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+            self.dispatcher.stop()
+            self._emit_event("stop")
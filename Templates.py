@@ -0,0 +1,94 @@
+"""
+Telegram Updates Bot - Templates File
+-------------------------------------
+This file contains the templates of the HTML messages sent by the bot.
+A template is split into its static and dynamic parts only once (when it's registered), the emojis are filled in at the same time
+and the dynamic values (user names, quotes, facts, etc.) are HTML escaped while rendering so that they can't break the message.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+from html import escape
+from string import Formatter
+
+# --- Main Code ---
+# Unicode of the emojis used by the bot. They can be used in the templates like "{hand_emoji}"
+EMOJIS = {
+    "hand_emoji": "\U0001F44B",
+    "pencil_emoji": "\U0000270F",
+    "message_emoji": "\U00002709",
+    "warning_emoji": "\U000026A0",
+    "question_emoji": "\U00002753",
+    "success_emoji": "\U00002705",
+    "cloud_emoji": "\U00002601"
+}
+
+
+class Template:
+    def __init__(self, text: str, constants: dict = None, safe=()):
+        """
+        The template class
+        :param text: The text of the message with the fields written like "{name}"
+        :param constants: Fields whose values never change. They are filled in now
+        :param safe: The names of the fields which are already HTML (they aren't escaped)
+        """
+        constants = {} if constants is None else constants
+        parts = []
+        literal = ""
+        for text_part, field, spec, _ in Formatter().parse(text):
+            literal += text_part
+            if field is None:
+                continue
+            if field in constants:
+                literal += format(constants[field], spec)
+                continue
+            parts.append(literal)
+            literal = ""
+            parts.append((field, spec, field in safe))
+        parts.append(literal)
+        self.parts = tuple(part for part in parts if part != "")
+        # A message without any dynamic field is made only once
+        self.static = "".join(self.parts) if all(isinstance(part, str) for part in self.parts) else None
+
+    def render(self, **fields):
+        """
+        Make the message
+        :param fields: The values of the fields
+        """
+        if self.static is not None:
+            return self.static
+        result = []
+        for part in self.parts:
+            if isinstance(part, str):
+                result.append(part)
+            else:
+                name, spec, safe = part
+                value = format(fields[name], spec)
+                result.append(value if safe else escape(value, quote=False))
+        return "".join(result)
+
+
+TEMPLATES = {}
+
+
+def register(name: str, text: str, safe=()):
+    """
+    Add a template to the registry. The emojis in the EMOJIS dictionary are filled in
+    :param name: Unique name of the template
+    :param text: The text of the message
+    :param safe: The names of the fields which are already HTML (they aren't escaped)
+    """
+    template = Template(text, EMOJIS, safe)
+    TEMPLATES[name] = template
+    return template
+
+
+def render(template: str, /, **fields):
+    """
+    Make a message using a registered template
+    :param template: The name of the template (positional only, so that a template can have a field called "name")
+    :param fields: The values of the fields
+    """
+    return TEMPLATES[template].render(**fields)
@@ -0,0 +1,8 @@
+"""
+Telegram Updates Bot - Tests
+----------------------------
+The unit tests of the bot. Run them from the root folder of the project using: python -m pytest Tests
+
+-----
+Code by: @Sid72020123 on Github
+"""
@@ -0,0 +1,87 @@
+"""
+Telegram Updates Bot - Async Bot Tests
+--------------------------------------
+Run the asyncio bot against a fake aiohttp session. The tests which need aiohttp are skipped if it isn't installed.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import asyncio
+import unittest
+from json import loads
+
+from AsyncTelegramAPI import AsyncTelegramBot, aiohttp
+from OffsetStore import MemoryOffsetStore
+from TelegramAPI import BotBase, TelegramBot
+
+
+# --- Main Code ---
+class FakeResponse:
+    def __init__(self, result):
+        self.result = result
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def json(self, content_type=None):
+        return self.result
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self):
+        self.requests = []  # (method, params)
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.requests.append((url.rsplit("/", 1)[1], loads(data)))
+        return FakeResponse({"ok": True, "result": {"message_id": len(self.requests)}})
+
+    async def close(self):
+        self.closed = True
+
+
+def command_update(update_id, chat_id, text):
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "text": text, "from": {"id": chat_id, "first_name": "User"},
+        "chat": {"id": chat_id, "type": "private"}, "entities": [{"type": "bot_command", "offset": 0,
+                                                                   "length": len(text.split()[0])}]}}
+
+
+class AsyncBotTest(unittest.TestCase):
+    def test_shared_update_steps(self):
+        # Both bots go through an update using the same code
+        self.assertIs(AsyncTelegramBot._update_steps, BotBase._update_steps)
+        self.assertIs(TelegramBot._update_steps, BotBase._update_steps)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp isn't installed")
+    def test_commands(self):
+        bot = AsyncTelegramBot("test", offset_store=MemoryOffsetStore())
+        session = FakeSession()
+
+        @bot.on_command("ping")
+        async def ping(**data):
+            await bot.send_message(data["message"]["chat"]["id"], "pong")
+
+        @bot.on_command("echo")
+        def echo(**data):  # A normal function works too
+            return bot.send_message(data["message"]["chat"]["id"], " ".join(data["args"]))
+
+        async def run():
+            bot.session = session
+            bot._semaphore = asyncio.Semaphore(10)
+            await bot.process_update(command_update(1, 5, "/ping"))
+            await bot.process_update(command_update(2, 6, "/echo a b"))
+
+        asyncio.run(run())
+        self.assertEqual([(m, p["chat_id"], p["text"]) for m, p in session.requests],
+                         [("sendMessage", 5, "pong"), ("sendMessage", 6, "a b")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Telegram Updates Bot - Cache Tests
+----------------------------------
+Check that the expired entries are only used for a limited time while the API fails.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import time
+import unittest
+import tempfile
+
+from Cache import TTLCache
+from Providers import Provider
+
+
+# --- Main Code ---
+def failing_loader():
+    raise ConnectionError("The API is down")
+
+
+class CacheTest(unittest.TestCase):
+    def test_stale_entry(self):
+        cache = TTLCache(0.05, max_stale=0.1)
+        cache.set("a", 1)
+        time.sleep(0.07)
+        self.assertEqual(cache.get("a", failing_loader), 1)  # Expired but still usable (refreshed in the background)
+        time.sleep(0.1)
+        with self.assertRaises(ConnectionError):  # Too old, so the loader is called and its error is raised
+            cache.get("a", failing_loader)
+
+    def test_peek(self):
+        cache = TTLCache(0.05)
+        cache.set("a", 1)
+        self.assertEqual(cache.peek("a", fresh_only=True), 1)
+        time.sleep(0.07)
+        self.assertEqual(cache.peek("a"), 1)
+        self.assertIsNone(cache.peek("a", fresh_only=True))
+
+    def test_provider_max_stale(self):
+        self.assertEqual(Provider("x", print, ttl=3600).cache.max_stale, 3600)
+        self.assertEqual(Provider("x", print, ttl=3600, max_stale=60).cache.max_stale, 60)
+        self.assertIsNone(Provider("x", print).cache)
+
+    def test_debounced_save(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, "cache.json")
+            cache = TTLCache(60, file_name=file_name, save_interval=0.1)
+            cache.set("a", 1)
+            cache.set(("b", "c"), 2)
+            self.assertFalse(os.path.exists(file_name))  # Not written on every change
+            time.sleep(0.3)
+            loaded = TTLCache(60, file_name=file_name)
+            self.assertEqual(loaded.get("a"), 1)
+            self.assertEqual(loaded.get(("b", "c")), 2)
+            cache.set("a", 3)
+            cache.flush()
+            self.assertEqual(TTLCache(60, file_name=file_name).get("a"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Telegram Updates Bot - Cluster Tests
+------------------------------------
+Check the work queue, the leader lease and which worker runs the scheduler jobs.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import time
+import unittest
+import tempfile
+
+import APIs
+from Cluster import WorkQueue, LeaderLease, enqueue_deliveries, shard_of
+
+
+# --- Main Code ---
+class ClusterTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.queue = WorkQueue(os.path.join(self.folder.name, "work_queue.db"))
+
+    def tearDown(self):
+        APIs.CLUSTER.update({"queue": None, "lease": None, "shards": 0})
+        self.queue.connection.close()
+        self.folder.cleanup()
+
+    def test_enqueue_and_claim(self):
+        deliveries = [("dq", "message", list(range(10)), 100.0, "2026-01-01")]
+        enqueue_deliveries(self.queue, deliveries, shards=2, chunk_size=3)
+        chats = []
+        for shard in range(2):
+            for task_id, task in self.queue.claim(shard, limit=100):
+                self.assertTrue(all(shard_of(c, 2) == shard for c in task["chat_ids"]))
+                chats += task["chat_ids"]
+                self.queue.done(task_id)
+        self.assertEqual(sorted(chats), list(range(10)))
+        self.assertEqual(self.queue.size(), 0)
+
+    def test_claimed_task_is_not_claimed_again(self):
+        enqueue_deliveries(self.queue, [("dq", "message", [1], 100.0, "2026-01-01")], shards=1)
+        self.assertEqual(len(self.queue.claim(0)), 1)
+        self.assertEqual(self.queue.claim(0), [])
+
+    def test_mark_fired_once(self):
+        self.assertTrue(self.queue.mark_fired(("UTC", "06:00:00"), 100.0))
+        self.assertFalse(self.queue.mark_fired(("UTC", "06:00:00"), 100.0))
+        self.assertTrue(self.queue.mark_fired(("UTC", "06:00:00"), 200.0))
+
+    def test_lease(self):
+        first = LeaderLease(self.queue, ttl=60, owner="first")
+        second = LeaderLease(self.queue, ttl=60, owner="second")
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        first.release()
+        self.assertTrue(second.acquire())
+
+    def test_should_fire(self):
+        leader = LeaderLease(self.queue, ttl=60, owner="leader")
+        follower = LeaderLease(self.queue, ttl=60, owner="follower")
+        leader.acquire()
+        follower.acquire()
+        APIs.CLUSTER.update({"queue": self.queue, "lease": follower, "shards": 1})
+        start = time.monotonic()
+        self.assertFalse(APIs.should_fire(("UTC", "06:00:00"), 100.0))
+        self.assertLess(time.monotonic() - start, 1)  # A worker which isn't the leader doesn't wait
+        APIs.CLUSTER["lease"] = leader
+        self.assertTrue(APIs.should_fire(("UTC", "06:00:00"), 100.0))
+        self.assertFalse(APIs.should_fire(("UTC", "06:00:00"), 100.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
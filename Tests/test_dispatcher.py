@@ -0,0 +1,82 @@
+"""
+Telegram Updates Bot - Dispatcher Tests
+---------------------------------------
+Check that the tasks of a chat run in order while the other chats run at the same time, and that submitting waits when the queue is full.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import asyncio
+import unittest
+from threading import Event, Thread
+
+from Dispatcher import Dispatcher, AsyncDispatcher
+
+
+# --- Main Code ---
+class DispatcherTest(unittest.TestCase):
+    def test_chat_order(self):
+        dispatcher = Dispatcher(workers=4)
+        release = Event()
+        other_done = Event()
+        done = []
+
+        def task(chat, n):
+            if (chat, n) == ("a", 0):
+                release.wait(5)  # The first task of chat "a" is slow
+            done.append((chat, n))
+            if chat == "b":
+                other_done.set()
+
+        for n in range(5):
+            dispatcher.submit("a", task, "a", n)
+        dispatcher.submit("b", task, "b", 0)
+        self.assertTrue(other_done.wait(2))  # Chat "b" doesn't wait for chat "a"
+        self.assertEqual(done, [("b", 0)])
+        release.set()
+        self.assertTrue(dispatcher.join(5))
+        self.assertEqual([n for chat, n in done if chat == "a"], [0, 1, 2, 3, 4])
+        dispatcher.stop()
+
+    def test_backpressure(self):
+        dispatcher = Dispatcher(workers=2, max_pending=2)
+        release = Event()
+        dispatcher.submit(1, release.wait, 5)
+        dispatcher.submit(2, release.wait, 5)
+        submitted = Event()
+
+        def submit():
+            dispatcher.submit(3, lambda: None)
+            submitted.set()
+
+        Thread(target=submit, daemon=True).start()
+        self.assertFalse(submitted.wait(0.3))  # The queue is full, so the third task waits
+        release.set()
+        self.assertTrue(submitted.wait(2))
+        self.assertTrue(dispatcher.join(5))
+        self.assertEqual(dispatcher.stats(), {"pending": 0, "active_chats": 0})
+        dispatcher.stop()
+
+    def test_async_chat_order(self):
+        dispatcher = AsyncDispatcher(concurrency=10)
+        done = []
+
+        async def task(chat, n, delay):
+            await asyncio.sleep(delay)
+            done.append((chat, n))
+
+        async def run():
+            for n in range(3):
+                await dispatcher.submit("a", task, "a", n, 0.05 if n == 0 else 0)
+            await dispatcher.submit("b", task, "b", 0, 0)
+            await dispatcher.join()
+
+        asyncio.run(run())
+        self.assertEqual(done[0], ("b", 0))
+        self.assertEqual(done[1:], [("a", 0), ("a", 1), ("a", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Telegram Updates Bot - Encoding Tests
+-------------------------------------
+Check the JSON bodies of the requests and the cached reply_markup of the inline keyboards.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import unittest
+from json import loads
+
+from TelegramAPI import RawJSON, InlineKeyboardInput, encode_params
+
+
+# --- Main Code ---
+class EncodingTest(unittest.TestCase):
+    def test_raw_json(self):
+        markup = RawJSON('{"inline_keyboard":[[{"text":"Ok","callback_data":"main|ok"}]]}')
+        body = encode_params({"chat_id": 1, "text": "Hi \"there\"", "reply_markup": markup})
+        self.assertIn(f'"reply_markup":{markup}', body)  # Added as it is, not as a JSON string
+        self.assertEqual(loads(body), {"chat_id": 1, "text": "Hi \"there\"",
+                                       "reply_markup": {"inline_keyboard": [[{"text": "Ok", "callback_data": "main|ok"}]]}})
+        self.assertEqual(loads(encode_params({"reply_markup": markup})), {"reply_markup": loads(markup)})  # Only raw values
+        self.assertEqual(encode_params({"text": "é"}), '{"text":"é"}')
+
+    def test_markup_version(self):
+        keyboard = InlineKeyboardInput("main")
+        keyboard.add_button("Weather Updates", "wu")
+        markup = keyboard.markup()
+        self.assertIsInstance(markup, RawJSON)
+        self.assertIs(keyboard.markup(), markup)  # Made once and reused
+        keyboard.add_button("Daily Quotes", "dq")
+        self.assertIsNot(keyboard.markup(), markup)  # Made again after a button is added
+        self.assertEqual(loads(keyboard.markup()), {"inline_keyboard": [
+            [{"text": "Weather Updates", "callback_data": "main|wu"}],
+            [{"text": "Daily Quotes", "callback_data": "main|dq"}]]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Telegram Updates Bot - Files Tests
+----------------------------------
+Check the atomic writes and the file watcher shared by the stores.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import unittest
+import tempfile
+from threading import Event
+
+from Files import atomic_write, FileWatcher
+
+
+# --- Main Code ---
+class FilesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.folder.name, "data.json")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_atomic_write(self):
+        atomic_write(self.file_name, "old")
+        atomic_write(self.file_name, "new")
+        self.assertEqual(open(self.file_name).read(), "new")
+        self.assertEqual(os.listdir(self.folder.name), ["data.json"])
+
+    def test_failed_write(self):
+        atomic_write(self.file_name, "old")
+        with self.assertRaises(TypeError):
+            atomic_write(self.file_name, None)  # Fails while writing
+        self.assertEqual(open(self.file_name).read(), "old")  # The file isn't changed
+        self.assertEqual(os.listdir(self.folder.name), ["data.json"])
+
+    def test_watcher(self):
+        checks = []
+        called = Event()
+
+        def check():
+            checks.append(1)
+            if len(checks) == 1:
+                raise ValueError("invalid JSON")  # Printed, and the next checks still run
+            called.set()
+
+        watcher = FileWatcher("Test", self.file_name, check, 0.01)
+        watcher.start()
+        watcher.start()  # Only one thread
+        self.assertTrue(called.wait(2))
+        watcher.stop()
+        self.assertFalse(watcher.running)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Telegram Updates Bot - HTTP Client Tests
+----------------------------------------
+Check the retries, the backoff and the circuit breaker of the HTTP client using a fake session and a fake clock.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import unittest
+from unittest import mock
+
+from requests.exceptions import ConnectionError
+
+from HttpClient import HttpClient, CircuitBreaker
+
+
+# --- Main Code ---
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, text=None):
+        self.status_code = status_code
+        self.reason = "Error" if status_code >= 400 else "OK"
+        self.body = body
+        self.text = text
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("Expecting value")
+        return self.body
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)  # The responses to return (or exceptions to raise)
+        self.requests = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.requests += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class HttpClientTest(unittest.TestCase):
+    def make_client(self, responses, **kwargs):
+        client = HttpClient("test", "http://api.test", backoff=1, **kwargs)
+        client._session = FakeSession(responses)
+        return client
+
+    def get(self, client):
+        with mock.patch("HttpClient.time.sleep") as sleep:
+            result = client.get("/data")
+        return result, [c.args[0] for c in sleep.call_args_list]
+
+    def test_retry(self):
+        client = self.make_client([ConnectionError("refused"), FakeResponse(503), FakeResponse(body={"a": 1})])
+        result, delays = self.get(client)
+        self.assertTrue(result.ok)
+        self.assertEqual((result.value, result.attempts), ({"a": 1}, 3))
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0.5 <= delays[0] <= 1)  # Half of the delay is random
+        self.assertTrue(1 <= delays[1] <= 2)  # The delay doubles after each retry
+        self.assertEqual(client.stats(), {"requests": 3, "successes": 1, "failures": 0, "retries": 2, "rejected": 0,
+                                          "circuit": "closed"})
+
+    def test_retry_limit(self):
+        client = self.make_client([FakeResponse(500)] * 3, max_retries=2)
+        result, delays = self.get(client)
+        self.assertFalse(result.ok)
+        self.assertEqual((result.status, result.attempts), (500, 3))
+        self.assertEqual(client.breaker.failures, 1)
+
+    def test_not_retried(self):
+        client = self.make_client([FakeResponse(404)])
+        result, delays = self.get(client)
+        self.assertEqual((result.ok, result.status, result.attempts, delays), (False, 404, 1, []))
+        self.assertEqual(client.breaker.failures, 0)  # The API answered, so it isn't broken
+
+    def test_invalid_body(self):
+        client = self.make_client([FakeResponse(200)])
+        result, delays = self.get(client)
+        self.assertEqual((result.ok, result.attempts), (False, 1))
+        self.assertTrue(result.error.startswith("Invalid response"))
+        self.assertEqual(client.breaker.failures, 1)  # A 200 with a broken body counts as a failure
+
+    def test_circuit_open(self):
+        client = self.make_client([FakeResponse(500)] * 2, max_retries=0, failure_threshold=2)
+        self.get(client)
+        self.get(client)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+        result, delays = self.get(client)  # Rejected without sending a request
+        self.assertEqual((result.ok, result.error), (False, "circuit open"))
+        self.assertEqual(client._session.requests, 2)
+        self.assertEqual(client.stats()["rejected"], 1)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=self.clock)
+
+    def open(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_closed(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()  # Only consecutive failures open the circuit
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open(self):
+        self.open()
+        self.clock.now += 59
+        self.assertFalse(self.breaker.allow())
+        self.clock.now += 1
+        self.assertTrue(self.breaker.allow())  # A single test request
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_failure(self):
+        self.open()
+        self.clock.now += 60
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()  # The test request failed, so it waits again
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now += 30
+        self.assertFalse(self.breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
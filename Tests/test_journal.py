@@ -0,0 +1,102 @@
+"""
+Telegram Updates Bot - Journal Tests
+------------------------------------
+Check that the deliveries recorded in the journal are sent once, even after a crash, and that compacting the file keeps the unfinished ones.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import time
+import unittest
+import tempfile
+from json import loads
+from concurrent.futures import Future
+
+import APIs
+from Journal import Journal, delivery_key
+
+
+# --- Main Code ---
+DATE = "2026-10-18"
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, message, parse_mode=None, priority=None, wait=True):
+        self.sent.append((chat_id, message))
+        future = Future()
+        future.set_result({"ok": True, "result": {}})
+        return future
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.folder.name, "deliveries.journal")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_replay_after_crash(self):
+        journal = Journal(self.file_name)
+        now = time.time()
+        self.assertEqual(journal.plan("dq", "Quote", [1, 2, 3], now, DATE), [1, 2, 3])
+        journal.mark("dq", 1, DATE, now, "sent")  # The process stops here, before sending to 2 and 3
+
+        bot = FakeBot()
+        old = dict(APIs.BOT)
+        APIs.BOT["journal"] = Journal(self.file_name)  # After the restart
+        try:
+            APIs.replay_journal(bot)
+        finally:
+            APIs.BOT.update(old)
+        self.assertEqual(sorted(bot.sent), [(2, "Quote"), (3, "Quote")])
+
+        journal = Journal(self.file_name)  # Everything was sent, so nothing is sent again
+        self.assertEqual(journal.unfinished(3600), [])
+        self.assertEqual(journal.plan("dq", "Quote", [1, 2, 3], now, DATE), [])
+
+    def test_done_keys(self):
+        journal = Journal(self.file_name)
+        now = time.time()
+        journal.plan("dq", "Quote", [1, 2], now, DATE)
+        self.assertEqual(journal.plan("dq", "Quote", [1, 2, 3], now, DATE), [3])  # 1 and 2 are being sent
+        for chat_id in (1, 2, 3):
+            journal.mark("dq", chat_id, DATE, now, "sent")
+        self.assertEqual(journal.plan("dq", "Quote", [1, 2, 3], now, DATE), [])
+        self.assertEqual(journal.plan("dq", "Quote", [1], now, "2026-10-19"), [1])  # Another day
+        self.assertEqual(journal.plan("wu", "Weather", [1], now, DATE), [1])  # Another update
+        self.assertIn(delivery_key("dq", 1, DATE), journal.done)
+
+    def test_too_old(self):
+        journal = Journal(self.file_name)
+        journal.plan("dq", "Quote", [1, 2], time.time() - 7200, DATE)
+        journal.close()
+        journal = Journal(self.file_name)
+        self.assertEqual(journal.unfinished(3600), [])  # Dropped as it's too late to send it
+        self.assertEqual(journal.batches, {})
+        self.assertEqual(Journal(self.file_name).unfinished(10 ** 6), [])  # The drop was recorded too
+
+    def test_compact(self):
+        journal = Journal(self.file_name, retention=3600)
+        now = time.time()
+        journal.plan("nf", "Fact", [1], now - 7200, DATE)
+        journal.mark("nf", 1, DATE, now - 7200, "sent")  # Older than the retention, so its key is forgotten
+        journal.plan("dq", "Quote", [1, 2, 3], now, DATE)
+        journal.mark("dq", 1, DATE, now, "sent")
+        journal.compact()
+        with open(self.file_name, "r") as file:
+            records = [loads(line) for line in file]
+        self.assertEqual([(r["o"], r.get("c", r.get("k"))) for r in records],
+                         [("p", [2, 3]), ("s", delivery_key("dq", 1, DATE))])
+        journal.close()
+        self.assertEqual(Journal(self.file_name).unfinished(3600), [("dq", "Quote", [2, 3], now, DATE)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Telegram Updates Bot - Metrics Tests
+------------------------------------
+Check the Prometheus output of the metrics.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import unittest
+
+from Cache import TTLCache
+from HttpClient import HttpClient
+from Metrics import Metrics
+
+
+# --- Main Code ---
+class MetricsTest(unittest.TestCase):
+    def test_mixed_label_types(self):
+        metrics = Metrics(enabled=True)
+        metrics.inc("telegram_api_requests_total", method="sendMessage", status="ok")
+        metrics.inc("telegram_api_requests_total", method="sendMessage", status=429)
+        metrics.inc("upstream_requests_total", provider="wu", status=None)
+        metrics.inc("upstream_requests_total", provider="wu", status=503)
+        metrics.observe("telegram_api_seconds", 0.2, method="sendMessage", status=400)
+        metrics.observe("telegram_api_seconds", 0.1, method="sendMessage", status="ok")
+        output = metrics.render()
+        self.assertIn('telegram_api_requests_total{method="sendMessage",status="429"} 1', output)
+        self.assertIn('telegram_api_requests_total{method="sendMessage",status="ok"} 1', output)
+        self.assertIn('upstream_requests_total{provider="wu",status="None"} 1', output)
+        self.assertIn('telegram_api_seconds_count{method="sendMessage",status="400"} 1', output)
+
+    def test_same_value_same_series(self):
+        metrics = Metrics(enabled=True)
+        metrics.inc("handler_errors_total", code=500)
+        metrics.inc("handler_errors_total", code="500")
+        self.assertIn('handler_errors_total{code="500"} 2', metrics.render())
+
+    def test_histogram(self):
+        metrics = Metrics(enabled=True, buckets=(0.1, 1))
+        metrics.observe("handler_seconds", 0.05, handler="help")
+        metrics.observe("handler_seconds", 5, handler="help")
+        output = metrics.render()
+        self.assertIn('handler_seconds_bucket{handler="help",le="0.1"} 1', output)
+        self.assertIn('handler_seconds_bucket{handler="help",le="+Inf"} 2', output)
+        self.assertIn('handler_seconds_count{handler="help"} 2', output)
+
+    def test_disabled(self):
+        metrics = Metrics()
+        metrics.inc("handler_errors_total")
+        self.assertEqual(metrics.render(), "\n")
+
+    def test_collectors(self):
+        metrics = Metrics(enabled=True)
+        cache = TTLCache(60)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        client = HttpClient("quotes", "http://api.test")
+
+        def broken():
+            raise RuntimeError("broken")
+
+        metrics.add_collector(lambda: cache.collect_metrics("payloads"))
+        metrics.add_collector(client.collect_metrics)
+        metrics.add_collector(broken)  # It doesn't stop the other values from being shown
+        output = metrics.render()
+        self.assertIn("# TYPE cache_entries gauge", output)
+        self.assertIn('cache_entries{cache="payloads"} 1', output)
+        self.assertIn('cache_requests_total{cache="payloads",result="hit"} 1', output)
+        self.assertIn('cache_requests_total{cache="payloads",result="miss"} 1', output)
+        self.assertIn('upstream_circuit_state{provider="quotes",state="closed"} 1', output)
+        self.assertIn('upstream_circuit_state{provider="quotes",state="open"} 0', output)
+
+
+if __name__ == "__main__":
+    unittest.main()
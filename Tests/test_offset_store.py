@@ -0,0 +1,61 @@
+"""
+Telegram Updates Bot - Offset Store Tests
+-----------------------------------------
+Check when the offset is written to the disk.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import time
+import unittest
+import tempfile
+
+from OffsetStore import FileOffsetStore, SQLiteOffsetStore
+
+
+# --- Main Code ---
+class OffsetStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.folder.name, "update_id.txt")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def read(self):
+        return FileOffsetStore(self.file_name).get()
+
+    def test_lazy_read(self):
+        store = FileOffsetStore(self.file_name)
+        self.assertEqual(store.get(), 0)
+        store.set(5)
+        self.assertEqual(FileOffsetStore(self.file_name).get(), 5)
+
+    def test_delayed_write(self):
+        store = FileOffsetStore(self.file_name, sync_interval=0.2)
+        store.set(1)  # The first change is written at once
+        store.set(2)
+        self.assertEqual(self.read(), 1)
+        time.sleep(0.4)  # The timer writes it even without another update
+        self.assertEqual(self.read(), 2)
+
+    def test_flush(self):
+        store = FileOffsetStore(self.file_name, sync_interval=60)
+        store.set(1)
+        store.set(2)
+        store.flush()
+        self.assertEqual(self.read(), 2)
+
+    def test_sqlite(self):
+        file_name = os.path.join(self.folder.name, "bot.db")
+        store = SQLiteOffsetStore(file_name, sync_interval=0)
+        store.set(7)
+        self.assertEqual(SQLiteOffsetStore(file_name).get(), 7)
+        self.assertEqual(SQLiteOffsetStore(file_name, name="other").get(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Telegram Updates Bot - Outbound Queue Tests
+-------------------------------------------
+Check the rate limits, the retries and the priorities of the outbound queue using a fake clock (no sender threads are started).
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import unittest
+
+from Metrics import Metrics
+from TelegramAPI import OutboundQueue, PRIORITY_BULK, PRIORITY_INTERACTIVE
+
+
+# --- Main Code ---
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class OutboundQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.responses = []  # The responses returned by the fake send function (or exceptions to raise)
+        self.sent = []
+
+    def send(self, method, params):
+        self.sent.append((method, params))
+        response = self.responses.pop(0) if len(self.responses) > 0 else {"ok": True, "result": {}}
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def make_queue(self, **kwargs):
+        return OutboundQueue(self.send, senders=0, clock=self.clock, **kwargs)
+
+    @staticmethod
+    def submit(queue, chat_id, priority=PRIORITY_INTERACTIVE):
+        return queue.submit("sendMessage", {"chat_id": chat_id, "text": "hi"}, chat_id, priority)
+
+    def test_global_rate(self):
+        queue = self.make_queue(global_rate=2, chat_rate=100, chat_burst=100)
+        for chat_id in range(4):
+            self.submit(queue, chat_id)
+        self.assertEqual(queue._next_request()[0].chat_id, 0)
+        self.assertEqual(queue._next_request()[0].chat_id, 1)
+        request, wait = queue._next_request()  # The burst is used up
+        self.assertIsNone(request)
+        self.assertAlmostEqual(wait, 0.5)
+        self.clock.now += 0.5
+        self.assertEqual(queue._next_request()[0].chat_id, 2)
+
+    def test_chat_rate(self):
+        queue = self.make_queue(global_rate=100, chat_rate=1, chat_burst=1)
+        self.submit(queue, 1)
+        self.submit(queue, 1)
+        self.submit(queue, 2)
+        self.assertEqual(queue._next_request()[0].chat_id, 1)
+        self.assertEqual(queue._next_request()[0].chat_id, 2)  # The other message of chat 1 must wait
+        request, wait = queue._next_request()
+        self.assertIsNone(request)
+        self.assertAlmostEqual(wait, 1)
+        self.clock.now += 1
+        self.assertEqual(queue._next_request()[0].chat_id, 1)
+
+    def test_retry_after(self):
+        queue = self.make_queue()
+        future = self.submit(queue, 1)
+        self.responses.append({"ok": False, "error_code": 429, "parameters": {"retry_after": 5}})
+        queue._send(queue._next_request()[0])
+        self.assertFalse(future.done())
+        self.assertEqual(queue.rate_limited, 1)
+        self.submit(queue, 1)
+        request, wait = queue._next_request()  # The chat is paused, so its other messages wait too
+        self.assertIsNone(request)
+        self.assertAlmostEqual(wait, 5)
+        self.clock.now += 5
+        queue._send(queue._next_request()[0])
+        self.assertEqual(future.result(0), {"ok": True, "result": {}})
+        self.assertEqual(len(self.sent), 2)
+
+    def test_retry_limit(self):
+        queue = self.make_queue(max_retries=2)
+        future = self.submit(queue, 1)
+        self.responses.extend([ConnectionError("down")] * 3)
+        for _ in range(3):
+            request, wait = queue._next_request()
+            if request is None:  # Waiting for the backoff
+                self.clock.now += wait
+                request, wait = queue._next_request()
+            queue._send(request)
+        self.assertEqual(future.result(0), {"ok": False, "description": "down"})
+        self.assertEqual((queue.retries, queue.failed, len(self.sent)), (2, 1, 3))
+        self.assertEqual(queue._next_request(), (None, None))  # Nothing is left in the queue
+
+    def test_priority(self):
+        queue = self.make_queue()
+        self.submit(queue, 1, PRIORITY_BULK)
+        self.submit(queue, 2, PRIORITY_BULK)
+        self.submit(queue, 3, PRIORITY_INTERACTIVE)
+        self.assertEqual([queue._next_request()[0].chat_id for _ in range(3)], [3, 1, 2])
+
+    def test_metrics(self):
+        queue = self.make_queue()
+        self.submit(queue, 1, PRIORITY_BULK)
+        self.submit(queue, 2)
+        queue._send(queue._next_request()[0])
+        metrics = Metrics(enabled=True)
+        metrics.add_collector(queue.collect_metrics)
+        output = metrics.render()
+        self.assertIn("# TYPE outbound_queue_depth gauge", output)
+        self.assertIn('outbound_queue_depth{priority="bulk"} 1', output)
+        self.assertIn('outbound_queue_depth{priority="interactive"} 0', output)
+        self.assertIn('outbound_messages_total{outcome="sent"} 1', output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Telegram Updates Bot - Polling Tests
+------------------------------------
+Run the bot against the fake Telegram Bot API server (see the Benchmarks folder) and check the updates it handles.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import time
+import unittest
+import tempfile
+from threading import Thread
+
+from Benchmarks.FakeServer import FakeServer
+from OffsetStore import FileOffsetStore
+from TelegramAPI import TelegramBot, InlineKeyboardInput, callback_data
+
+
+# --- Main Code ---
+class PollingTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.server.start()
+        self.folder = tempfile.TemporaryDirectory()
+        self.offset_store = FileOffsetStore(os.path.join(self.folder.name, "update_id.txt"), sync_interval=0)
+        self.bot = TelegramBot("test", offset_store=self.offset_store, api_url=f"{self.server.url}/bot")
+
+        @self.bot.on_command("ping")
+        def ping(**data):
+            self.bot.send_message(data["message"]["chat"]["id"], "pong")
+
+    def tearDown(self):
+        self.server.stop()
+        self.folder.cleanup()
+
+    def test_backlog_is_handled(self):
+        # The updates received while the bot was stopped are handled when it starts
+        for i in range(3):
+            self.server.push_message(1, "/ping")
+        Thread(target=self.bot.start_polling, kwargs={"timeout": 1}, daemon=True).start()
+        self.assertTrue(self.server.wait_for("sendMessage", 3, timeout=10))
+
+    def test_saved_offset(self):
+        for i in range(3):
+            self.server.push_message(1, "/ping")
+        self.offset_store.set(self.server.updates[1]["update_id"])  # The first update was handled before the bot stopped
+        Thread(target=self.bot.start_polling, kwargs={"timeout": 1}, daemon=True).start()
+        self.assertTrue(self.server.wait_for("sendMessage", 2, timeout=10))
+        time.sleep(0.2)
+        self.assertEqual(self.server.counts.get("sendMessage:ok"), 2)
+
+    def test_callbacks(self):
+        pressed = []
+
+        @self.bot.on_callback("menu")
+        def menu(**data):
+            pressed.append(("menu", data["input_data"]))
+            self.bot.answer_callback_query(data["callback_query_id"])
+
+        def keyboard_action(**data):
+            pressed.append(("keyboard", data["input_data"]))
+            self.bot.answer_callback_query(data["callback_query_id"])
+
+        keyboard = InlineKeyboardInput("keyboard")
+        keyboard.add_button("New York", callback_data("city", "New_York"))
+        keyboard.set_action_function(keyboard_action)
+        self.bot.send_inline_keyboard_input(1, "Choose", keyboard)  # Its buttons are routed to its action function
+        self.assertEqual(keyboard.buttons[0][0]["callback_data"], "keyboard|city|New_York")
+
+        Thread(target=self.bot.start_polling, kwargs={"timeout": 1}, daemon=True).start()
+        self.server.push_callback_query(1, 1, "menu|ct|wu")
+        self.server.push_callback_query(1, 1, "keyboard|city|New_York")
+        self.server.push_callback_query(1, 1, "unknown|x")  # Answered by the bot itself
+        self.server.push_callback_query(1, 1, "menu_ct_dq")  # A button of a message sent by an older version
+        self.assertTrue(self.server.wait_for("answerCallbackQuery", 4, timeout=10))
+        self.assertEqual(pressed, [("menu", "ct|wu"), ("keyboard", "city|New_York"), ("menu", "ct|dq")])
+
+
+if __name__ == "__main__":
+    unittest.main()
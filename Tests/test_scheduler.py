@@ -0,0 +1,89 @@
+"""
+Telegram Updates Bot - Scheduler Tests
+--------------------------------------
+Check the fire times of the jobs and that they are re-armed correctly.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import unittest
+from calendar import timegm
+from datetime import datetime
+
+from Scheduler import Scheduler
+
+
+# --- Main Code ---
+def utc(*args):
+    return timegm(datetime(*args).timetuple())
+
+
+def callback(key, fire_time):
+    pass
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = Scheduler("Asia/Kolkata", grace_period=60)
+
+    def armed_fire_time(self, key):
+        job = self.scheduler.jobs[key]
+        return min(entry[0] for entry in self.scheduler._heap if entry[2] == key and entry[3] == job.generation)
+
+    def test_next_fire_time(self):
+        self.scheduler.set_job("a", "06:00:00", callback)
+        job = self.scheduler.jobs["a"]
+        now = utc(2026, 1, 1, 0, 0)  # 05:30 in Kolkata
+        self.assertEqual(self.scheduler.next_fire_time(job, now), utc(2026, 1, 1, 0, 30))
+        job.last_fire = utc(2026, 1, 1, 0, 30)
+        self.assertEqual(self.scheduler.next_fire_time(job, now + 3600), utc(2026, 1, 2, 0, 30))
+
+    def test_utc_job(self):
+        self.scheduler.set_job("a", "06:00:00", callback, timezone="UTC")
+        job = self.scheduler.jobs["a"]
+        self.assertEqual(self.scheduler.next_fire_time(job, utc(2026, 1, 1, 7, 0)), utc(2026, 1, 2, 6, 0))
+
+    def test_lead(self):
+        self.scheduler.set_job("a", "06:00:00", callback, lead=30)
+        job = self.scheduler.jobs["a"]
+        self.assertEqual(self.scheduler.next_fire_time(job, utc(2026, 1, 1, 0, 0)), utc(2026, 1, 1, 0, 29, 30))
+
+    def test_dst(self):
+        self.scheduler.set_job("a", "02:30:00", callback, timezone="America/New_York")
+        job = self.scheduler.jobs["a"]
+        self.assertEqual(self.scheduler.next_fire_time(job, utc(2026, 3, 8, 5, 0)), utc(2026, 3, 8, 7, 30))
+        job.last_fire = utc(2026, 3, 8, 7, 30)
+        self.assertEqual(self.scheduler.next_fire_time(job, utc(2026, 3, 8, 8, 0)), utc(2026, 3, 9, 6, 30))
+
+    def test_rearm(self):
+        self.scheduler.set_job("a", "06:00:00", callback)
+        first = self.armed_fire_time("a")
+        self.scheduler.jobs["a"].last_fire = 1
+        self.scheduler.set_job("a", "07:00:00", callback)
+        self.assertEqual(self.armed_fire_time("a") - first, 3600)
+        self.assertEqual(self.scheduler.jobs["a"].last_fire, 1)
+        self.assertEqual(self.scheduler.jobs["a"].time, (7, 0, 0))
+
+    def test_failed_job_is_not_registered(self):
+        with self.assertRaises(Exception):
+            self.scheduler.set_job("a", "06:00:00", callback, timezone="Mars/Olympus")
+        self.assertNotIn("a", self.scheduler.jobs)
+
+    def test_failed_rearm_keeps_old_job(self):
+        self.scheduler.set_job("a", "06:00:00", callback, timezone="UTC")
+        first = self.armed_fire_time("a")
+        with self.assertRaises(Exception):
+            self.scheduler.set_job("a", "07:00:00", callback, timezone="Mars/Olympus")
+        self.assertEqual(self.scheduler.jobs["a"].timezone, "UTC")
+        self.assertEqual(self.armed_fire_time("a"), first)
+
+    def test_remove_job(self):
+        self.scheduler.set_job("a", "06:00:00", callback)
+        self.scheduler.remove_job("a")
+        self.assertNotIn("a", self.scheduler.jobs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Telegram Updates Bot - Settings Tests
+-------------------------------------
+Check the copy-on-write snapshots, the listeners and the reloads of the settings store.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import unittest
+import tempfile
+from json import dumps
+
+from Settings import SettingsStore
+
+
+# --- Main Code ---
+UPDATES = [{"id": "wu", "name": "Weather Updates", "settings": {"time": "21:30:00", "city": "Pune"}},
+           {"id": "dq", "name": "Daily Quotes", "settings": {"time": "06:00:00"}}]
+
+
+class SettingsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.folder.name, "updates.json")
+        self.write(UPDATES)
+        self.store = SettingsStore(self.file_name)
+        self.changes = []
+        self.store.add_listener(lambda changed, settings: self.changes.append(changed))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, updates):
+        with open(self.file_name, "w") as file:
+            file.write(dumps(updates))
+
+    def test_snapshot(self):
+        snapshot = self.store.get()
+        self.store.update("wu", "city", "Mumbai")
+        self.assertEqual(snapshot["wu"]["settings"]["city"], "Pune")  # A reader's copy is never changed
+        self.assertEqual(self.store.get()["wu"]["settings"]["city"], "Mumbai")
+        self.assertEqual(SettingsStore(self.file_name).get()["wu"]["settings"]["city"], "Mumbai")  # Saved
+
+    def test_listeners(self):
+        self.store.get()
+        self.changes.clear()
+        self.store.update("dq", "time", "07:00:00")
+        self.assertEqual(self.changes, [{"dq"}])
+        self.store.update("dq", "time", "07:00:00")  # Nothing changed
+        self.assertEqual(self.changes, [{"dq"}])
+        self.write(UPDATES[:1] + [{"id": "nf", "name": "Number Facts", "settings": {"time": "20:55:00"}}])
+        self.store.reload(force=True)
+        self.assertEqual(self.changes[-1], {"dq", "nf"})  # Removed and added updates
+
+    def test_reload_unchanged(self):
+        self.store.get()
+        mtime = os.stat(self.file_name).st_mtime_ns
+        self.assertFalse(self.store.reload())
+        self.write(UPDATES[1:])
+        os.utime(self.file_name, ns=(mtime, mtime))  # Changed, but with the same modification time
+        self.assertFalse(self.store.reload())
+        self.assertIn("wu", self.store.get())  # The file wasn't read again
+        self.assertEqual(len(self.changes), 1)  # Only the first read
+        os.utime(self.file_name, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+        self.assertTrue(self.store.reload())
+        self.assertNotIn("wu", self.store.get())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Telegram Updates Bot - State Store Tests
+----------------------------------------
+Check the expiry, the eviction order and the SQLite backend of the state stores.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import unittest
+import tempfile
+from unittest import mock
+
+from StateStore import StateStore, SQLiteStateBackend
+
+
+# --- Main Code ---
+class StateStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("StateStore.time.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ttl(self):
+        store = StateStore("editing", ttl=60)
+        store[1] = "wu"
+        self.now += 59
+        self.assertEqual(store.get(1), "wu")
+        self.now += 1
+        self.assertNotIn(1, store)
+        self.assertIsNone(store.get(1))
+        with self.assertRaises(KeyError):
+            store[1]
+        self.assertEqual(len(store), 0)  # The expired entry was removed
+
+    def test_lru_eviction(self):
+        store = StateStore("editing", max_size=3)
+        store[1] = "a"
+        store[2] = "b"
+        store[3] = "c"
+        store.get(1)  # Reading an entry makes it the most recently used
+        store[4] = "d"
+        self.assertEqual(list(store._records), [3, 1, 4])
+        self.assertNotIn(2, store)
+        store[3] = "e"  # Changing one too
+        store[5] = "f"
+        self.assertEqual(list(store._records), [4, 3, 5])
+        self.assertEqual(len(store), 3)
+
+    def test_sqlite_backend(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        file_name = os.path.join(folder.name, "state.db")
+        store = StateStore("editing", ttl=60, backend=SQLiteStateBackend(file_name))
+        store[1] = "wu"
+        store[2] = {"step": "time", "update": "dq"}
+        store[3] = "nf"
+        del store[3]
+        other = StateStore("history", backend=store.backend)  # Each store has its own table
+        other[1] = "help"
+
+        store = StateStore("editing", ttl=60, backend=SQLiteStateBackend(file_name))  # After a restart
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store[1], "wu")
+        self.assertEqual(store[2], {"step": "time", "update": "dq"})
+        self.assertNotIn(3, store)
+        self.assertEqual(StateStore("history", backend=store.backend)[1], "help")
+
+        self.now += 60  # The expired entries aren't loaded
+        self.assertEqual(len(StateStore("editing", backend=SQLiteStateBackend(file_name))), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Telegram Updates Bot - Subscriptions Tests
+------------------------------------------
+Check the index of the fire times ((timezone, time) -> chats) when the settings, the timezones and the defaults change.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import os
+import unittest
+import tempfile
+
+from Settings import SettingsStore
+from Subscriptions import SubscriptionStore
+
+
+# --- Main Code ---
+DEFAULTS = {"wu": {"settings": {"time": "21:30:00", "city": "Pune"}}, "dq": {"settings": {"time": "06:00:00"}}}
+
+
+class SubscriptionsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.folder.name, "subscriptions.json")
+        self.store = SubscriptionStore(self.file_name, DEFAULTS, "Asia/Kolkata")
+        self.changed = []
+        self.store.add_listener(self.changed.append)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_subscribe(self):
+        self.store.subscribe(1)
+        self.assertEqual(self.store.due(("Asia/Kolkata", "21:30:00")), [(1, "wu")])
+        self.assertEqual(self.store.due(("Asia/Kolkata", "06:00:00")), [(1, "dq")])
+        self.assertEqual(self.changed[-1], {("Asia/Kolkata", "21:30:00"), ("Asia/Kolkata", "06:00:00")})
+
+    def test_update_timezone(self):
+        self.store.subscribe(1)
+        self.store.set_settings(1, "dq", {"time": "07:00:00", "timezone": "UTC"})
+        self.assertEqual(self.store.due(("Asia/Kolkata", "06:00:00")), [])
+        self.assertEqual(self.store.due(("UTC", "07:00:00")), [(1, "dq")])
+        self.assertEqual(self.store.due(("Asia/Kolkata", "21:30:00")), [(1, "wu")])  # The other update is unchanged
+        self.assertLessEqual({("Asia/Kolkata", "06:00:00"), ("UTC", "07:00:00")}, self.changed[-1])
+        self.assertNotIn(("Asia/Kolkata", "06:00:00"), self.store.index)
+
+    def test_chat_timezone(self):
+        self.store.subscribe(1)
+        self.store.set_settings(1, "dq", {"timezone": "UTC"})
+        self.store.set_timezone(1, "Europe/London")
+        self.assertEqual(self.store.due(("Europe/London", "21:30:00")), [(1, "wu")])
+        self.assertEqual(self.store.due(("UTC", "06:00:00")), [(1, "dq")])  # The timezone of the update is used first
+
+    def test_apply_defaults(self):
+        self.store.subscribe(1)
+        self.store.set_setting(1, "wu", "time", "20:00:00")
+        self.store.subscribe(2)
+        self.store.apply_defaults({"dq"}, {"wu": DEFAULTS["wu"], "dq": {"settings": {"time": "05:00:00"}}})
+        self.assertEqual(sorted(self.store.due(("Asia/Kolkata", "05:00:00"))), [(1, "dq"), (2, "dq")])
+        self.assertEqual(self.store.due(("Asia/Kolkata", "20:00:00")), [(1, "wu")])
+        self.assertEqual(self.store.due(("Asia/Kolkata", "21:30:00")), [(2, "wu")])
+
+    def test_unsubscribe(self):
+        self.store.subscribe(1)
+        self.store.unsubscribe(1)
+        self.assertEqual(self.store.index, {})
+
+    def test_load(self):
+        self.store.subscribe(1)
+        self.store.set_settings(1, "dq", {"timezone": "UTC"})
+        store = SubscriptionStore(self.file_name, DEFAULTS, "Asia/Kolkata")
+        store.ensure_loaded()
+        self.assertEqual(store.index, self.store.index)
+
+    def test_settings_listener(self):
+        settings_file = os.path.join(self.folder.name, "updates.json")
+        with open(settings_file, "w") as file:
+            file.write('[{"id": "dq", "name": "Daily Quotes", "settings": {"time": "06:00:00"}}]')
+        settings = SettingsStore(settings_file)
+        store = SubscriptionStore(self.file_name, settings.get, "Asia/Kolkata")
+        locked = []
+
+        def apply_defaults(changed, defaults):
+            locked.append(settings._lock.locked())  # Taking the lock of the subscriptions now mustn't wait for the settings
+            store.apply_defaults(changed, defaults)
+
+        settings.add_listener(apply_defaults)
+        store.subscribe(1)
+        settings.update("dq", "time", "05:00:00")
+        self.assertFalse(any(locked))
+        self.assertEqual(store.due(("Asia/Kolkata", "05:00:00")), [(1, "dq")])
+
+
+if __name__ == "__main__":
+    unittest.main()
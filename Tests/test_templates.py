@@ -0,0 +1,41 @@
+"""
+Telegram Updates Bot - Templates Tests
+--------------------------------------
+Render every registered template through render() using the names of its fields.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import unittest
+
+import main  # Registers the templates of the bot
+from Providers import MODULES, get_provider
+from Templates import TEMPLATES, render
+
+
+# --- Main Code ---
+class TemplatesTest(unittest.TestCase):
+    def setUp(self):
+        for update_id in tuple(MODULES):  # The providers register their own templates
+            get_provider(update_id)
+
+    def test_every_template(self):
+        for template, value in TEMPLATES.items():
+            fields = [part for part in value.parts if not isinstance(part, str)]  # (name, spec, safe)
+            with self.subTest(template=template):
+                message = render(template, **{name: "<b>&</b>" for name, _, _ in fields})
+                for name, _, safe in fields:
+                    self.assertIn("<b>&</b>" if safe else "&lt;b&gt;&amp;&lt;/b&gt;", message)
+                if not any(safe for _, _, safe in fields):
+                    self.assertNotIn("<b>&</b>", message)
+
+    def test_name_field(self):
+        self.assertEqual(render("setting_line", name="City", value="<Pune>"), "<b><u>City</u></b>: <i>&lt;Pune&gt;</i>\n")
+        self.assertIn("Weather", render("chose_update", name="Weather"))
+        self.assertIn("<b>", render("edit_settings", name="Weather", settings="<b>City</b>"))  # "settings" is safe
+
+
+if __name__ == "__main__":
+    unittest.main()
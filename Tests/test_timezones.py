@@ -0,0 +1,57 @@
+"""
+Telegram Updates Bot - Timezones Tests
+--------------------------------------
+Check the conversion of the local times to timestamps in UTC, a fixed offset timezone and on the days the clocks change.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import unittest
+from calendar import timegm
+from datetime import date, datetime
+
+from Timezones import validate_timezone, day_offset, local_timestamp, local_date
+
+
+# --- Main Code ---
+def utc(*args):
+    return timegm(datetime(*args).timetuple())
+
+
+class TimezonesTest(unittest.TestCase):
+    def test_validate(self):
+        self.assertEqual(validate_timezone("utc"), "UTC")
+        self.assertEqual(validate_timezone(" europe/london "), "Europe/London")
+        with self.assertRaises(ValueError):
+            validate_timezone("Mars/Olympus")
+
+    def test_utc(self):
+        self.assertEqual(day_offset("UTC", date(2026, 3, 8)), 0)
+        self.assertEqual(local_timestamp("UTC", date(2026, 3, 8), 2, 30, 0), utc(2026, 3, 8, 2, 30))
+        self.assertEqual(local_date(utc(2026, 3, 8, 23, 59), "UTC"), date(2026, 3, 8))
+
+    def test_fixed_offset(self):
+        self.assertEqual(day_offset("Etc/GMT-5", date(2026, 6, 1)), 5 * 3600)  # The sign of the Etc zones is inverted
+        self.assertEqual(local_timestamp("Etc/GMT-5", date(2026, 6, 1), 9, 0, 0), utc(2026, 6, 1, 4, 0))
+
+    def test_normal_day(self):
+        self.assertEqual(day_offset("Asia/Kolkata", date(2026, 1, 1)), 5.5 * 3600)
+        self.assertEqual(local_timestamp("America/New_York", date(2026, 7, 1), 12, 0, 0), utc(2026, 7, 1, 16, 0))
+
+    def test_spring_forward_gap(self):
+        # On 2026-03-08, 02:00 becomes 03:00 in New York, so 02:30 doesn't exist and is moved to 03:30 (EDT)
+        self.assertIsNone(day_offset("America/New_York", date(2026, 3, 8)))
+        self.assertEqual(local_timestamp("America/New_York", date(2026, 3, 8), 2, 30, 0), utc(2026, 3, 8, 7, 30))
+        self.assertEqual(local_timestamp("America/New_York", date(2026, 3, 8), 12, 0, 0), utc(2026, 3, 8, 16, 0))
+
+    def test_fall_back_overlap(self):
+        # On 2026-11-01, 02:00 becomes 01:00 again in New York, so 01:30 happens twice. The first one (EDT) is used
+        self.assertIsNone(day_offset("America/New_York", date(2026, 11, 1)))
+        self.assertEqual(local_timestamp("America/New_York", date(2026, 11, 1), 1, 30, 0), utc(2026, 11, 1, 5, 30))
+        self.assertEqual(local_timestamp("America/New_York", date(2026, 11, 1), 12, 0, 0), utc(2026, 11, 1, 17, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
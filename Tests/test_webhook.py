@@ -0,0 +1,57 @@
+"""
+Telegram Updates Bot - Webhook Tests
+------------------------------------
+Post requests to a webhook server on a free local port.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import unittest
+from json import dumps
+from http.client import HTTPConnection
+
+from Webhook import WebhookServer
+
+
+# --- Main Code ---
+class WebhookTest(unittest.TestCase):
+    def setUp(self):
+        self.updates = []
+        self.server = WebhookServer("127.0.0.1", 0, "/webhook", "secret", self.updates.append)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def post(self, path, body, headers=None):
+        connection = HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        try:
+            connection.request("POST", path, body, {"X-Telegram-Bot-Api-Secret-Token": "secret", **(headers or {})})
+            return connection.getresponse().status
+        finally:
+            connection.close()
+
+    def test_update(self):
+        update = {"update_id": 1, "message": {"message_id": 1, "text": "/start", "chat": {"id": 5}}}
+        self.assertEqual(self.post("/webhook", dumps(update)), 200)
+        self.assertEqual(self.post("/webhook?source=telegram", dumps(update)), 200)
+        self.assertEqual(self.updates, [update, update])
+
+    def test_wrong_secret(self):
+        self.assertEqual(self.post("/webhook", "{}", {"X-Telegram-Bot-Api-Secret-Token": "wrong"}), 403)
+        self.assertEqual(self.updates, [])
+
+    def test_wrong_path(self):
+        self.assertEqual(self.post("/other", "{}"), 404)
+        self.assertEqual(self.updates, [])
+
+    def test_bad_body(self):
+        self.assertEqual(self.post("/webhook", "not json"), 400)
+        self.assertEqual(self.post("/webhook", "{}", {"Content-Length": "abc"}), 400)
+        self.assertEqual(self.updates, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
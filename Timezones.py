@@ -0,0 +1,92 @@
+"""
+Telegram Updates Bot - Timezones File
+-------------------------------------
+This file contains the code to convert the local times of the updates (in the timezone of each chat) to timestamps.
+The UTC offset of a timezone is found once for each day and cached, so the scheduler only does some arithmetic for most fire times.
+On the days the clocks change (daylight saving time), the times are converted using pytz so that no update is skipped or sent twice:
+1) A time which doesn't exist (the clocks go forward, eg., 02:30 when 02:00 becomes 03:00) is moved forward by the change (03:30)
+2) A time which happens twice (the clocks go back) is used only the first time
+pytz is imported when a timezone is first used, not when this file is imported.
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+from calendar import timegm
+from datetime import datetime, time as day_time, timedelta
+from functools import lru_cache
+
+# --- Main Code ---
+@lru_cache(maxsize=None)
+def get_zone(name: str):
+    """
+    Get a pytz timezone from its name (cached)
+    :param name: The name of the timezone (eg., "Asia/Kolkata")
+    """
+    import pytz
+    return pytz.timezone(name)
+
+
+@lru_cache(maxsize=1)
+def _zone_names():
+    import pytz
+    return {name.lower(): name for name in pytz.all_timezones}
+
+
+def validate_timezone(value):
+    """
+    Check a timezone sent by a user and return its exact name
+    :param value: The name of the timezone in any case (eg., "europe/london")
+    """
+    name = _zone_names().get(str(value).strip().lower())
+    if name is None:
+        raise ValueError(f"Invalid timezone: {value}")
+    return name
+
+
+@lru_cache(maxsize=4096)
+def day_offset(zone_name: str, day):
+    """
+    Get the UTC offset (in seconds) of a timezone on a day, or None if it changes on that day
+    :param zone_name: The name of the timezone
+    :param day: A date object
+    """
+    zone = get_zone(zone_name)
+    # localize() works for every pytz timezone (utcoffset() of UTC and the fixed offset ones has no is_dst)
+    start = zone.localize(datetime.combine(day, day_time()), is_dst=False).utcoffset()
+    end = zone.localize(datetime.combine(day + timedelta(days=1), day_time()), is_dst=False).utcoffset()
+    return start.total_seconds() if start == end else None
+
+
+def local_timestamp(zone_name: str, day, hour: int, minute: int, second: int):
+    """
+    Get the timestamp of a local time
+    :param zone_name: The name of the timezone
+    :param day: A date object
+    :param hour: The hour
+    :param minute: The minute
+    :param second: The second
+    """
+    offset = day_offset(zone_name, day)
+    if offset is not None:
+        return timegm(day.timetuple()) + hour * 3600 + minute * 60 + second - offset
+    import pytz
+    zone = get_zone(zone_name)
+    naive = datetime.combine(day, day_time(hour, minute, second))
+    try:
+        aware = zone.localize(naive, is_dst=None)
+    except pytz.NonExistentTimeError:
+        aware = zone.normalize(zone.localize(naive, is_dst=False))
+    except pytz.AmbiguousTimeError:
+        aware = zone.localize(naive, is_dst=True)
+    return aware.timestamp()
+
+
+def local_date(timestamp: float, zone_name: str):
+    """
+    Get the local date of a timestamp in a timezone
+    :param timestamp: A timestamp
+    :param zone_name: The name of the timezone
+    """
+    return datetime.fromtimestamp(timestamp, get_zone(zone_name)).date()
@@ -0,0 +1,93 @@
+"""
+Telegram Updates Bot - Webhook File
+-----------------------------------
+This file contains a small HTTP server which receives the updates from Telegram (webhook mode) instead of asking for them (polling).
+Telegram sends the secret token in the "X-Telegram-Bot-Api-Secret-Token" header, so requests without it are rejected.
+
+It can be tested locally by posting an update to it:
+curl -X POST -H "X-Telegram-Bot-Api-Secret-Token: <secret>" -d '{"update_id": 1, "message": {...}}' http://localhost:8443/webhook
+
+-----
+Code by: @Sid72020123 on Github
+"""
+
+# --- Imports ---
+import hmac
+from json import loads
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+
+# --- Main Code ---
+MAX_BODY_SIZE = 1024 * 1024  # Telegram's updates are much smaller than this
+
+
+class WebhookServer:
+    def __init__(self, host: str, port: int, path: str, secret_token: str, on_update):
+        """
+        The webhook server class
+        :param host: The host to listen on (eg., "0.0.0.0")
+        :param port: The port to listen on
+        :param path: The path Telegram posts the updates to (eg., "/webhook")
+        :param secret_token: The secret token set using setWebhook (None to accept every request)
+        :param on_update: The function which is called with each update
+        """
+        self.path = path
+        self.secret_token = secret_token
+        self.on_update = on_update
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]  # The actual port (if 0 was given)
+
+    def _make_handler(self):
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if urlsplit(self.path).path != webhook.path:  # Without the query string
+                    return self._reply(404)
+                if webhook.secret_token is not None:
+                    token = self.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+                    if not hmac.compare_digest(token.encode(), webhook.secret_token.encode()):
+                        return self._reply(403)
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                except ValueError:
+                    return self._reply(400)
+                if length <= 0 or length > MAX_BODY_SIZE:
+                    return self._reply(400)
+                try:
+                    update = loads(self.rfile.read(length))
+                except ValueError:
+                    return self._reply(400)
+                try:
+                    webhook.on_update(update)
+                except Exception as E:
+                    print(f"Webhook: Error while handling an update - {E}")
+                    return self._reply(500)
+                self._reply(200)
+
+            def _reply(self, status):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):  # Don't print every request
+                pass
+
+        return Handler
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def start(self):
+        """
+        Start the server in a new thread
+        """
+        thread = Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -2,7 +2,7 @@
 Telegram Updates Bot - Main
 ---------------------------
 A personal Telegram bot to send updates such as daily weather, facts, etc. to the owner at a specified time!
-NOTE: This code will allow only the owner of the bot (i.e., a single person to use it). See the Config file. However, this code can be changed to allow more people to access this bot...
+NOTE: This code will allow only the owner of the bot and the people in the ALLOWED_TELEGRAM_IDS list to use it. See the Config file. Each of them gets the updates at their own time...
 
 Also, a lot of code from the files of this project can be improved and there are many in-built functions to do so.
 -----
@@ -38,15 +38,30 @@ These are the contents of the updates.json file:
 """
 
 # --- Imports ---
-from json import loads, dumps
+from functools import partial
 from threading import Thread
-
-from Config import BOT_TOKEN, OWNER_TELEGRAM_ID
-from TelegramAPI import TelegramBot, InlineKeyboardInput
-from APIs import schedule_loop, update_settings
+from urllib.parse import urlparse
+
+from Config import BOT_TOKEN, OWNER_TELEGRAM_ID, ALLOWED_TELEGRAM_IDS, WEBHOOK_URL, WEBHOOK_SECRET, WEBHOOK_PORT, \
+    REJECTION_INTERVAL, STATE_FILE, METRICS_PORT, TELEGRAM_API_URL, CLUSTER_WORKERS, CLUSTER_ROLE, CLUSTER_SHARD, \
+    WORK_QUEUE_FILE, LEADER_LEASE_TTL, TELEGRAM_GLOBAL_RATE, JOURNAL_FILE
+from TelegramAPI import TelegramBot, InlineKeyboardInput, OutboundQueue, CALLBACK_SEPARATOR, callback_data
+from StateStore import StateStore, SQLiteStateBackend
+from Cache import TTLCache
+from Templates import register, render
+from Metrics import METRICS, MetricsServer
+from APIs import schedule_loop, worker_loop, subscribe_owner, SUBSCRIPTIONS, SETTINGS, PAYLOADS
+from Cluster import WorkQueue, LeaderLease, start_cluster
+from Journal import Journal
+from Providers import MODULES, get_provider, collect_metrics as collect_provider_metrics
 
 # --- Main Code ---
-bot = TelegramBot(BOT_TOKEN)  # Main bot object
+state_backend = None if STATE_FILE is None else SQLiteStateBackend(STATE_FILE)
+if CLUSTER_ROLE != "":  # Telegram's global limit is shared by the ingest process and the workers
+    bot = TelegramBot(BOT_TOKEN, state_backend=state_backend, api_url=TELEGRAM_API_URL,
+                      outbound=OutboundQueue(global_rate=TELEGRAM_GLOBAL_RATE / (max(CLUSTER_WORKERS, 1) + 1)))
+else:
+    bot = TelegramBot(BOT_TOKEN, state_backend=state_backend, api_url=TELEGRAM_API_URL)  # Main bot object
 
 COMMANDS = {
     "start": "Just sends a start message",
@@ -56,20 +71,56 @@ COMMANDS = {
     "cancel": "Cancel the current operation"
 }  # List of all commands
 
-# A more efficient method would be to create a function for the code below as it's repeated in other parts of the code:
-ALL_UPDATES = loads(open("updates.json", "r").read())  # See the structure of the File above
-UPDATES_IDS = {}
-for update in ALL_UPDATES:
-    UPDATES_IDS[update["id"]] = {"name": update["name"], "settings": update["settings"]}
 
-# Unicode of Emojis used by the bot
-hand_emoji = "\U0001F44B"
-pencil_emoji = "\U0000270F"
-message_emoji = "\U00002709"
-warning_emoji = "\U000026A0"
-question_emoji = "\U00002753"
-success_emoji = "\U00002705"
-cloud_emoji = "\U00002601"
+def update_name(update_id):
+    """
+    Get the name of an update from the current settings (see the structure of the updates.json file above)
+    :param update_id: The ID of the update
+    """
+    return SETTINGS.get()[update_id]["name"]
+
+
+# --- Message Templates ---
+# The emojis (like "{pencil_emoji}") are filled in once and the other fields are HTML escaped when a message is made (see the Templates file)
+CANCEL_NOTE = "\n\n<i>Use the /cancel command to cancel the current operation</i>"
+register("not_allowed",
+         "{warning_emoji} <b>You are not allowed to access this bot!</b>\nThis bot is privately used by {owner}")
+register("start",
+         "{hand_emoji} <b>Hello, <i>{first_name}</i>!</b>\n\nI'm <i>Daily Updates Bot</i>! I send many kinds of updates (or information from the internet) automatically at a specified time!\n\n<i>Use the /help command to see the list of available commands</i>")
+register("help_line", "{number}) <b>/{command}</b>: <i>{description}</i>\n")
+register("help", "{pencil_emoji} <b>List of available commands:</b>\n\n{commands}\n<i>To read the credits, use the /credits command</i>",
+         safe=("commands",))
+register("credits",
+         "{pencil_emoji} <b>Credits:</b>\n\n<b>Bot made by <i>@siddheshdc</i></b>\n\n<i>Use the /help command to see the list of available commands</i>")
+register("operation_cancelled", "{success_emoji} Successfully cancelled the current operation!")
+register("time_format_error",
+         "{warning_emoji} <b>Can't change the time</b>\n\nPlease send the time in required format. Enter the time again!" + CANCEL_NOTE)
+register("time_error",
+         "{warning_emoji} <b>Can't change the time</b>\n\nAn error occurred. Make sure that the time message sent by you is in the required format and then try again!\n\n<i><u>Error Message:</u>\n<blockquote>{error}</blockquote></i>" + CANCEL_NOTE)
+register("time_changed",
+         "{success_emoji} <b>Successfully changed the time!</b>\n\nThe time of <i><u>{name}</u></i> is successfully changed to <i><u>{time}</u></i> (<i>{timezone}</i>)!")
+register("timezone_error",
+         "{warning_emoji} <b>Can't change the time</b>\n\nThe timezone <i>{timezone}</i> doesn't exist. Send a timezone like <i>Europe/London</i> or <i>Asia/Kolkata</i>. Enter the time again!" + CANCEL_NOTE)
+register("city_error",
+         "{warning_emoji} <b>Can't change the city</b>\n\nPlease send a valid city name. Enter the city again!" + CANCEL_NOTE)
+register("city_changed",
+         "{success_emoji} <b>Successfully changed the city!</b>\n\nThe city of <i><u>{name}</u></i> is successfully changed to <i><u>{city}</u></i>!")
+register("edit_updates", "{pencil_emoji} <b>Edit the settings of the updates you receive:</b>\n\nSelect an option:")
+register("chose_update", "{pencil_emoji} You chose to change the settings of <i>{name}</i>...")
+register("ask_time",
+         "{pencil_emoji} <b>Change the time of <i>{name}</i></b>:\n\nEnter the time in 24 hour clock format seperated by a colon(:)\n\n<i><u>Note:</u>\nIf the hour or minute is single digit, prefix it with a zero. \nEg.,\n<blockquote>For 9:30 am use, 09:30</blockquote>\n<blockquote>For 9:30 pm use, 21:30</blockquote>\nThe time is in your timezone (<u>{timezone}</u>). To use another one, send it after the time:\n<blockquote>21:30 Europe/London</blockquote></i>" + CANCEL_NOTE)
+register("ask_city", "{pencil_emoji} <b>Change the city of <i>{name}</i></b>:\n\nSend the name of the city" + CANCEL_NOTE)
+register("setting_line", "<b><u>{name}</u></b>: <i>{value}</i>\n")
+register("edit_settings", "{pencil_emoji} <b>Edit the settings of {name}:</b>\n\n{settings}\nChoose an option:",
+         safe=("settings",))
+register("command_cancelled",
+         "{success_emoji} Successfully cancelled the operation of the previous command '<i>{command}</i>'!")
+register("nothing_to_cancel", "{question_emoji} No ongoing operation found to cancel it...")
+
+# The help message never changes, so it's made only once
+HELP_MESSAGE = render("help", commands="".join(
+    render("help_line", number=i + 1, command=command, description=COMMANDS[command]) for i, command in
+    enumerate(COMMANDS)))
 
 
 # --- Bot Events ---
@@ -93,21 +144,24 @@ def print_new_command_info(**data):
 
 
 # --- Bot Commands ---
-@bot.on_command("<any>")
+rejected_users = TTLCache(REJECTION_INTERVAL, max_size=10000, max_stale=0)
+
+
+@bot.middleware  # Runs before every command
 def check_user(**data):
     sender = data["message"]["from"]
     sender_id = sender["id"]
 
-    if sender_id != OWNER_TELEGRAM_ID:  # Restrict the bot access so that only the owner can use it >:)
+    if sender_id not in ALLOWED_TELEGRAM_IDS:  # Restrict the bot access so that only the owner (and the allowed people) can use it >:)
+        if rejected_users.get(sender_id) is not None:  # Already told recently, so ignore the user
+            return False
+        rejected_users.set(sender_id, True)
         bot_owner_data = bot.get_user_info(OWNER_TELEGRAM_ID)["result"]
         username_exists = True if 'username' in bot_owner_data else False
-        owner_username = f"""{
-        bot_owner_data['first_name']} (username doesn't exist)"""
+        owner_username = f"{bot_owner_data['first_name']} (username doesn't exist)"
         if username_exists:
             owner_username = f"@{bot_owner_data['username']}"
-        bot.send_message(sender_id,
-                         f"""{warning_emoji} <b>You are not allowed to access this bot!</b>\nThis bot is privately used by {
-                         owner_username}""", parse_mode="HTML")
+        bot.send_message(sender_id, render("not_allowed", owner=owner_username), parse_mode="HTML")
         return False  # Disallow Access
     return True  # Allow Access
 
@@ -116,49 +170,52 @@ def check_user(**data):
 def start(**data):
     sender = data["message"]["from"]
     sender_id = sender["id"]
-    bot.send_message(sender_id, f"""{hand_emoji} <b>Hello, <i>{
-    sender['first_name']}</i>!</b>\n\nI'm <i>Daily Updates Bot</i>! I send many kinds of updates (or information from the internet) automatically at a specified time to my owner!\n\n<i>Use the /help command to see the list of available commands</i>""",
-                     parse_mode="HTML")
+    SUBSCRIPTIONS.subscribe(sender_id)  # Send all the updates to the new user at the default times
+    bot.send_message(sender_id, render("start", first_name=sender['first_name']), parse_mode="HTML")
 
 
 @bot.on_command("help")
 def help(**data):
     sender = data["message"]["from"]
     sender_id = sender["id"]
-    string = ""
-    i = 1
-    for command in COMMANDS:
-        string += f"""{i}) <b>/{command}</b>: <i>{COMMANDS[command]}</i>\n"""
-        i += 1
-    bot.send_message(sender_id, f"""{pencil_emoji} <b>List of available commands:</b>\n\n{
-    string}\n<i>To read the credits, use the /credits command</i>""", parse_mode="HTML")
+    bot.send_message(sender_id, HELP_MESSAGE, parse_mode="HTML")
 
 
 @bot.on_command("credits")
 def credits(**data):
     sender = data["message"]["from"]
     sender_id = sender["id"]
-    message = f"""{pencil_emoji} <b>Credits:</b>\n\n<b>Bot made by <i>@siddheshdc</i></b>\n\n<i>Use the /help command to see the list of available commands</i>"""
-    bot.send_message(sender_id, message, parse_mode="HTML")
+    bot.send_message(sender_id, render("credits"), parse_mode="HTML")
 
 
-editing = {}
+editing = StateStore("editing", backend=state_backend)  # The update each user is changing. It's saved so that it continues after a restart
 
 empty_menu = InlineKeyboardInput("empty")
 
-main_menu = InlineKeyboardInput("main")
-main_menu.add_button("Weather Updates", "wu")
-main_menu.add_button("Daily Quotes", "dq")
-main_menu.add_button("Number Facts", "nf")
-main_menu.add_button("< Cancel >", "cancel")
+_main_menu = (None, None)  # (the settings it was made from, the keyboard)
+
+
+def get_main_menu():
+    """
+    Get the keyboard with a button for each update which has a provider. It's made again only when the settings change
+    """
+    global _main_menu
+    settings = SETTINGS.get()
+    if _main_menu[0] is not settings:
+        menu = InlineKeyboardInput("main")
+        for update_id, update in settings.items():
+            if update_id in MODULES:
+                menu.add_button(update["name"], update_id)
+        menu.add_button("< Cancel >", "cancel")
+        _main_menu = (settings, menu)
+    return _main_menu[1]
 
 
 def cancel_keyboard_inputs(sender_id, message_id):
     """
     Edit the contents of the keyboard input of a Telegram message to an empty menu
     """
-    bot.edit_message(sender_id, message_id, f"{success_emoji} Successfully cancelled the current operation!",
-                     parse_mode="HTML")
+    bot.edit_message(sender_id, message_id, render("operation_cancelled"), parse_mode="HTML")
     bot.edit_input_keyboard_input(sender_id, message_id, empty_menu)
 
 
@@ -172,30 +229,50 @@ def ask_time(**data):
     message_text = message_text.strip()
     ui = editing[sender_id]
     try:
-        if len(message_text) != 5 or ":" not in message_text:
-            message = f"""{warning_emoji} <b>Can't change the time</b>\n\nPlease send the time in required format. Enter the time again!\n\n<i>Use the /cancel command to cancel the current operation</i>"""
+        parts = message_text.split(maxsplit=1)  # The time and optionally a timezone, eg., "21:30 Europe/London"
+        try:
+            value = get_provider(ui).validate("time", parts[0] if parts else "")  # The settings are checked by the provider of the update
+        except ValueError:
+            message = render("time_format_error")
             bot.send_message(sender_id, message, parse_mode="HTML")
-        else:
-            t = message_text.split(":")
-            if not (t[0].isdigit() and t[1].isdigit()):
-                message = f"""{warning_emoji} <b>Can't change the time</b>\n\nPlease send the time in required format. Enter the time again!\n\n<i>Use the /cancel command to cancel the current operation</i>"""
-                bot.send_message(sender_id, message, parse_mode="HTML")
-            else:
-                index = 0
-                for u in ALL_UPDATES:
-                    if u["id"] == editing[sender_id]:
-                        index = ALL_UPDATES.index(u)
-                ALL_UPDATES[index]["settings"]["time"] = message_text + ":00"
-                with open("updates.json", "w+") as file:
-                    file.write(dumps(ALL_UPDATES, indent=4))
-                update_settings()
-                message = f"""{success_emoji} <b>Successfully changed the time!</b>\n\nThe time of <i><u>{UPDATES_IDS[ui]["name"]}</u></i> is successfully changed to <i><u>{message_text}</u></i>!"""
+            return None
+        changes = {"time": value}
+        if len(parts) == 2:
+            try:
+                changes["timezone"] = get_provider(ui).validate("timezone", parts[1])
+            except ValueError:
+                message = render("timezone_error", timezone=parts[1])
                 bot.send_message(sender_id, message, parse_mode="HTML")
-                del bot.command_history[
-                    sender_id]  # This is required whenever a function accepts an input to let the API wrapper know that the input work is finished...
+                return None
+        SUBSCRIPTIONS.set_settings(sender_id, ui, changes)  # The time and the timezone are changed together
+        message = render("time_changed", name=update_name(ui), time=parts[0],
+                         timezone=SUBSCRIPTIONS.get_timezone(sender_id, ui))
+        bot.send_message(sender_id, message, parse_mode="HTML")
+        del bot.command_history[
+            sender_id]  # This is required whenever a function accepts an input to let the API wrapper know that the input work is finished...
     except Exception as E:
-        message = f"""{warning_emoji} <b>Can't change the time</b>\n\nAn error occurred. Make sure that the time message sent by you is in the required format and then try again!\n\n<i><u>Error Message:</u>\n<blockquote>{E}</blockquote></i>\n\n<i>Use the /cancel command to cancel the current operation</i>"""
+        message = render("time_error", error=E)
+        bot.send_message(sender_id, message, parse_mode="HTML")
+
+
+def ask_city(**data):
+    """
+    Save the city sent by the user
+    """
+    sender = data["message"]["from"]
+    sender_id = sender["id"]
+    message_text = data["message"]["text"].strip()
+    ui = editing[sender_id]
+    try:
+        message_text = get_provider(ui).validate("city", message_text)
+    except ValueError:
+        message = render("city_error")
+        bot.send_message(sender_id, message, parse_mode="HTML")
+    else:
+        SUBSCRIPTIONS.set_setting(sender_id, ui, "city", message_text)
+        message = render("city_changed", name=update_name(ui), city=message_text)
         bot.send_message(sender_id, message, parse_mode="HTML")
+        del bot.command_history[sender_id]
 
 
 @bot.on_command("_prompt_time", accept_text_message=ask_time)
@@ -203,6 +280,12 @@ def prompt_time(**data):  # This is an empty function just used to accept user t
     ...
 
 
+@bot.on_command("_prompt_city", accept_text_message=ask_city)
+def prompt_city(**data):
+    ...
+
+
+@bot.on_callback("change")
 def change_time(**data):
     callback_query = data["callback_query"]
     callback_query_id = data["callback_query_id"]
@@ -216,26 +299,38 @@ def change_time(**data):
             if sender_id in editing:
                 del editing[sender_id]
         elif input_data == "back":  # When user presses "Go back" button, edit the current keyboard menu with the main menu
-            message = f"{pencil_emoji} <b>Edit the settings of the updates you receive:</b>\n\nSelect an option:"
+            message = render("edit_updates")
             bot.edit_message(sender_id, message_id, message, parse_mode="HTML")
-            bot.edit_input_keyboard_input(sender_id, message_id, main_menu)
+            bot.edit_input_keyboard_input(sender_id, message_id, get_main_menu())
         else:  # If the user has pressed other buttons
-            id = input_data.split("_")
-            if id[0] == "ct":
-                editing[sender_id] = id[1]
+            action, _, update_id = input_data.partition(CALLBACK_SEPARATOR)
+            if action == "ct":
+                editing[sender_id] = update_id
 
-                message = f"""{pencil_emoji} You chose to change the settings of <i>{UPDATES_IDS[id[1]]["name"]}</i>..."""
+                message = render("chose_update", name=update_name(update_id))
                 bot.edit_message(sender_id, message_id, message, parse_mode="HTML")
                 bot.edit_input_keyboard_input(sender_id, message_id, empty_menu)
 
                 ui = editing[sender_id]
-                message = f"""{pencil_emoji} <b>Change the time of <i>{UPDATES_IDS[ui]["name"]}</i></b>:\n\nEnter the time in 24 hour clock format seperated by a colon(:)\n\n<i><u>Note:</u>\nIf the hour or minute is single digit, prefix it with a zero. \nEg.,\n<blockquote>For 9:30 am use, 09:30</blockquote>\n<blockquote>For 9:30 pm use, 21:30</blockquote></i>\n\n<i>Use the /cancel command to cancel the current operation</i>"""
+                message = render("ask_time", name=update_name(ui), timezone=SUBSCRIPTIONS.get_timezone(sender_id, ui))
                 bot.send_message(sender_id, message, parse_mode="HTML")
 
                 bot.command_history[
                     sender_id] = "_prompt_time"  # Set the pseudo command so that the bot will receive the text inputs...
+            elif action == "cc":
+                editing[sender_id] = update_id
+
+                message = render("chose_update", name=update_name(update_id))
+                bot.edit_message(sender_id, message_id, message, parse_mode="HTML")
+                bot.edit_input_keyboard_input(sender_id, message_id, empty_menu)
+
+                message = render("ask_city", name=update_name(update_id))
+                bot.send_message(sender_id, message, parse_mode="HTML")
+
+                bot.command_history[sender_id] = "_prompt_city"
 
 
+@bot.on_callback("main")  # The buttons of the main menu
 def change_settings(**data):
     callback_query = data["callback_query"]
     callback_query_id = data["callback_query_id"]
@@ -246,16 +341,18 @@ def change_settings(**data):
         if input_data == "cancel":
             cancel_keyboard_inputs(sender_id, message_id)
         else:
-            settings_string = ""
-            for setting in UPDATES_IDS[input_data]["settings"]:
-                settings_string += f"<b><u>{setting.title()}</u></b>: <i>{UPDATES_IDS[input_data]['settings'][setting]}</i>\n"
-            message = f"""{pencil_emoji} <b>Edit the settings of {UPDATES_IDS[input_data]["name"]}:</b>\n\n{settings_string}\nChoose an option:"""
+            settings = SUBSCRIPTIONS.get_settings(sender_id, input_data)
+            settings["timezone"] = SUBSCRIPTIONS.get_timezone(sender_id, input_data)  # The one used even if it's not set for this update
+            settings_string = "".join(
+                render("setting_line", name=setting.title(), value=settings[setting]) for setting in settings)
+            message = render("edit_settings", name=update_name(input_data), settings=settings_string)
 
             change_menu = InlineKeyboardInput("change")
-            change_menu.add_button("Change Time", f"ct_{input_data}")
+            change_menu.add_button("Change Time", callback_data("ct", input_data))
+            if "city" in get_provider(input_data).schema:
+                change_menu.add_button("Change City", callback_data("cc", input_data))
             change_menu.add_button("< Go Back >", "back")
             change_menu.add_button("< Cancel >", "cancel")
-            change_menu.set_action_function(change_time)
 
             bot.edit_message(sender_id, message_id, message, parse_mode="HTML")
             bot.edit_input_keyboard_input(sender_id, message_id, change_menu)
@@ -263,16 +360,13 @@ def change_settings(**data):
         pass
 
 
-main_menu.set_action_function(change_settings)  # This is required for the main menu to work properly
-
-
 @bot.on_command("edit_updates")
 def edit_updates(**data):
     sender = data["message"]["from"]
     sender_id = sender["id"]
-    message = f"{pencil_emoji} <b>Edit the settings of the updates you receive:</b>\n\nSelect an option:"
+    message = render("edit_updates")
     bot.send_inline_keyboard_input(
-        sender_id, message, main_menu, parse_mode="HTML")
+        sender_id, message, get_main_menu(), parse_mode="HTML")
 
 
 @bot.on_command("cancel")
@@ -283,18 +377,44 @@ def cancel(**data):
     if sender_id in bot.command_history:
         del bot.command_history[
             sender_id]  # This stops the custom API wrapper from further accepting text inputs from the user
-        message = f"{success_emoji} Successfully cancelled the operation of the previous command '<i>{bot.previous_command[sender_id]}</i>'!"
+        message = render("command_cancelled", command=bot.previous_command.get(sender_id, ""))
     else:
-        message = f"""{question_emoji} No ongoing operation found to cancel it..."""
+        message = render("nothing_to_cancel")
     bot.send_message(sender_id, message, parse_mode="HTML")
 
 
 def main():
     """
-    The main function to start all the essential threads and the polling loop of the bot
+    The main function to start all the essential threads and the polling loop of the bot.
+    If CLUSTER_WORKERS is set, it starts the processes of the cluster instead (see the Cluster file)
     """
-    Thread(target=schedule_loop, args=(bot, OWNER_TELEGRAM_ID,)).start()
-    bot.start_polling()
+    if CLUSTER_WORKERS > 0 and CLUSTER_ROLE == "":
+        start_cluster(__file__, CLUSTER_WORKERS, METRICS_PORT)
+        return None
+    if METRICS_PORT != 0:
+        METRICS.enable()
+        METRICS.add_collector(bot.outbound.collect_metrics)
+        METRICS.add_collector(collect_provider_metrics)
+        METRICS.add_collector(partial(PAYLOADS.collect_metrics, "payloads"))
+        METRICS.add_collector(partial(bot.user_info_cache.collect_metrics, "user_info"))
+        MetricsServer("0.0.0.0", METRICS_PORT).start()
+    if CLUSTER_ROLE == "worker":
+        queue = WorkQueue(WORK_QUEUE_FILE)
+        journal = None if JOURNAL_FILE is None else Journal(f"{JOURNAL_FILE}.{CLUSTER_SHARD}")
+        worker_loop(bot, queue, LeaderLease(queue, ttl=LEADER_LEASE_TTL), CLUSTER_SHARD, CLUSTER_WORKERS,
+                    OWNER_TELEGRAM_ID, journal)
+        return None
+    if CLUSTER_ROLE == "ingest":
+        subscribe_owner(OWNER_TELEGRAM_ID)  # Only this process writes the subscriptions file (the workers read it)
+    else:
+        journal = None if JOURNAL_FILE is None else Journal(JOURNAL_FILE)
+        Thread(target=schedule_loop, args=(bot, OWNER_TELEGRAM_ID, journal,),
+               daemon=True).start()  # Stops with the polling loop (the jobs already running are finished)
+    if WEBHOOK_URL != "":
+        bot.start_webhook(port=WEBHOOK_PORT, path=urlparse(WEBHOOK_URL).path or "/", secret_token=WEBHOOK_SECRET,
+                          url=WEBHOOK_URL)
+    else:
+        bot.start_polling()
 
 
 if __name__ == "__main__":